@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from api.models.book import Book
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.generation_dataset import GenerationDataset
+from api.models.pagination import PageLivres, Pagination
+from api.models.resultat_approximatif import ResultatApproximatif
+from api.models.statistique_categorie import StatistiqueCategorie
 
 
 class BookRepositoryInterface(ABC):
@@ -31,6 +36,19 @@ class BookRepositoryInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_books_by_ids(self, book_ids: List[int]) -> List[Book]:
+        """
+        Recuperer plusieurs livres par leurs IDs en une seule requete.
+
+        Args:
+            book_ids: IDs des livres, sans doublon
+
+        Returns:
+            List[Book]: Livres trouves, dans un ordre quelconque (les IDs absents sont ignores)
+        """
+        pass
+
     @abstractmethod
     def save_book(self, book: Book) -> Book:
         """
@@ -50,9 +68,104 @@ class BookRepositoryInterface(ABC):
         Rechercher des livres par categorie.
 
         Args:
-            category: Le nom de la categorie a rechercher
+            category: Le nom exact de la categorie, sans tenir compte de la casse
 
         Returns:
             List[Book]: Liste des livres de cette categorie
         """
         pass
+
+    @abstractmethod
+    def rechercher_livres(self, filtres: FiltresRecherche,
+                          pagination: Optional[Pagination] = None,
+                          champs: Optional[List[str]] = None) -> PageLivres:
+        """
+        Rechercher des livres selon des filtres combines.
+
+        Args:
+            filtres: Titre (sous-chaine, sans casse), categorie, prix min/max et note minimum
+            pagination: Tri, limite et curseur (None = tous les livres tries par id)
+            champs: Champs a lire ; None = livres complets (Book), sinon dictionnaires
+
+        Returns:
+            PageLivres: Livres correspondant a tous les filtres et curseur suivant
+        """
+        pass
+
+    @abstractmethod
+    def exporter_livres(self, filtres: FiltresRecherche, champs: List[str],
+                        taille_lot: int) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourir les livres filtres, tries par id, sans les charger tous en memoire.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            champs: Champs a lire
+            taille_lot: Nombre de lignes lues a la fois
+
+        Returns:
+            Iterator[Dict[str, Any]]: Livres, un dictionnaire des champs par ligne
+        """
+        pass
+
+    @abstractmethod
+    def recherche_plein_texte(self, texte: str, pagination: Pagination) -> PageLivres:
+        """
+        Rechercher des livres en plein texte dans le titre, le titre complet et la description.
+
+        Args:
+            texte: Requete saisie par l'utilisateur (syntaxe web : "phrase", -exclu, or)
+            pagination: Limite et curseur, tri par pertinence decroissante
+
+        Returns:
+            PageLivres: ResultatPleinTexte classes par pertinence et curseur suivant
+        """
+        pass
+
+    @abstractmethod
+    def recherche_approximative(self, texte: str, champ: str, seuil: float,
+                                limite: int) -> List[ResultatApproximatif]:
+        """
+        Rechercher des livres dont le titre ou la categorie ressemble au texte (trigrammes).
+
+        Args:
+            texte: Texte saisi, eventuellement avec des fautes de frappe
+            champ: Attribut compare ("title" ou "categorie")
+            seuil: Similarite minimum, entre 0 et 1
+            limite: Nombre maximum de resultats
+
+        Returns:
+            List[ResultatApproximatif]: Livres classes par similarite decroissante
+        """
+        pass
+
+    @abstractmethod
+    def obtenir_version_dataset(self) -> Optional[str]:
+        """
+        Recuperer la version du jeu de donnees, qui change a chaque crawl.
+
+        Returns:
+            Optional[str]: Version courante, None si elle ne peut pas etre lue
+        """
+        pass
+
+    @abstractmethod
+    def obtenir_generation_dataset(self) -> Optional[GenerationDataset]:
+        """
+        Recuperer la version du jeu de donnees et la date de sa derniere mise a jour.
+
+        Returns:
+            Optional[GenerationDataset]: Generation courante, None si elle ne peut pas etre lue
+        """
+        pass
+
+    @abstractmethod
+    def obtenir_statistiques_categories(self) -> List[StatistiqueCategorie]:
+        """
+        Recuperer en une passe le nombre de livres, le rang, le pourcentage
+        et le prix moyen de chaque categorie.
+
+        Returns:
+            List[StatistiqueCategorie]: Statistiques classees par rang
+        """
+        pass
@@ -0,0 +1,166 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional
+from api.models.book import Book
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.generation_dataset import GenerationDataset
+from api.models.lot_livres import LotLivres
+from api.models.pagination import PageLivres, Pagination
+from api.models.resultat_approximatif import LIMITE_APPROXIMATIVE, SEUIL_SIMILARITE, ResultatApproximatif
+from api.models.resultat_plein_texte import LIMITE_PLEIN_TEXTE
+from api.models.prix_moyen_categorie import PrixMoyenCategorie
+from api.models.top_categorie import TopCategorie
+
+
+class BookServiceAsyncInterface(ABC):
+    """
+    Interface definissant les operations de lecture asynchrones pour les livres.
+    """
+
+    @abstractmethod
+    async def get_all_books(self) -> List[Book]:
+        """
+        Recuperer tous les livres avec validation metier.
+
+        Returns:
+            List[Book]: Liste de tous les livres
+        """
+        pass
+
+    @abstractmethod
+    async def get_book_by_id(self, book_id: int) -> Optional[Book]:
+        """
+        Recuperer un livre par son ID avec validation.
+
+        Args:
+            book_id: L'ID du livre a recuperer
+
+        Returns:
+            Optional[Book]: Le livre trouve ou None
+        """
+        pass
+
+    @abstractmethod
+    async def get_books_by_ids(self, book_ids: List[int]) -> LotLivres:
+        """
+        Recuperer un lot de livres par leurs IDs en une seule lecture.
+
+        Args:
+            book_ids: IDs des livres, dans l'ordre voulu
+
+        Returns:
+            LotLivres: Livres trouves dans l'ordre demande et IDs absents
+
+        Raises:
+            ValueError: Si le lot est vide, trop grand ou contient un ID invalide
+        """
+        pass
+
+    @abstractmethod
+    async def find_by_category(self, category: str) -> List[Book]:
+        """
+        Rechercher des livres par categorie.
+
+        Args:
+            category: Le nom de la categorie a rechercher
+
+        Returns:
+            List[Book]: Liste des livres de cette categorie
+        """
+        pass
+
+    @abstractmethod
+    async def rechercher_livres(self, filtres: FiltresRecherche,
+                                pagination: Optional[Pagination] = None,
+                                champs: Optional[List[str]] = None) -> PageLivres:
+        """
+        Rechercher des livres selon des filtres combines avec validation.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            pagination: Tri, limite et curseur (None = tous les livres tries par id)
+            champs: Champs a lire ; None = livres complets (Book), sinon dictionnaires
+
+        Returns:
+            PageLivres: Livres correspondant a tous les filtres et curseur suivant
+        """
+        pass
+
+    @abstractmethod
+    async def recherche_plein_texte(self, texte: str, limite: int = LIMITE_PLEIN_TEXTE,
+                                    curseur: Optional[str] = None) -> PageLivres:
+        """
+        Rechercher des livres en plein texte (titre, titre complet, description) avec validation.
+
+        Args:
+            texte: Requete saisie par l'utilisateur
+            limite: Nombre maximum de resultats par page
+            curseur: Curseur renvoye par la page precedente
+
+        Returns:
+            PageLivres: ResultatPleinTexte classes par pertinence et curseur suivant
+        """
+        pass
+
+    @abstractmethod
+    async def recherche_approximative(self, texte: str, champ: str = "titre",
+                                      seuil: float = SEUIL_SIMILARITE,
+                                      limite: int = LIMITE_APPROXIMATIVE) -> List[ResultatApproximatif]:
+        """
+        Rechercher des livres dont le titre ou la categorie ressemble au texte, avec validation.
+
+        Args:
+            texte: Texte saisi, eventuellement avec des fautes de frappe
+            champ: Champ compare ("titre" ou "categorie")
+            seuil: Similarite minimum, entre 0 et 1
+            limite: Nombre maximum de resultats
+
+        Returns:
+            List[ResultatApproximatif]: Livres classes par similarite decroissante
+        """
+        pass
+
+    @abstractmethod
+    def exporter_livres(self, filtres: FiltresRecherche, champs: Optional[List[str]],
+                        taille_lot: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Exporter les livres filtres en flux, sans cache ni chargement complet.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            champs: Champs a exporter ; None = tous les champs de Book
+            taille_lot: Nombre de lignes lues a la fois
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Livres, un dictionnaire des champs par ligne
+        """
+        pass
+
+    @abstractmethod
+    async def calculer_prix_moyen_par_categorie(self) -> List[PrixMoyenCategorie]:
+        """
+        Calculer le prix moyen des livres par categorie.
+
+        Returns:
+            List[PrixMoyenCategorie]: Liste des prix moyens par categorie
+        """
+        pass
+
+    @abstractmethod
+    async def obtenir_top_categories_par_nombre_livres(self) -> List[TopCategorie]:
+        """
+        Obtenir le classement des categories par nombre de livres.
+
+        Returns:
+            List[TopCategorie]: Liste des categories classees par nombre de livres decroissant
+        """
+        pass
+
+    @abstractmethod
+    async def obtenir_generation_dataset(self) -> Optional[GenerationDataset]:
+        """
+        Recuperer la generation du jeu de donnees (version et date du dernier crawl), sans cache.
+
+        Returns:
+            Optional[GenerationDataset]: Generation courante, None si elle ne peut pas etre lue
+        """
+        pass
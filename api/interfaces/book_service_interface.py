@@ -1,6 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from api.models.book import Book
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.generation_dataset import GenerationDataset
+from api.models.lot_livres import LotLivres
+from api.models.pagination import PageLivres, Pagination
+from api.models.resultat_approximatif import LIMITE_APPROXIMATIVE, SEUIL_SIMILARITE, ResultatApproximatif
+from api.models.resultat_plein_texte import LIMITE_PLEIN_TEXTE
 
 
 class BookServiceInterface(ABC):
@@ -31,6 +37,22 @@ class BookServiceInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_books_by_ids(self, book_ids: List[int]) -> LotLivres:
+        """
+        Recuperer un lot de livres par leurs IDs en une seule lecture.
+
+        Args:
+            book_ids: IDs des livres, dans l'ordre voulu
+
+        Returns:
+            LotLivres: Livres trouves dans l'ordre demande et IDs absents
+
+        Raises:
+            ValueError: Si le lot est vide, trop grand ou contient un ID invalide
+        """
+        pass
+
     @abstractmethod
     def find_by_category(self, category: str) -> List[Book]:
         """
@@ -43,3 +65,80 @@ class BookServiceInterface(ABC):
             List[Book]: Liste des livres de cette categorie
         """
         pass
+
+    @abstractmethod
+    def rechercher_livres(self, filtres: FiltresRecherche,
+                          pagination: Optional[Pagination] = None,
+                          champs: Optional[List[str]] = None) -> PageLivres:
+        """
+        Rechercher des livres selon des filtres combines avec validation.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            pagination: Tri, limite et curseur (None = tous les livres tries par id)
+            champs: Champs a lire ; None = livres complets (Book), sinon dictionnaires
+
+        Returns:
+            PageLivres: Livres correspondant a tous les filtres et curseur suivant
+        """
+        pass
+
+    @abstractmethod
+    def recherche_plein_texte(self, texte: str, limite: int = LIMITE_PLEIN_TEXTE,
+                              curseur: Optional[str] = None) -> PageLivres:
+        """
+        Rechercher des livres en plein texte (titre, titre complet, description) avec validation.
+
+        Args:
+            texte: Requete saisie par l'utilisateur
+            limite: Nombre maximum de resultats par page
+            curseur: Curseur renvoye par la page precedente
+
+        Returns:
+            PageLivres: ResultatPleinTexte classes par pertinence et curseur suivant
+        """
+        pass
+
+    @abstractmethod
+    def recherche_approximative(self, texte: str, champ: str = "titre",
+                                seuil: float = SEUIL_SIMILARITE,
+                                limite: int = LIMITE_APPROXIMATIVE) -> List[ResultatApproximatif]:
+        """
+        Rechercher des livres dont le titre ou la categorie ressemble au texte, avec validation.
+
+        Args:
+            texte: Texte saisi, eventuellement avec des fautes de frappe
+            champ: Champ compare ("titre" ou "categorie")
+            seuil: Similarite minimum, entre 0 et 1
+            limite: Nombre maximum de resultats
+
+        Returns:
+            List[ResultatApproximatif]: Livres classes par similarite decroissante
+        """
+        pass
+
+    @abstractmethod
+    def exporter_livres(self, filtres: FiltresRecherche, champs: Optional[List[str]],
+                        taille_lot: int) -> Iterator[Dict[str, Any]]:
+        """
+        Exporter les livres filtres en flux, sans cache ni chargement complet.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            champs: Champs a exporter ; None = tous les champs de Book
+            taille_lot: Nombre de lignes lues a la fois
+
+        Returns:
+            Iterator[Dict[str, Any]]: Livres, un dictionnaire des champs par ligne
+        """
+        pass
+
+    @abstractmethod
+    def obtenir_generation_dataset(self) -> Optional[GenerationDataset]:
+        """
+        Recuperer la generation du jeu de donnees (version et date du dernier crawl), sans cache.
+
+        Returns:
+            Optional[GenerationDataset]: Generation courante, None si elle ne peut pas etre lue
+        """
+        pass
@@ -1,8 +1,23 @@
+import sys
 from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+def interner(valeur):
+    """
+    Partager une chaîne répétée entre tous les livres qui la portent.
+
+    Args:
+        valeur: Valeur d'un champ de Book
+
+    Returns:
+        La chaîne internée, ou la valeur telle quelle si ce n'est pas une chaîne
+    """
+    return sys.intern(valeur) if type(valeur) is str else valeur
+
+
+# slots : pas de __dict__ par instance, les champs sont stockés dans l'objet
+@dataclass(slots=True)
 class Book:
     id: Optional[int] = None
     url_page: str = ""
@@ -21,4 +36,10 @@ class Book:
     code_upc: str = ""
     type_produit: str = "Books"
     taxe: float = 0.0
-    nombre_avis: int = 0
\ No newline at end of file
+    nombre_avis: int = 0
+
+    def __post_init__(self):
+        # Valeurs répétées d'un livre à l'autre : une seule chaîne par valeur distincte
+        self.categorie = interner(self.categorie)
+        self.fil_ariane = interner(self.fil_ariane)
+        self.type_produit = interner(self.type_produit)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle résumé des livres pour les listes et sélection de champs (fields=).
+"""
+from dataclasses import dataclass, fields
+from typing import List, Optional
+
+from api.models.book import Book
+
+# Champs exposables d'un livre, dans l'ordre de la dataclass Book
+CHAMPS_LIVRE = [champ.name for champ in fields(Book)]
+
+
+@dataclass
+class BookResume:
+    """
+    Résumé d'un livre pour les listes : sans description, fil d'Ariane ni images.
+    """
+    id: Optional[int] = None
+    url_page: str = ""
+    categorie: str = ""
+    title: str = ""
+    prix_numerique: float = 0.0
+    note_etoiles_nombre: int = 0
+    nombre_avis_clients: int = 0
+    en_stock: bool = False
+
+
+CHAMPS_RESUME = [champ.name for champ in fields(BookResume)]
+
+
+def analyser_champs(texte: Optional[str]) -> Optional[List[str]]:
+    """
+    Analyser le paramètre fields= (noms de champs séparés par des virgules).
+
+    Args:
+        texte: Valeur du paramètre, None si absent
+
+    Returns:
+        Optional[List[str]]: Champs demandés sans doublon, None si absent
+
+    Raises:
+        ValueError: Si un champ est inconnu ou si la liste est vide
+    """
+    if texte is None:
+        return None
+
+    champs = list(dict.fromkeys(champ.strip() for champ in texte.split(",") if champ.strip()))
+    if not champs:
+        raise ValueError("Le paramètre fields doit nommer au moins un champ")
+
+    inconnus = [champ for champ in champs if champ not in CHAMPS_LIVRE]
+    if inconnus:
+        raise ValueError(f"Champs inconnus: {', '.join(inconnus)} (disponibles: {', '.join(CHAMPS_LIVRE)})")
+    return champs
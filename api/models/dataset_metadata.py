@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Modele SQLAlchemy pour la version du jeu de donnees.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, func
+from database_config import Base
+
+# Cle de la version du catalogue de livres
+CLE_VERSION_LIVRES = "books"
+
+
+class DatasetMetadataSQL(Base):
+    """
+    Version du jeu de donnees, incrementee a la fin de chaque crawl.
+
+    Les caches de l'API sont invalides lorsque la version change.
+    """
+    __tablename__ = "dataset_metadata"
+
+    cle = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    mis_a_jour_le = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<DatasetMetadataSQL(cle='{self.cle}', version={self.version})>"
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour la distribution d'une colonne numérique des livres d'une catégorie.
+"""
+from dataclasses import dataclass, field
+from typing import Dict
+
+# Champ exposé -> attribut de Book chargé en colonne
+CHAMPS_ANALYTIQUES = {
+    "prix": "prix_numerique",
+    "note": "note_etoiles_nombre",
+    "stock": "nombre_stock",
+    "avis": "nombre_avis",
+}
+
+PERCENTILES_DEFAUT = (10.0, 25.0, 50.0, 75.0, 90.0)
+PERCENTILES_MAX = 20
+
+
+@dataclass
+class DistributionCategorie:
+    """
+    Minimum, maximum, moyenne et percentiles d'un champ pour une catégorie.
+    """
+    categorie: str
+    nombre_livres: int
+    minimum: float
+    maximum: float
+    moyenne: float
+    percentiles: Dict[str, float] = field(default_factory=dict)
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour les filtres de recherche de livres.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class FiltresRecherche:
+    """
+    Filtres de recherche de livres, tous optionnels et combinés par ET.
+    """
+    titre: Optional[str] = None
+    categorie: Optional[str] = None
+    prix_min: Optional[float] = None
+    prix_max: Optional[float] = None
+    note_min: Optional[int] = None
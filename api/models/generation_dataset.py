@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour la génération du jeu de données (version et date du dernier crawl).
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class GenerationDataset:
+    """
+    Version du jeu de données et date de sa dernière mise à jour.
+
+    Les deux changent à la fin de chaque crawl ; elles servent aux réponses
+    conditionnelles (ETag, Last-Modified) et à l'invalidation des caches.
+    """
+    version: str
+    mis_a_jour_le: Optional[datetime] = None
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour l'histogramme d'une colonne numérique des livres.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+INTERVALLES_DEFAUT = 10
+INTERVALLES_MAX = 200
+
+
+@dataclass
+class Histogramme:
+    """
+    Nombre de livres par intervalle d'un champ : comptes[i] entre bornes[i] et bornes[i + 1].
+    """
+    champ: str
+    categorie: Optional[str] = None
+    bornes: List[float] = field(default_factory=list)
+    comptes: List[int] = field(default_factory=list)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour la lecture groupée de livres par identifiants.
+"""
+import os
+from dataclasses import dataclass, field
+from typing import List
+
+from api.models.book import Book
+
+# Nombre maximum d'identifiants par lot (configurable)
+TAILLE_LOT_MAX = int(os.environ.get("BOOKS_API_LOT_MAX", "100"))
+
+
+@dataclass
+class LotLivres:
+    """
+    Livres trouvés, dans l'ordre des identifiants demandés, et identifiants absents.
+    """
+    livres: List[Book] = field(default_factory=list)
+    manquants: List[int] = field(default_factory=list)
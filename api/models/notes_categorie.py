@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour la répartition des notes d'une catégorie (tableau croisé note x catégorie).
+"""
+from dataclasses import dataclass, field
+from typing import Dict
+
+# Notes possibles : 0 (inconnue) à 5 étoiles
+NOTES = range(6)
+
+
+@dataclass
+class NotesCategorie:
+    """
+    Nombre de livres par note dans une catégorie, et note moyenne.
+    """
+    categorie: str
+    nombre_livres: int
+    note_moyenne: float
+    notes: Dict[str, int] = field(default_factory=dict)
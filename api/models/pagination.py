@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Modèles pour la pagination par clé (keyset) des listes de livres.
+
+Le curseur est opaque pour le client : il encode le tri et la position
+(valeur de la colonne de tri, id) du dernier livre de la page. La page
+suivante reprend strictement après cette position, sans OFFSET.
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from api.models.book import Book
+
+# Tri exposé -> attribut de Book (et colonne de BookSQL)
+CHAMPS_TRI = {
+    "id": "id",
+    "prix": "prix_numerique",
+    "note": "note_etoiles_nombre",
+    "avis": "nombre_avis_clients",
+    "titre": "title",
+}
+
+LIMITE_MAX = 1000
+
+
+@dataclass
+class Pagination:
+    """
+    Tri et position demandés pour une page de livres.
+    """
+    tri: str = "id"
+    descendant: bool = False
+    limite: Optional[int] = None
+    curseur: Optional[str] = None
+    # Tris disponibles (None = CHAMPS_TRI), par exemple la pertinence en plein texte
+    champs_tri: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def depuis_parametres(cls, sort: str = "id", limit: Optional[int] = None,
+                          curseur: Optional[str] = None,
+                          champs_tri: Optional[Dict[str, str]] = None) -> "Pagination":
+        """
+        Construire la pagination depuis les paramètres de requête.
+
+        Args:
+            sort: Nom du tri, préfixé par "-" pour l'ordre décroissant
+            limit: Nombre maximum de livres par page (None = tous)
+            curseur: Curseur renvoyé par la page précédente
+            champs_tri: Tris disponibles (None = CHAMPS_TRI)
+
+        Returns:
+            Pagination: Pagination validée
+
+        Raises:
+            ValueError: Si le tri ou la limite est invalide
+        """
+        sort = (sort or "id").strip()
+        descendant = sort.startswith("-")
+        tri = sort.lstrip("-")
+        tris_disponibles = champs_tri or CHAMPS_TRI
+        if tri not in tris_disponibles:
+            raise ValueError(f"Tri inconnu: {tri} (attendu: {', '.join(tris_disponibles)})")
+        if limit is not None and not 1 <= limit <= LIMITE_MAX:
+            raise ValueError(f"La limite doit être comprise entre 1 et {LIMITE_MAX}")
+        if curseur is not None and limit is None:
+            raise ValueError("Un curseur exige une limite")
+        return cls(tri=tri, descendant=descendant, limite=limit, curseur=curseur or None, champs_tri=champs_tri)
+
+    @property
+    def champ(self) -> str:
+        """Attribut de Book (et colonne SQL) utilisé pour le tri."""
+        return (self.champs_tri or CHAMPS_TRI)[self.tri]
+
+    @property
+    def cle_tri(self) -> str:
+        """Tri tel qu'exposé au client, encodé dans le curseur."""
+        return f"-{self.tri}" if self.descendant else self.tri
+
+    def position(self) -> Optional[Tuple[Any, int]]:
+        """
+        Décoder la position (valeur de tri, id) portée par le curseur.
+
+        Returns:
+            Optional[Tuple[Any, int]]: Position du dernier livre vu, ou None sans curseur
+
+        Raises:
+            ValueError: Si le curseur est illisible ou créé pour un autre tri
+        """
+        if not self.curseur:
+            return None
+        try:
+            remplissage = "=" * (-len(self.curseur) % 4)
+            contenu = json.loads(base64.urlsafe_b64decode(self.curseur + remplissage))
+            cle_tri, valeur, identifiant = contenu["t"], contenu["v"], int(contenu["id"])
+        except (ValueError, TypeError, KeyError):
+            raise ValueError("Curseur invalide")
+        if cle_tri != self.cle_tri:
+            raise ValueError(f"Curseur créé pour le tri {cle_tri}, pas {self.cle_tri}")
+        return valeur, identifiant
+
+    def curseur_apres(self, livre: Union[Book, Dict[str, Any]]) -> str:
+        """
+        Encoder le curseur positionné après un livre.
+
+        Args:
+            livre: Dernier livre de la page (Book ou dictionnaire de champs)
+
+        Returns:
+            str: Curseur opaque (base64 URL-safe)
+        """
+        if isinstance(livre, dict):
+            valeur, identifiant = livre[self.champ], livre["id"]
+        else:
+            valeur, identifiant = getattr(livre, self.champ), livre.id
+        contenu = {"t": self.cle_tri, "v": valeur, "id": identifiant}
+        brut = json.dumps(contenu, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(brut).decode("ascii").rstrip("=")
+
+    def paginer(self, livres: List[Union[Book, Dict[str, Any]]]) -> "PageLivres":
+        """
+        Construire la page depuis les livres lus (limite + 1 au plus).
+
+        Le livre en trop indique seulement qu'une page suivante existe.
+
+        Args:
+            livres: Livres triés, lus après la position du curseur
+
+        Returns:
+            PageLivres: Livres de la page et curseur de la page suivante
+        """
+        if self.limite is None or len(livres) <= self.limite:
+            return PageLivres(livres=livres)
+        livres = livres[:self.limite]
+        return PageLivres(livres=livres, curseur_suivant=self.curseur_apres(livres[-1]))
+
+
+@dataclass
+class PageLivres:
+    """
+    Page de livres et curseur de la page suivante (None sur la dernière page).
+
+    Les livres sont des Book, ou des dictionnaires si seuls certains champs
+    ont été demandés.
+    """
+    livres: List[Union[Book, Dict[str, Any]]] = field(default_factory=list)
+    curseur_suivant: Optional[str] = None
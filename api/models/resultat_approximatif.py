@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour un résultat de la recherche approximative (trigrammes).
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+# Champ exposé -> attribut de Book (et colonne indexée en trigrammes)
+CHAMPS_APPROXIMATIFS = {
+    "titre": "title",
+    "categorie": "categorie",
+}
+
+# Seuil par défaut de pg_trgm (similarity_threshold)
+SEUIL_SIMILARITE = 0.3
+LIMITE_APPROXIMATIVE = 20
+LIMITE_APPROXIMATIVE_MAX = 100
+
+
+@dataclass
+class ResultatApproximatif:
+    """
+    Livre trouvé par la recherche approximative, avec la similarité du champ recherché.
+    """
+    id: Optional[int] = None
+    title: str = ""
+    categorie: str = ""
+    prix_numerique: float = 0.0
+    note_etoiles_nombre: int = 0
+    similarite: float = 0.0
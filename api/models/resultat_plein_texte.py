@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour un résultat de la recherche plein texte.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+# Tri des résultats plein texte (pagination par clé sur la pertinence)
+CHAMPS_TRI_PLEIN_TEXTE = {"pertinence": "pertinence"}
+
+LIMITE_PLEIN_TEXTE = 20
+LONGUEUR_MAX_REQUETE = 200
+
+
+@dataclass
+class ResultatPleinTexte:
+    """
+    Livre trouvé par la recherche plein texte, avec sa pertinence et un extrait surligné.
+    """
+    id: Optional[int] = None
+    title: str = ""
+    categorie: str = ""
+    prix_numerique: float = 0.0
+    note_etoiles_nombre: int = 0
+    pertinence: float = 0.0
+    extrait: str = ""
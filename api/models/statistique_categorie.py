@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour les statistiques agrégées d'une catégorie.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class StatistiqueCategorie:
+    """
+    Statistiques d'une catégorie, calculées en une passe pour le prix moyen et le classement.
+    """
+    categorie: str
+    nombre_livres: int
+    rang: int
+    pourcentage_total: float
+    nombre_livres_prix: int
+    prix_moyen: Optional[float] = None
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle pour la valeur du stock par catégorie.
+"""
+from dataclasses import dataclass
+
+
+@dataclass
+class ValeurStockCategorie:
+    """
+    Stock d'une catégorie et sa valeur (somme du prix multiplié par le stock de chaque livre).
+    """
+    categorie: str
+    nombre_livres: int
+    stock_total: int
+    valeur_stock: float
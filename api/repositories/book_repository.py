@@ -1,13 +1,68 @@
-import json
 import os
-from typing import List, Optional
+import re
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from api.interfaces.book_repository_interface import BookRepositoryInterface
 from api.models.book import Book
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.generation_dataset import GenerationDataset
+from api.models.pagination import PageLivres, Pagination
+from api.models.resultat_approximatif import ResultatApproximatif
+from api.models.resultat_plein_texte import ResultatPleinTexte
+from api.models.statistique_categorie import StatistiqueCategorie
+from api.repositories.index_livres import IndexLivres
+from api.repositories.rechargement import surveiller
+from books_toscrape.books_toscrape.flux import fichiers_flux, flux_existe, lire_flux, signature_flux
+from books_toscrape.books_toscrape.instantane_binaire import (FICHIER_INSTANTANE, FLUX_LIVRES, normaliser_livre,
+                                                              ouvrir_instantane)
+
+
+@dataclass(frozen=True)
+class JeuLivres:
+    """
+    Livres chargés, leurs index et leur version, remplacés d'un bloc au rechargement.
+
+    Une lecture prend le jeu courant une fois et ne voit donc jamais un
+    mélange de l'ancien et du nouveau jeu. Les écritures de l'API construisent
+    elles aussi un nouveau jeu, compté dans ecritures.
+    """
+    index: IndexLivres
+    version: Optional[str] = None
+    date: Optional[datetime] = None
+    ecritures: int = 0
+
+    @property
+    def version_donnees(self) -> Optional[str]:
+        """
+        Version exposée aux caches : signature des fichiers, suivie du nombre d'écritures.
+
+        Returns:
+            Optional[str]: Version des données, None si rien n'a été chargé
+        """
+        if self.version is None or not self.ecritures:
+            return self.version
+        return f"{self.version}+{self.ecritures}"
+
+    @property
+    def books(self) -> List[Book]:
+        """
+        Livres du jeu, dans l'ordre de chargement.
+
+        Returns:
+            List[Book]: Livres indexés
+        """
+        return self.index.books
 
 
 class BookRepository(BookRepositoryInterface):
     """
     Classe de dépôt pour gérer les livres depuis les fichiers JSON générés par Scrapy.
+
+    Les lectures passent par des index construits au chargement (IndexLivres)
+    plutôt que par des parcours de tous les livres. Quand les fichiers changent,
+    le nouveau jeu est lu et indexé en arrière-plan puis remplace l'ancien.
     """
 
     def __init__(self):
@@ -15,35 +70,151 @@ class BookRepository(BookRepositoryInterface):
         Initialiser le repository avec les chemins vers les fichiers JSON.
         """
         self.base_path = "books_toscrape"
-        self.books: List[Book] = []
+        self.jeu = JeuLivres(index=IndexLivres([]))
+        # Un seul rechargement ou une seule écriture à la fois
+        self.verrou = threading.Lock()
         self.charger_donnees_livres()
+        surveiller(self)
+
+    @property
+    def books(self) -> List[Book]:
+        """
+        Livres du jeu courant.
+        """
+        return self.jeu.books
+
+    @property
+    def index(self) -> IndexLivres:
+        """
+        Index du jeu courant (ses livres sont dans index.books).
+        """
+        return self.jeu.index
 
     def charger_donnees_livres(self) -> None:
         """
-        Charger les données des livres depuis les fichiers JSON de Scrapy.
-        Priorité: books_by_categories.json (complet) puis detail_books.json si nécessaire.
+        Charger les données des livres depuis les flux de Scrapy et remplacer le jeu courant.
+        """
+        self.jeu = self.lire_jeu()
+
+    def lire_jeu(self) -> JeuLivres:
+        """
+        Lire les livres depuis les flux de Scrapy, en streaming, et les indexer.
+        L'instantané binaire écrit à la fin du crawl est lu en priorité s'il correspond au flux.
+        Priorité: books_by_categories (complet) puis detail_books si nécessaire.
+        Chaque flux est lu au format JSON Lines compressé rotatif ou ancien tableau JSON.
+
+        Returns:
+            JeuLivres: Nouveau jeu (vide, sans version, si aucun flux n'est lisible)
         """
         try:
-            # Charger d'abord books_by_categories.json (données complètes avec tous les livres)
-            books_categories_path = os.path.join(self.base_path, "books_by_categories.json")
-            if os.path.exists(books_categories_path):
-                with open(books_categories_path, 'r', encoding='utf-8') as f:
-                    json_data = json.load(f)
-                    self.books = [self.convertir_json_vers_book(item, index + 1)
-                                 for index, item in enumerate(json_data)]
-                    return
-
-            # Si pas de books_by_categories, charger detail_books.json
-            detail_books_path = os.path.join(self.base_path, "detail_books.json")
-            if os.path.exists(detail_books_path):
-                with open(detail_books_path, 'r', encoding='utf-8') as f:
-                    json_data = json.load(f)
-                    self.books = [self.convertir_json_vers_book(item, index + 1)
-                                 for index, item in enumerate(json_data)]
+            jeu = self.lire_instantane()
+            if jeu is not None:
+                return jeu
+
+            for base in FLUX_LIVRES:
+                if flux_existe(base, self.base_path):
+                    # Signature lue avant les livres : une écriture pendant la lecture change la version suivante
+                    version = self.signature_flux(base)
+                    date = self.date_flux(base)
+                    books = [self.convertir_json_vers_book(item, index + 1)
+                             for index, item in enumerate(lire_flux(base, self.base_path))]
+                    return JeuLivres(index=IndexLivres(books), version=version, date=date)
 
         except Exception as e:
             print(f"Erreur lors du chargement des données: {e}")
-            self.books = []
+
+        return JeuLivres(index=IndexLivres([]))
+
+    def lire_instantane(self) -> Optional[JeuLivres]:
+        """
+        Lire les livres depuis l'instantané binaire projeté en mémoire, sans décodage JSON.
+
+        Returns:
+            Optional[JeuLivres]: Nouveau jeu, None si l'instantané est absent ou périmé
+        """
+        instantane = ouvrir_instantane(self.base_path)
+        if instantane is None:
+            return None
+        with instantane:
+            # Les colonnes de l'instantané suivent l'ordre des champs de Book
+            books = [Book(*ligne) for ligne in instantane.lignes()]
+            version = instantane.signature
+
+        base = next((base for base in FLUX_LIVRES if flux_existe(base, self.base_path)), None)
+        if base is not None:
+            date = self.date_flux(base)
+        else:
+            date = datetime.fromtimestamp(os.stat(os.path.join(self.base_path, FICHIER_INSTANTANE)).st_mtime,
+                                          timezone.utc)
+        return JeuLivres(index=IndexLivres(books), version=version, date=date)
+
+    def signature_fichiers(self) -> Optional[str]:
+        """
+        Calculer la signature actuelle des fichiers du flux lu en priorité.
+
+        Returns:
+            Optional[str]: Signature des fichiers, None si aucun flux n'existe
+        """
+        for base in FLUX_LIVRES:
+            if flux_existe(base, self.base_path):
+                return self.signature_flux(base)
+        return None
+
+    def version_chargee(self) -> Optional[str]:
+        """
+        Signature des fichiers du jeu en mémoire.
+
+        Returns:
+            Optional[str]: Version du jeu courant
+        """
+        return self.jeu.version
+
+    def recharger(self, force: bool = False) -> bool:
+        """
+        Relire les flux et remplacer le jeu courant d'un bloc, si les fichiers ont changé.
+
+        Les requêtes en cours continuent sur l'ancien jeu pendant la lecture.
+        Un flux devenu illisible ne remplace pas un jeu déjà chargé.
+
+        Args:
+            force: Relire même si la signature des fichiers n'a pas changé
+
+        Returns:
+            bool: True si le jeu a été remplacé
+        """
+        with self.verrou:
+            if not force and self.signature_fichiers() == self.jeu.version:
+                return False
+            jeu = self.lire_jeu()
+            if jeu.version is None and self.jeu.version is not None:
+                return False
+            self.jeu = jeu
+            return True
+
+    def signature_flux(self, base: str) -> str:
+        """
+        Calculer la signature (date de modification et taille) des fichiers d'un flux.
+
+        Args:
+            base: Nom de base du flux
+
+        Returns:
+            str: Signature des fichiers lus
+        """
+        return signature_flux(base, self.base_path)
+
+    def date_flux(self, base: str) -> Optional[datetime]:
+        """
+        Calculer la date de la dernière modification des fichiers d'un flux.
+
+        Args:
+            base: Nom de base du flux
+
+        Returns:
+            Optional[datetime]: Date UTC du fichier le plus récent, None sans fichier
+        """
+        dates = [os.stat(chemin).st_mtime for chemin in fichiers_flux(base, self.base_path)]
+        return datetime.fromtimestamp(max(dates), timezone.utc) if dates else None
 
     def convertir_json_vers_book(self, json_data: dict, book_id: int) -> Book:
         """
@@ -56,41 +227,7 @@ class BookRepository(BookRepositoryInterface):
         Returns:
             Book: L'objet Book créé
         """
-        # Debug: Récupération sécurisée de la catégorie
-        categorie = json_data.get('categorie') or json_data.get('category', '')
-
-        # Debug: Gestion robuste des prix
-        try:
-            prix = float(json_data.get('prix_numerique', json_data.get('price', 0.0)))
-        except (ValueError, TypeError):
-            prix = 0.0
-
-        # Debug: Gestion robuste des notes
-        try:
-            note = int(json_data.get('note_etoiles', json_data.get('star_rating', 0)))
-        except (ValueError, TypeError):
-            note = 0
-
-        return Book(
-            id=json_data.get('id', book_id),
-            url_page=json_data.get('url_page', json_data.get('url', '')),
-            categorie=categorie,
-            title=json_data.get('titre', json_data.get('title', '')),
-            prix_numerique=prix,
-            note_etoiles_nombre=note,
-            nombre_avis_clients=int(json_data.get('nombre_avis', json_data.get('reviews', 0))),
-            en_stock='in stock' in json_data.get('disponibilite', json_data.get('availability', '')).lower(),
-            nombre_stock=int(json_data.get('nombre_stock', 0)),
-            description=json_data.get('description', ''),
-            url_image=json_data.get('url_image', json_data.get('image_url', '')),
-            nom_fichier_image='',
-            alt_image='',
-            fil_ariane=str(json_data.get('fil_ariane', [])),
-            code_upc=json_data.get('code_upc', ''),
-            type_produit=json_data.get('type_produit', 'Books'),
-            taxe=float(json_data.get('taxe', 0.0)),
-            nombre_avis=int(json_data.get('nombre_avis', 0))
-        )
+        return Book(**normaliser_livre(json_data, book_id))
 
     def get_all_books(self) -> List[Book]:
         """
@@ -111,10 +248,20 @@ class BookRepository(BookRepositoryInterface):
         Returns:
             Optional[Book]: Le livre trouvé ou None
         """
-        for book in self.books:
-            if book.id == book_id:
-                return book
-        return None
+        return self.index.livre(book_id)
+
+    def get_books_by_ids(self, book_ids: List[int]) -> List[Book]:
+        """
+        Récupérer plusieurs livres par leurs IDs dans l'index.
+
+        Args:
+            book_ids: IDs des livres, sans doublon
+
+        Returns:
+            List[Book]: Livres trouvés, dans l'ordre des IDs
+        """
+        index = self.index
+        return [book for book in map(index.livre, book_ids) if book is not None]
 
     def save_book(self, book: Book) -> Book:
         """
@@ -126,12 +273,15 @@ class BookRepository(BookRepositoryInterface):
         Returns:
             Book: Le livre sauvegardé avec son ID
         """
-        # Générer un nouvel ID
-        max_id = max([b.id for b in self.books if b.id], default=0)
-        book.id = max_id + 1
+        with self.verrou:
+            # Générer un nouvel ID
+            max_id = max([b.id for b in self.books if b.id], default=0)
+            book.id = max_id + 1
 
-        # Ajouter à la liste
-        self.books.append(book)
+            # Nouveau jeu : les lectures en cours gardent l'ancien, inchangé
+            books = list(self.books)
+            books.append(book)
+            self.remplacer_livres(books)
 
         return book
 
@@ -146,12 +296,15 @@ class BookRepository(BookRepositoryInterface):
         Returns:
             Optional[Book]: Le livre mis à jour ou None si non trouvé
         """
-        for index, book in enumerate(self.books):
-            if book.id == book_id:
-                # Conserver l'ID original
-                book_data.id = book_id
-                self.books[index] = book_data
-                return book_data
+        with self.verrou:
+            for index, book in enumerate(self.books):
+                if book.id == book_id:
+                    # Conserver l'ID original
+                    book_data.id = book_id
+                    books = list(self.books)
+                    books[index] = book_data
+                    self.remplacer_livres(books)
+                    return book_data
         return None
 
     def delete_book(self, book_id: int) -> bool:
@@ -164,24 +317,304 @@ class BookRepository(BookRepositoryInterface):
         Returns:
             bool: True si supprimé, False sinon
         """
-        for index, book in enumerate(self.books):
-            if book.id == book_id:
-                del self.books[index]
-                return True
+        with self.verrou:
+            for index, book in enumerate(self.books):
+                if book.id == book_id:
+                    books = list(self.books)
+                    del books[index]
+                    self.remplacer_livres(books)
+                    return True
         return False
 
+    def remplacer_livres(self, books: List[Book]) -> None:
+        """
+        Indexer les livres modifiés par une écriture et remplacer le jeu courant d'un bloc.
+
+        La signature des fichiers est conservée (pas de rechargement déclenché),
+        mais la version des données change : les caches versionnés sont vidés.
+        À appeler sous self.verrou.
+
+        Args:
+            books: Nouvelle liste complète des livres
+        """
+        self.jeu = replace(self.jeu, index=IndexLivres(books), ecritures=self.jeu.ecritures + 1,
+                           date=datetime.now(timezone.utc))
+
     def find_by_category(self, category: str) -> List[Book]:
         """
-        Rechercher des livres par catégorie.
+        Rechercher des livres par catégorie exacte, sans tenir compte de la casse.
 
         Args:
-            category: Le nom de la catégorie à rechercher
+            category: Le nom exact de la catégorie
 
         Returns:
             List[Book]: Liste des livres de cette catégorie
         """
+        index = self.index
+        return [index.books[position] for position in index.positions_categorie(category)]
+
+    def rechercher_livres(self, filtres: FiltresRecherche,
+                          pagination: Optional[Pagination] = None,
+                          champs: Optional[List[str]] = None) -> PageLivres:
+        """
+        Rechercher des livres selon des filtres combinés, en un seul parcours, puis paginer.
+
+        Args:
+            filtres: Titre, catégorie, prix min/max et note minimum
+            pagination: Tri, limite et curseur (None = tous les livres triés par id)
+            champs: Champs à lire ; None = livres complets (Book), sinon dictionnaires
+
+        Returns:
+            PageLivres: Livres correspondant à tous les filtres et curseur suivant
+        """
+        pagination = pagination or Pagination()
+        titre = filtres.titre.lower() if filtres.titre else None
+        resultats = [
+            book for book in self.candidats_recherche(filtres)
+            if (titre is None or titre in book.title.lower())
+            and (filtres.prix_min is None or book.prix_numerique >= filtres.prix_min)
+            and (filtres.prix_max is None or book.prix_numerique <= filtres.prix_max)
+            and (filtres.note_min is None or book.note_etoiles_nombre >= filtres.note_min)
+        ]
+
+        # Même ordre et même reprise par clé (valeur de tri, id) que le repository SQL
+        def cle(book):
+            return getattr(book, pagination.champ), book.id
+
+        resultats.sort(key=cle, reverse=pagination.descendant)
+        position = pagination.position()
+        if position is not None:
+            position = tuple(position)
+            resultats = [book for book in resultats
+                         if (cle(book) < position if pagination.descendant else cle(book) > position)]
+
+        if pagination.limite is not None:
+            resultats = resultats[:pagination.limite + 1]
+
+        page = pagination.paginer(resultats)
+        if champs is not None:
+            page.livres = [{champ: getattr(book, champ) for champ in champs} for book in page.livres]
+        return page
+
+    def candidats_recherche(self, filtres: FiltresRecherche) -> List[Book]:
+        """
+        Restreindre une recherche aux livres de la catégorie et aux titres contenant
+        le texte, lus dans les index ; les autres filtres s'appliquent ensuite.
+
+        Args:
+            filtres: Filtres de la recherche
+
+        Returns:
+            List[Book]: Livres candidats, dans l'ordre de chargement
+        """
+        index = self.index
+        positions = self.positions_candidates(index, filtres)
+        if positions is None:
+            return index.books
+        return [index.books[position] for position in positions]
+
+    def positions_candidates(self, index: IndexLivres, filtres: FiltresRecherche) -> Optional[Iterable[int]]:
+        """
+        Positions des livres de la catégorie et des titres contenant le texte, lues dans les index.
+
+        Args:
+            index: Index du jeu lu par la recherche
+            filtres: Filtres de la recherche
+
+        Returns:
+            Optional[Iterable[int]]: Positions croissantes, None si aucun index ne restreint la recherche
+        """
+        positions = None
+        if filtres.categorie:
+            positions = index.positions_categorie(filtres.categorie)
+        if filtres.titre:
+            positions_titre = index.positions_titre_contenant(filtres.titre)
+            if positions_titre is not None:
+                positions = positions_titre if positions is None else sorted(set(positions) & set(positions_titre))
+        return positions
+
+    def exporter_livres(self, filtres: FiltresRecherche, champs: List[str],
+                        taille_lot: int) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourir les livres filtrés, triés par id, un dictionnaire à la fois.
+
+        Args:
+            filtres: Titre, catégorie, prix min/max et note minimum
+            champs: Champs à lire
+            taille_lot: Inutilisé (les livres sont déjà en mémoire)
+
+        Returns:
+            Iterator[Dict[str, Any]]: Livres, un dictionnaire des champs par ligne
+        """
+        for book in self.rechercher_livres(filtres, Pagination()).livres:
+            yield {champ: getattr(book, champ) for champ in champs}
+
+    def recherche_plein_texte(self, texte: str, pagination: Pagination) -> PageLivres:
+        """
+        Rechercher des livres en plein texte dans les données en mémoire.
+
+        Approximation de la recherche PostgreSQL par l'index de trigrammes :
+        la plupart des trigrammes de la requête doivent apparaître dans le titre
+        ou la description, et la similarité du titre s'ajoute à la pertinence.
+
+        Args:
+            texte: Requête saisie par l'utilisateur
+            pagination: Limite et curseur, tri par pertinence décroissante
+
+        Returns:
+            PageLivres: ResultatPleinTexte classés par pertinence et curseur suivant
+        """
+        mots = re.findall(r"\w+", texte.lower())
+        if not mots:
+            return PageLivres()
+
+        index = self.index
+        # Classement sur (pertinence, id) : seuls les livres de la page sont lus
+        classement = [(pertinence, index.identifiant(position), position)
+                      for pertinence, position in index.classer(texte)]
+
+        classement.sort(key=lambda x: (x[0], x[1]), reverse=True)
+        position = pagination.position()
+        if position is not None:
+            position = tuple(position)
+            classement = [x for x in classement if (x[0], x[1]) < position]
+        if pagination.limite is not None:
+            classement = classement[:pagination.limite + 1]
+
+        return pagination.paginer([
+            ResultatPleinTexte(
+                id=book.id,
+                title=book.title,
+                categorie=book.categorie,
+                prix_numerique=book.prix_numerique,
+                note_etoiles_nombre=book.note_etoiles_nombre,
+                pertinence=pertinence,
+                extrait=self.extraire_passage(f"{book.title} {book.description}", mots)
+            )
+            for pertinence, book in ((pertinence, index.books[position]) for pertinence, _, position in classement)
+        ])
+
+    def extraire_passage(self, texte: str, mots: List[str], longueur: int = 35) -> str:
+        """
+        Extraire le passage autour de la première occurrence, mots trouvés surlignés en <b>.
+
+        Args:
+            texte: Texte du livre (titre et description)
+            mots: Mots recherchés, en minuscules
+            longueur: Nombre de mots du passage
+
+        Returns:
+            str: Passage surligné
+        """
+        jetons = texte.split()
+
+        def trouve(jeton):
+            return any(mot in jeton.lower() for mot in mots)
+
+        premier = next((i for i, jeton in enumerate(jetons) if trouve(jeton)), 0)
+        debut = max(0, premier - longueur // 3)
+        return " ".join(f"<b>{jeton}</b>" if trouve(jeton) else jeton
+                        for jeton in jetons[debut:debut + longueur])
+
+    def recherche_approximative(self, texte: str, champ: str, seuil: float,
+                                limite: int) -> List[ResultatApproximatif]:
+        """
+        Rechercher des livres par similarité de trigrammes, comme l'opérateur % de pg_trgm.
+
+        Seuls les titres partageant un trigramme avec le texte sont lus (index
+        inversé) ; la similarité des catégories est calculée une fois par catégorie.
+
+        Args:
+            texte: Texte saisi, éventuellement avec des fautes de frappe
+            champ: Attribut comparé ("title" ou "categorie")
+            seuil: Similarité minimum, entre 0 et 1
+            limite: Nombre maximum de résultats
+
+        Returns:
+            List[ResultatApproximatif]: Livres classés par similarité décroissante
+        """
+        index = self.index
+        if champ == "title":
+            similarites = index.similarites_titre(texte, seuil)
+        else:
+            similarites = index.similarites_categorie(texte, seuil)
+
+        # Classement sur (similarité, id) : seuls les livres retenus sont lus
+        classement = sorted(((round(similarite, 4), index.identifiant(position), position)
+                             for similarite, position in similarites), key=lambda x: (-x[0], x[1]))[:limite]
         return [
-            book for book in self.books
-            if book.categorie.lower() == category.lower()
+            ResultatApproximatif(
+                id=book.id,
+                title=book.title,
+                categorie=book.categorie,
+                prix_numerique=book.prix_numerique,
+                note_etoiles_nombre=book.note_etoiles_nombre,
+                similarite=similarite
+            )
+            for similarite, book in ((similarite, index.books[position]) for similarite, _, position in classement)
         ]
 
+    def obtenir_version_dataset(self) -> Optional[str]:
+        """
+        Récupérer la version des données chargées : signature des fichiers lus,
+        suivie du nombre d'écritures faites depuis par l'API.
+
+        Returns:
+            Optional[str]: Version des données en mémoire, None si rien n'a été chargé
+        """
+        return self.jeu.version_donnees
+
+    def obtenir_generation_dataset(self) -> Optional[GenerationDataset]:
+        """
+        Récupérer la version des données chargées et la date des fichiers lus.
+
+        Returns:
+            Optional[GenerationDataset]: Génération en mémoire, None si rien n'a été chargé
+        """
+        jeu = self.jeu
+        if jeu.version is None:
+            return None
+        return GenerationDataset(version=jeu.version_donnees, mis_a_jour_le=jeu.date)
+
+    def obtenir_statistiques_categories(self) -> List[StatistiqueCategorie]:
+        """
+        Calculer en un seul parcours les statistiques de chaque catégorie.
+
+        Returns:
+            List[StatistiqueCategorie]: Statistiques classées par rang
+        """
+        return self.classer_categories((book.categorie, book.prix_numerique) for book in self.books)
+
+    def classer_categories(self, livres: Iterable[Tuple[str, float]]) -> List[StatistiqueCategorie]:
+        """
+        Compter les livres et les prix de chaque catégorie, puis les classer.
+
+        Args:
+            livres: Catégorie et prix de chaque livre
+
+        Returns:
+            List[StatistiqueCategorie]: Statistiques classées par rang
+        """
+        comptes = {}
+        for categorie, prix in livres:
+            if not categorie:
+                continue
+            compte = comptes.setdefault(categorie, [0, 0, 0.0])
+            compte[0] += 1
+            if prix > 0:
+                compte[1] += 1
+                compte[2] += prix
+
+        total_livres = sum(compte[0] for compte in comptes.values())
+        classement = sorted(comptes.items(), key=lambda x: (-x[1][0], x[0]))
+        return [
+            StatistiqueCategorie(
+                categorie=categorie,
+                nombre_livres=nombre_livres,
+                rang=rang,
+                pourcentage_total=round(nombre_livres / total_livres * 100, 2),
+                nombre_livres_prix=nombre_livres_prix,
+                prix_moyen=round(total_prix / nombre_livres_prix, 2) if nombre_livres_prix else None
+            )
+            for rang, (categorie, (nombre_livres, nombre_livres_prix, total_prix)) in enumerate(classement, 1)
+        ]
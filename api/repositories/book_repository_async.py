@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Repository PostgreSQL asynchrone (SQLAlchemy asyncio + asyncpg) pour les livres.
+
+Les requetes sont construites par les memes methodes que BookRepositorySQL
+(filtres, pagination, conversions) : seule l'execution change.
+"""
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.interfaces.book_repository_async_interface import BookRepositoryAsyncInterface
+from api.models.book import Book
+from api.models.book_sql import BookSQL
+from api.models.dataset_metadata import CLE_VERSION_LIVRES, DatasetMetadataSQL
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.generation_dataset import GenerationDataset
+from api.models.pagination import PageLivres, Pagination
+from api.models.resultat_approximatif import ResultatApproximatif
+from api.models.statistique_categorie import StatistiqueCategorie
+from api.repositories.book_repository_sql import BookRepositorySQL
+from api.repositories.statistiques_categories_repository import NOM_VUE, REQUETE_STATISTIQUES
+from database_config import obtenir_async_session_local, session_async_requete
+
+
+class BookRepositoryAsync(BookRepositoryAsyncInterface):
+    """
+    Repository PostgreSQL asynchrone pour les livres.
+    """
+
+    def __init__(self):
+        """
+        Initialiser le repository avec le constructeur de requetes synchrone.
+        """
+        self.requetes = BookRepositorySQL()
+
+    @asynccontextmanager
+    async def session_db(self) -> AsyncIterator[AsyncSession]:
+        """
+        Fournir la session asynchrone de la requete HTTP en cours, ou une
+        session ouverte et fermee pour l'appel hors requete.
+
+        Yields:
+            AsyncSession: Session SQLAlchemy asynchrone
+        """
+        session = session_async_requete.get()
+        if session is not None:
+            yield session
+            return
+
+        async with obtenir_async_session_local()() as db:
+            yield db
+
+    async def get_all_books(self) -> List[Book]:
+        """
+        Recuperer tous les livres depuis PostgreSQL.
+
+        Returns:
+            List[Book]: Liste de tous les livres
+        """
+        async with self.session_db() as db:
+            resultat = await db.execute(select(BookSQL))
+            return [self.requetes.convertir_sql_vers_book(book_sql) for book_sql in resultat.scalars().all()]
+
+    async def get_book_by_id(self, book_id: int) -> Optional[Book]:
+        """
+        Recuperer un livre par son ID depuis PostgreSQL.
+
+        Args:
+            book_id: L'ID du livre a recuperer
+
+        Returns:
+            Optional[Book]: Le livre trouve ou None
+        """
+        async with self.session_db() as db:
+            book_sql = await db.get(BookSQL, book_id)
+            return self.requetes.convertir_sql_vers_book(book_sql) if book_sql else None
+
+    async def get_books_by_ids(self, book_ids: List[int]) -> List[Book]:
+        """
+        Recuperer plusieurs livres par leurs IDs en une seule requete (id = ANY).
+
+        Args:
+            book_ids: IDs des livres, sans doublon
+
+        Returns:
+            List[Book]: Livres trouves, dans un ordre quelconque
+        """
+        async with self.session_db() as db:
+            resultat = await db.execute(self.requetes.requete_par_ids(book_ids))
+            return [self.requetes.convertir_sql_vers_book(book_sql) for book_sql in resultat.scalars().all()]
+
+    async def find_by_category(self, category: str) -> List[Book]:
+        """
+        Rechercher des livres par categorie exacte dans PostgreSQL (index lower(categorie)).
+
+        Args:
+            category: Le nom exact de la categorie, sans tenir compte de la casse
+
+        Returns:
+            List[Book]: Liste des livres de cette categorie
+        """
+        async with self.session_db() as db:
+            resultat = await db.execute(select(BookSQL).filter(self.requetes.filtre_categorie(category)))
+            return [self.requetes.convertir_sql_vers_book(book_sql) for book_sql in resultat.scalars().all()]
+
+    async def rechercher_livres(self, filtres: FiltresRecherche,
+                                pagination: Optional[Pagination] = None,
+                                champs: Optional[List[str]] = None) -> PageLivres:
+        """
+        Rechercher des livres dans PostgreSQL en une seule requete filtree et paginee.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            pagination: Tri, limite et curseur (None = tous les livres tries par id)
+            champs: Champs a lire ; None = livres complets (Book), sinon dictionnaires
+
+        Returns:
+            PageLivres: Livres correspondant a tous les filtres et curseur suivant
+        """
+        pagination = pagination or Pagination()
+        requete = select(*self.requetes.entites_recherche(pagination, champs))
+        requete = self.requetes.appliquer_filtres(requete, filtres)
+        requete = self.requetes.appliquer_pagination(requete, pagination)
+
+        async with self.session_db() as db:
+            resultat = await db.execute(requete)
+            lignes = resultat.scalars().all() if champs is None else resultat.all()
+        return self.requetes.construire_page(pagination, lignes, champs)
+
+    async def exporter_livres(self, filtres: FiltresRecherche, champs: List[str],
+                              taille_lot: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parcourir les livres filtres avec un curseur cote serveur (stream), par lots.
+
+        Le generateur ouvre sa propre session : il est consomme pendant l'envoi
+        d'une reponse en streaming, apres la fin de la session de la requete.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            champs: Champs a lire
+            taille_lot: Nombre de lignes lues a la fois (yield_per)
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Livres, un dictionnaire des champs par ligne
+        """
+        requete = self.requetes.requete_export(filtres, champs, taille_lot)
+        async with obtenir_async_session_local()() as db:
+            resultat = await db.stream(requete)
+            async for ligne in resultat:
+                yield self.requetes.convertir_ligne_vers_dict(ligne)
+
+    async def recherche_plein_texte(self, texte: str, pagination: Pagination) -> PageLivres:
+        """
+        Rechercher des livres en plein texte dans PostgreSQL (vecteur genere et index GIN).
+
+        Args:
+            texte: Requete saisie par l'utilisateur (syntaxe web : "phrase", -exclu, or)
+            pagination: Limite et curseur, tri par pertinence decroissante
+
+        Returns:
+            PageLivres: ResultatPleinTexte classes par pertinence et curseur suivant
+        """
+        requete = self.requetes.requete_plein_texte(texte, pagination)
+        async with self.session_db() as db:
+            lignes = (await db.execute(requete)).all()
+        return pagination.paginer([self.requetes.convertir_ligne_vers_resultat(ligne) for ligne in lignes])
+
+    async def recherche_approximative(self, texte: str, champ: str, seuil: float,
+                                      limite: int) -> List[ResultatApproximatif]:
+        """
+        Rechercher des livres par similarite de trigrammes dans PostgreSQL (operateur % indexe).
+
+        Args:
+            texte: Texte saisi, eventuellement avec des fautes de frappe
+            champ: Attribut compare ("title" ou "categorie")
+            seuil: Similarite minimum, entre 0 et 1
+            limite: Nombre maximum de resultats
+
+        Returns:
+            List[ResultatApproximatif]: Livres classes par similarite decroissante
+        """
+        async with self.session_db() as db:
+            await db.execute(self.requetes.requete_seuil_similarite(seuil))
+            lignes = (await db.execute(self.requetes.requete_approximative(texte, champ, limite))).all()
+        return [self.requetes.convertir_ligne_vers_approximatif(ligne) for ligne in lignes]
+
+    async def obtenir_version_dataset(self) -> Optional[str]:
+        """
+        Recuperer la version du jeu de donnees, incrementee par le pipeline a chaque crawl.
+
+        Returns:
+            Optional[str]: Version courante, None si la table est illisible
+        """
+        async with self.session_db() as db:
+            try:
+                version = await db.scalar(
+                    select(DatasetMetadataSQL.version).filter(DatasetMetadataSQL.cle == CLE_VERSION_LIVRES)
+                )
+                return str(version or 0)
+            except SQLAlchemyError:
+                return None
+
+    async def obtenir_generation_dataset(self) -> Optional[GenerationDataset]:
+        """
+        Recuperer la version du jeu de donnees et la date du dernier crawl.
+
+        Returns:
+            Optional[GenerationDataset]: Generation courante, None si la table est illisible
+        """
+        async with self.session_db() as db:
+            try:
+                ligne = (await db.execute(
+                    select(DatasetMetadataSQL.version, DatasetMetadataSQL.mis_a_jour_le)
+                    .filter(DatasetMetadataSQL.cle == CLE_VERSION_LIVRES)
+                )).first()
+            except SQLAlchemyError:
+                return None
+            if ligne is None:
+                return GenerationDataset(version="0")
+            return GenerationDataset(version=str(ligne.version or 0), mis_a_jour_le=ligne.mis_a_jour_le)
+
+    async def obtenir_statistiques_categories(self) -> List[StatistiqueCategorie]:
+        """
+        Recuperer les statistiques par categorie depuis la vue materialisee.
+
+        Returns:
+            List[StatistiqueCategorie]: Statistiques classees par rang
+        """
+        async with self.session_db() as db:
+            vue_existe = await db.scalar(text("SELECT to_regclass(:nom)"), {"nom": NOM_VUE}) is not None
+            source = NOM_VUE if vue_existe else f"({REQUETE_STATISTIQUES}) AS statistiques"
+            resultat = await db.execute(text(f"SELECT * FROM {source} ORDER BY rang"))
+            return [self.requetes.convertir_ligne_vers_statistique(ligne) for ligne in resultat.mappings().all()]
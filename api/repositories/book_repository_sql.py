@@ -2,12 +2,30 @@
 """
 Repository PostgreSQL pour gerer les livres.
 """
-from typing import List, Optional
+from contextlib import contextmanager
+from dataclasses import fields
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import Integer, any_, bindparam, cast, func, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, REAL, REGCONFIG
 from sqlalchemy.orm import Session
 from api.interfaces.book_repository_interface import BookRepositoryInterface
 from api.models.book import Book
-from api.models.book_sql import BookSQL
-from database_config import SessionLocal
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.generation_dataset import GenerationDataset
+from api.models.pagination import PageLivres, Pagination
+from api.models.resultat_approximatif import ResultatApproximatif
+from api.models.resultat_plein_texte import ResultatPleinTexte
+from api.models.statistique_categorie import StatistiqueCategorie
+from api.models.book_sql import BookSQL, CONFIGURATION_PLEIN_TEXTE
+from api.repositories.dataset_version_repository import DatasetVersionRepository
+from api.repositories.statistiques_categories_repository import StatistiquesCategoriesRepository
+from database_config import SessionLocal, session_requete
+
+# Valeurs des colonnes NULL dans les lectures par champs
+VALEURS_DEFAUT = {champ.name: champ.default for champ in fields(Book)}
+
+# Options de ts_headline pour les extraits des resultats plein texte
+OPTIONS_EXTRAIT = "StartSel=<b>, StopSel=</b>, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" ... \""
 
 
 class BookRepositorySQL(BookRepositoryInterface):
@@ -21,14 +39,25 @@ class BookRepositorySQL(BookRepositoryInterface):
         """
         pass
 
-    def obtenir_session_db(self) -> Session:
+    @contextmanager
+    def session_db(self) -> Iterator[Session]:
         """
-        Obtenir une session de base de donnees.
+        Fournir la session de la requete HTTP en cours, ou une session
+        ouverte et fermee pour l'appel hors requete (scripts).
 
-        Returns:
+        Yields:
             Session: Session SQLAlchemy
         """
-        return SessionLocal()
+        session = session_requete.get()
+        if session is not None:
+            yield session
+            return
+
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
 
     def convertir_sql_vers_book(self, book_sql: BookSQL) -> Book:
         """
@@ -61,6 +90,24 @@ class BookRepositorySQL(BookRepositoryInterface):
             nombre_avis=book_sql.nombre_avis or 0
         )
 
+    def convertir_ligne_vers_dict(self, ligne) -> dict:
+        """
+        Convertir une ligne de colonnes choisies en dictionnaire.
+
+        Les valeurs NULL prennent la valeur par defaut du champ de Book,
+        comme dans convertir_sql_vers_book.
+
+        Args:
+            ligne: Ligne SQLAlchemy (Row) issue d'une requete sur des colonnes
+
+        Returns:
+            dict: Champs de la ligne
+        """
+        return {
+            champ: valeur if valeur is not None else VALEURS_DEFAUT[champ]
+            for champ, valeur in ligne._asdict().items()
+        }
+
     def convertir_book_vers_sql(self, book: Book) -> BookSQL:
         """
         Convertir un objet Book en BookSQL.
@@ -82,12 +129,9 @@ class BookRepositorySQL(BookRepositoryInterface):
         Returns:
             List[Book]: Liste de tous les livres
         """
-        db = self.obtenir_session_db()
-        try:
+        with self.session_db() as db:
             books_sql = db.query(BookSQL).all()
             return [self.convertir_sql_vers_book(book_sql) for book_sql in books_sql]
-        finally:
-            db.close()
 
     def get_book_by_id(self, book_id: int) -> Optional[Book]:
         """
@@ -99,14 +143,43 @@ class BookRepositorySQL(BookRepositoryInterface):
         Returns:
             Optional[Book]: Le livre trouve ou None
         """
-        db = self.obtenir_session_db()
-        try:
+        with self.session_db() as db:
             book_sql = db.query(BookSQL).filter(BookSQL.id == book_id).first()
             if book_sql:
                 return self.convertir_sql_vers_book(book_sql)
             return None
-        finally:
-            db.close()
+
+    def get_books_by_ids(self, book_ids: List[int]) -> List[Book]:
+        """
+        Recuperer plusieurs livres par leurs IDs en une seule requete.
+
+        Args:
+            book_ids: IDs des livres, sans doublon
+
+        Returns:
+            List[Book]: Livres trouves, dans un ordre quelconque
+        """
+        with self.session_db() as db:
+            return [self.convertir_sql_vers_book(book_sql)
+                    for book_sql in db.execute(self.requete_par_ids(book_ids)).scalars().all()]
+
+    @staticmethod
+    def requete_par_ids(book_ids: List[int]):
+        """
+        Construire la requete des livres d'une liste d'IDs : id = ANY(:ids).
+
+        Les IDs sont passes en un seul parametre tableau : le texte de la requete
+        est le meme quelle que soit la taille du lot, et reste dans les caches
+        de requetes compilees et preparees (au lieu d'un IN a N parametres).
+
+        Args:
+            book_ids: IDs des livres
+
+        Returns:
+            Select: Requete sur la cle primaire
+        """
+        ids = bindparam("ids", list(book_ids), type_=ARRAY(Integer))
+        return select(BookSQL).filter(BookSQL.id == any_(ids))
 
     def save_book(self, book: Book) -> Book:
         """
@@ -118,31 +191,437 @@ class BookRepositorySQL(BookRepositoryInterface):
         Returns:
             Book: Le livre sauvegarde avec son ID
         """
-        db = self.obtenir_session_db()
-        try:
+        with self.session_db() as db:
             book_sql = self.convertir_book_vers_sql(book)
             db.add(book_sql)
             db.commit()
             db.refresh(book_sql)
             return self.convertir_sql_vers_book(book_sql)
-        finally:
-            db.close()
 
     def find_by_category(self, category: str) -> List[Book]:
         """
-        Rechercher des livres par categorie dans PostgreSQL.
+        Rechercher des livres par categorie exacte dans PostgreSQL.
+
+        La comparaison lower(categorie) = lower(:categorie) utilise l'index
+        fonctionnel ix_books_categorie_lower ; "Fiction" ne trouve pas
+        "Historical Fiction" (voir recherche_approximative).
 
         Args:
-            category: Le nom de la categorie a rechercher
+            category: Le nom exact de la categorie, sans tenir compte de la casse
 
         Returns:
             List[Book]: Liste des livres de cette categorie
         """
-        db = self.obtenir_session_db()
-        try:
-            books_sql = db.query(BookSQL).filter(
-                BookSQL.categorie.ilike(f"%{category}%")
-            ).all()
+        with self.session_db() as db:
+            books_sql = db.query(BookSQL).filter(self.filtre_categorie(category)).all()
             return [self.convertir_sql_vers_book(book_sql) for book_sql in books_sql]
+
+    def rechercher_livres(self, filtres: FiltresRecherche,
+                          pagination: Optional[Pagination] = None,
+                          champs: Optional[List[str]] = None) -> PageLivres:
+        """
+        Rechercher des livres dans PostgreSQL en une seule requete filtree et paginee.
+
+        Le titre utilise ILIKE (index GIN trigramme), le prix et la note
+        les index B-tree de leurs colonnes. La pagination est faite par cle
+        (colonne de tri, id) sur les index composites : pas d'OFFSET, le cout
+        d'une page ne depend pas de sa profondeur.
+
+        Avec des champs, seules leurs colonnes sont lues (plus id et la colonne
+        de tri pour le curseur) : pas d'objets BookSQL ni de description.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            pagination: Tri, limite et curseur (None = tous les livres tries par id)
+            champs: Champs a lire ; None = livres complets (Book), sinon dictionnaires
+
+        Returns:
+            PageLivres: Livres correspondant a tous les filtres et curseur suivant
+        """
+        pagination = pagination or Pagination()
+        with self.session_db() as db:
+            requete = db.query(*self.entites_recherche(pagination, champs))
+            requete = self.appliquer_filtres(requete, filtres)
+            requete = self.appliquer_pagination(requete, pagination)
+            return self.construire_page(pagination, requete.all(), champs)
+
+    def entites_recherche(self, pagination: Pagination, champs: Optional[List[str]]) -> list:
+        """
+        Choisir les entites lues par une recherche.
+
+        Args:
+            pagination: Tri (sa colonne est lue pour le curseur)
+            champs: Champs demandes, None pour des livres complets
+
+        Returns:
+            list: [BookSQL] ou les colonnes demandees (plus id et la colonne de tri)
+        """
+        if champs is None:
+            return [BookSQL]
+        colonnes = list(dict.fromkeys(["id", pagination.champ, *champs]))
+        return [getattr(BookSQL, colonne) for colonne in colonnes]
+
+    def appliquer_filtres(self, requete, filtres: FiltresRecherche):
+        """
+        Ajouter les filtres de recherche a une requete (Query ou select()).
+
+        Args:
+            requete: Requete SQLAlchemy
+            filtres: Titre, categorie, prix min/max et note minimum
+
+        Returns:
+            Requete filtree
+        """
+        if filtres.categorie:
+            requete = requete.filter(self.filtre_categorie(filtres.categorie))
+        if filtres.titre:
+            requete = requete.filter(
+                BookSQL.title.ilike(f"%{self.echapper_motif_like(filtres.titre)}%", escape="\\")
+            )
+        if filtres.prix_min is not None:
+            requete = requete.filter(BookSQL.prix_numerique >= filtres.prix_min)
+        if filtres.prix_max is not None:
+            requete = requete.filter(BookSQL.prix_numerique <= filtres.prix_max)
+        if filtres.note_min is not None:
+            requete = requete.filter(BookSQL.note_etoiles_nombre >= filtres.note_min)
+        return requete
+
+    def filtre_categorie(self, categorie: str):
+        """
+        Construire le filtre de categorie exacte normalisee (index ix_books_categorie_lower).
+
+        Args:
+            categorie: Nom de la categorie
+
+        Returns:
+            Expression SQLAlchemy lower(categorie) = lower(:categorie)
+        """
+        return func.lower(BookSQL.categorie) == categorie.strip().lower()
+
+    def construire_page(self, pagination: Pagination, lignes: list, champs: Optional[List[str]]) -> PageLivres:
+        """
+        Construire la page de resultats depuis les lignes lues.
+
+        Args:
+            pagination: Tri, limite et curseur
+            lignes: Objets BookSQL, ou lignes de colonnes si des champs sont demandes
+            champs: Champs demandes, None pour des livres complets
+
+        Returns:
+            PageLivres: Livres de la page et curseur suivant
+        """
+        if champs is None:
+            return pagination.paginer([self.convertir_sql_vers_book(book_sql) for book_sql in lignes])
+
+        page = pagination.paginer([self.convertir_ligne_vers_dict(ligne) for ligne in lignes])
+        page.livres = [{champ: livre[champ] for champ in champs} for livre in page.livres]
+        return page
+
+    def appliquer_pagination(self, requete, pagination: Pagination):
+        """
+        Ajouter a la requete la reprise apres le curseur, le tri et la limite.
+
+        Args:
+            requete: Requete SQLAlchemy deja filtree (Query ou select())
+            pagination: Tri, limite et curseur
+
+        Returns:
+            Requete triee sur (colonne, id), limitee a limite + 1 lignes
+        """
+        colonne = getattr(BookSQL, pagination.champ)
+        tri_par_id = pagination.champ == "id"
+        position = pagination.position()
+
+        if position is not None:
+            valeur, identifiant = position
+            if tri_par_id:
+                cle, apres = BookSQL.id, identifiant
+            else:
+                cle, apres = tuple_(colonne, BookSQL.id), tuple_(valeur, identifiant)
+            requete = requete.filter(cle < apres if pagination.descendant else cle > apres)
+
+        if tri_par_id:
+            ordre = [BookSQL.id.desc() if pagination.descendant else BookSQL.id]
+        elif pagination.descendant:
+            ordre = [colonne.desc(), BookSQL.id.desc()]
+        else:
+            ordre = [colonne, BookSQL.id]
+        requete = requete.order_by(*ordre)
+
+        # Une ligne de plus pour savoir si une page suivante existe
+        if pagination.limite is not None:
+            requete = requete.limit(pagination.limite + 1)
+        return requete
+
+    def exporter_livres(self, filtres: FiltresRecherche, champs: List[str],
+                        taille_lot: int) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourir les livres filtres avec un curseur cote serveur, par lots.
+
+        Le generateur ouvre sa propre session : il est consomme pendant l'envoi
+        d'une reponse en streaming, apres la fin de la session de la requete.
+        Seuls taille_lot livres sont en memoire a la fois.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            champs: Champs a lire
+            taille_lot: Nombre de lignes lues a la fois (yield_per)
+
+        Returns:
+            Iterator[Dict[str, Any]]: Livres, un dictionnaire des champs par ligne
+        """
+        requete = self.requete_export(filtres, champs, taille_lot)
+        db = SessionLocal()
+        try:
+            for ligne in db.execute(requete):
+                yield self.convertir_ligne_vers_dict(ligne)
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
+
+    def requete_export(self, filtres: FiltresRecherche, champs: List[str], taille_lot: int):
+        """
+        Construire la requete d'export : colonnes demandees, filtres, tri par id, lecture par lots.
+
+        Args:
+            filtres: Titre, categorie, prix min/max et note minimum
+            champs: Champs a lire
+            taille_lot: Nombre de lignes lues a la fois
+
+        Returns:
+            Select: Requete executee avec un curseur cote serveur
+        """
+        requete = select(*[getattr(BookSQL, champ) for champ in champs])
+        requete = self.appliquer_filtres(requete, filtres).order_by(BookSQL.id)
+        return requete.execution_options(yield_per=taille_lot)
+
+    def recherche_plein_texte(self, texte: str, pagination: Pagination) -> PageLivres:
+        """
+        Rechercher des livres en plein texte dans PostgreSQL.
+
+        La requete utilise la colonne generee vecteur_recherche et son index
+        GIN : rien n'est tokenise au moment de la requete pour filtrer et classer.
+
+        Args:
+            texte: Requete saisie par l'utilisateur (syntaxe web : "phrase", -exclu, or)
+            pagination: Limite et curseur, tri par pertinence decroissante
+
+        Returns:
+            PageLivres: ResultatPleinTexte classes par pertinence et curseur suivant
+        """
+        with self.session_db() as db:
+            lignes = db.execute(self.requete_plein_texte(texte, pagination)).all()
+            return pagination.paginer([self.convertir_ligne_vers_resultat(ligne) for ligne in lignes])
+
+    def requete_plein_texte(self, texte: str, pagination: Pagination):
+        """
+        Construire la requete plein texte classee et paginee par cle (pertinence, id).
+
+        Le classement et la limite sont faits dans une sous-requete : ts_headline,
+        qui relit la description, n'est calcule que pour les livres de la page.
+
+        Args:
+            texte: Requete saisie par l'utilisateur
+            pagination: Limite et curseur
+
+        Returns:
+            Select: Requete sur les colonnes de ResultatPleinTexte
+        """
+        configuration = cast(CONFIGURATION_PLEIN_TEXTE, REGCONFIG)
+        requete_ts = func.websearch_to_tsquery(configuration, texte)
+        pertinence = func.ts_rank_cd(BookSQL.vecteur_recherche, requete_ts)
+
+        classement = select(BookSQL.id, pertinence.label("pertinence")).filter(
+            BookSQL.vecteur_recherche.op("@@")(requete_ts)
+        )
+        position = pagination.position()
+        if position is not None:
+            valeur, identifiant = position
+            # ts_rank_cd est un real : la valeur du curseur est comparee en real
+            classement = classement.filter(
+                tuple_(pertinence, BookSQL.id) < tuple_(cast(valeur, REAL), identifiant)
+            )
+        classement = classement.order_by(pertinence.desc(), BookSQL.id.desc())
+        if pagination.limite is not None:
+            classement = classement.limit(pagination.limite + 1)
+        classement = classement.subquery()
+
+        extrait = func.ts_headline(
+            configuration,
+            func.concat_ws(" ", BookSQL.title, BookSQL.description),
+            requete_ts,
+            OPTIONS_EXTRAIT,
+        )
+        return (
+            select(
+                BookSQL.id,
+                BookSQL.title,
+                BookSQL.categorie,
+                BookSQL.prix_numerique,
+                BookSQL.note_etoiles_nombre,
+                classement.c.pertinence,
+                extrait.label("extrait"),
+            )
+            .join(classement, BookSQL.id == classement.c.id)
+            .order_by(classement.c.pertinence.desc(), BookSQL.id.desc())
+        )
+
+    def convertir_ligne_vers_resultat(self, ligne) -> ResultatPleinTexte:
+        """
+        Convertir une ligne de la requete plein texte en ResultatPleinTexte.
+
+        Args:
+            ligne: Ligne SQLAlchemy (Row) issue de requete_plein_texte
+
+        Returns:
+            ResultatPleinTexte: Livre trouve, pertinence et extrait
+        """
+        return ResultatPleinTexte(
+            id=ligne.id,
+            title=ligne.title or "",
+            categorie=ligne.categorie or "",
+            prix_numerique=ligne.prix_numerique or 0.0,
+            note_etoiles_nombre=ligne.note_etoiles_nombre or 0,
+            pertinence=float(ligne.pertinence),
+            extrait=ligne.extrait or ""
+        )
+
+    def recherche_approximative(self, texte: str, champ: str, seuil: float,
+                                limite: int) -> List[ResultatApproximatif]:
+        """
+        Rechercher des livres par similarite de trigrammes dans PostgreSQL.
+
+        Le seuil est applique a la transaction (pg_trgm.similarity_threshold)
+        pour que l'operateur % utilise l'index GIN trigramme de la colonne ;
+        similarity() ne sert qu'au classement des lignes retenues.
+
+        Args:
+            texte: Texte saisi, eventuellement avec des fautes de frappe
+            champ: Attribut compare ("title" ou "categorie")
+            seuil: Similarite minimum, entre 0 et 1
+            limite: Nombre maximum de resultats
+
+        Returns:
+            List[ResultatApproximatif]: Livres classes par similarite decroissante
+        """
+        with self.session_db() as db:
+            db.execute(self.requete_seuil_similarite(seuil))
+            lignes = db.execute(self.requete_approximative(texte, champ, limite)).all()
+            return [self.convertir_ligne_vers_approximatif(ligne) for ligne in lignes]
+
+    def requete_seuil_similarite(self, seuil: float):
+        """
+        Construire la requete fixant le seuil de l'operateur % pour la transaction en cours.
+
+        Args:
+            seuil: Similarite minimum, entre 0 et 1
+
+        Returns:
+            Select: SELECT set_config('pg_trgm.similarity_threshold', :seuil, true)
+        """
+        return select(func.set_config("pg_trgm.similarity_threshold", str(seuil), True))
+
+    def requete_approximative(self, texte: str, champ: str, limite: int):
+        """
+        Construire la requete de recherche approximative sur une colonne indexee en trigrammes.
+
+        Args:
+            texte: Texte saisi
+            champ: Attribut compare ("title" ou "categorie")
+            limite: Nombre maximum de resultats
+
+        Returns:
+            Select: Requete sur les colonnes de ResultatApproximatif
+        """
+        colonne = getattr(BookSQL, champ)
+        similarite = func.similarity(colonne, texte)
+        return (
+            select(
+                BookSQL.id,
+                BookSQL.title,
+                BookSQL.categorie,
+                BookSQL.prix_numerique,
+                BookSQL.note_etoiles_nombre,
+                similarite.label("similarite"),
+            )
+            .filter(colonne.op("%")(texte))
+            .order_by(similarite.desc(), BookSQL.id)
+            .limit(limite)
+        )
+
+    def convertir_ligne_vers_approximatif(self, ligne) -> ResultatApproximatif:
+        """
+        Convertir une ligne de la requete approximative en ResultatApproximatif.
+
+        Args:
+            ligne: Ligne SQLAlchemy (Row) issue de requete_approximative
+
+        Returns:
+            ResultatApproximatif: Livre trouve et similarite
+        """
+        return ResultatApproximatif(
+            id=ligne.id,
+            title=ligne.title or "",
+            categorie=ligne.categorie or "",
+            prix_numerique=ligne.prix_numerique or 0.0,
+            note_etoiles_nombre=ligne.note_etoiles_nombre or 0,
+            similarite=round(float(ligne.similarite), 4)
+        )
+
+    def obtenir_version_dataset(self) -> Optional[str]:
+        """
+        Recuperer la version du jeu de donnees, incrementee par le pipeline a chaque crawl.
+
+        Returns:
+            Optional[str]: Version courante, None si la table est illisible
+        """
+        return DatasetVersionRepository().obtenir_version()
+
+    def obtenir_generation_dataset(self) -> Optional[GenerationDataset]:
+        """
+        Recuperer la version du jeu de donnees et la date du dernier crawl.
+
+        Returns:
+            Optional[GenerationDataset]: Generation courante, None si la table est illisible
+        """
+        return DatasetVersionRepository().obtenir_generation()
+
+    def obtenir_statistiques_categories(self) -> List[StatistiqueCategorie]:
+        """
+        Recuperer les statistiques par categorie depuis la vue materialisee.
+
+        Returns:
+            List[StatistiqueCategorie]: Statistiques classees par rang
+        """
+        return [self.convertir_ligne_vers_statistique(ligne)
+                for ligne in StatistiquesCategoriesRepository().lire_statistiques()]
+
+    def convertir_ligne_vers_statistique(self, ligne: dict) -> StatistiqueCategorie:
+        """
+        Convertir une ligne de la vue des statistiques en StatistiqueCategorie.
+
+        Args:
+            ligne: Ligne de la vue (valeurs numeric en Decimal)
+
+        Returns:
+            StatistiqueCategorie: Statistiques de la categorie
+        """
+        return StatistiqueCategorie(
+            categorie=ligne["categorie"],
+            nombre_livres=int(ligne["nombre_livres"]),
+            rang=int(ligne["rang"]),
+            pourcentage_total=float(ligne["pourcentage_total"]),
+            nombre_livres_prix=int(ligne["nombre_livres_prix"]),
+            prix_moyen=float(ligne["prix_moyen"]) if ligne["prix_moyen"] is not None else None
+        )
+
+    def echapper_motif_like(self, texte: str) -> str:
+        """
+        Echapper les caracteres speciaux de LIKE pour une recherche litterale.
+
+        Args:
+            texte: Texte saisi par l'utilisateur
+
+        Returns:
+            str: Texte ou \\, % et _ sont echappes
+        """
+        return texte.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -1,37 +1,80 @@
 # -*- coding: utf-8 -*-
-import json
-import os
+import threading
 from typing import List, Optional
 from api.interfaces.categories_repository_interface import CategoryRepositoryInterface
+from api.repositories.rechargement import surveiller
+from books_toscrape.books_toscrape.flux import lire_flux, signature_flux
 
 
 class CategoryRepository(CategoryRepositoryInterface):
-    """Classe de depot pour gerer les categories depuis les fichiers JSON generes par Scrapy."""
+    """
+    Classe de depot pour gerer les categories depuis les fichiers JSON generes par Scrapy.
+
+    La liste est remplacee d'un bloc quand les fichiers changent (rechargement a chaud).
+    """
 
     def __init__(self):
         """Initialiser le repository avec les chemins vers les fichiers JSON."""
         self.base_path = "books_toscrape"
         self.categories_data = []
+        self.version: Optional[str] = None
+        self.verrou = threading.Lock()
         self.charger_donnees_categories()
+        surveiller(self)
 
     def charger_donnees_categories(self) -> None:
-        """Charger les donnees des categories depuis le fichier JSON de Scrapy."""
+        """Charger les donnees des categories depuis le flux de Scrapy (JSON Lines ou JSON)."""
+        self.categories_data, self.version = self.lire_categories()
+
+    def lire_categories(self) -> tuple:
+        """
+        Lire les categories du flux et leur attribuer un ID, sans toucher a la liste courante.
+
+        Returns:
+            tuple: (categories, signature des fichiers lus ; None si illisible)
+        """
         try:
-            categories_path = os.path.join(self.base_path, "categories.json")
-            if os.path.exists(categories_path):
-                with open(categories_path, 'r', encoding='utf-8') as f:
-                    self.categories_data = json.load(f)
-                    self.ajouter_ids_aux_categories()
+            version = self.signature_fichiers()
+            categories = list(lire_flux("categories", self.base_path))
+            self.ajouter_ids_aux_categories(categories)
+            return categories, version
         except Exception as e:
             print(f"Erreur lors du chargement des categories: {e}")
-            self.categories_data = []
+            return [], None
 
-    def ajouter_ids_aux_categories(self) -> None:
+    def ajouter_ids_aux_categories(self, categories: List[dict]) -> None:
         """Ajouter des IDs uniques aux categories s'ils n'en ont pas."""
-        for index, category in enumerate(self.categories_data):
+        for index, category in enumerate(categories):
             if 'id' not in category:
                 category['id'] = index + 1
 
+    def signature_fichiers(self) -> Optional[str]:
+        """Calculer la signature (date de modification et taille) des fichiers du flux, None sans fichier."""
+        return signature_flux("categories", self.base_path) or None
+
+    def version_chargee(self) -> Optional[str]:
+        """Signature des fichiers des categories en memoire."""
+        return self.version
+
+    def recharger(self, force: bool = False) -> bool:
+        """
+        Relire le flux et remplacer la liste d'un bloc si les fichiers ont change.
+
+        Args:
+            force: Relire meme si la signature des fichiers n'a pas change
+
+        Returns:
+            bool: True si la liste a ete remplacee
+        """
+        with self.verrou:
+            if not force and self.signature_fichiers() == self.version:
+                return False
+            categories, version = self.lire_categories()
+            if version is None and self.version is not None:
+                return False
+            self.categories_data, self.version = categories, version
+            return True
+
     def get_all_categories(self) -> List[dict]:
         """Recuperer toutes les categories stockees."""
         return self.categories_data
@@ -45,9 +88,10 @@ class CategoryRepository(CategoryRepositoryInterface):
 
     def save_category(self, category: dict) -> dict:
         """Sauvegarder une nouvelle categorie."""
-        max_id = max([c.get('id', 0) for c in self.categories_data], default=0)
-        category['id'] = max_id + 1
-        self.categories_data.append(category)
+        with self.verrou:
+            max_id = max([c.get('id', 0) for c in self.categories_data], default=0)
+            category['id'] = max_id + 1
+            self.categories_data.append(category)
         return category
 
 
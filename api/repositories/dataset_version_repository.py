@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Repository PostgreSQL pour la version du jeu de donnees.
+"""
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from api.models.dataset_metadata import CLE_VERSION_LIVRES, DatasetMetadataSQL
+from api.models.generation_dataset import GenerationDataset
+from database_config import SessionLocal, session_requete
+
+
+class DatasetVersionRepository:
+    """
+    Repository PostgreSQL pour lire et incrementer la version du jeu de donnees.
+    """
+
+    def __init__(self, session: Optional[Session] = None):
+        """
+        Initialiser le repository.
+
+        Args:
+            session: Session existante a reutiliser (pipeline), sinon celle de la requete ou une session par appel
+        """
+        self.session = session
+
+    @contextmanager
+    def session_db(self) -> Iterator[Session]:
+        """
+        Fournir la session du repository, celle de la requete HTTP en cours,
+        ou une session ouverte et fermee pour l'appel.
+
+        Yields:
+            Session: Session SQLAlchemy
+        """
+        session = self.session or session_requete.get()
+        if session is not None:
+            yield session
+            return
+
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def obtenir_version(self, cle: str = CLE_VERSION_LIVRES) -> Optional[str]:
+        """
+        Lire la version courante du jeu de donnees.
+
+        Args:
+            cle: Cle du jeu de donnees
+
+        Returns:
+            Optional[str]: Version ("0" avant le premier crawl), None si illisible
+        """
+        with self.session_db() as db:
+            try:
+                version = db.query(DatasetMetadataSQL.version).filter(DatasetMetadataSQL.cle == cle).scalar()
+                return str(version or 0)
+            except SQLAlchemyError:
+                db.rollback()
+                return None
+
+    def obtenir_generation(self, cle: str = CLE_VERSION_LIVRES) -> Optional[GenerationDataset]:
+        """
+        Lire la version courante et la date de la derniere mise a jour.
+
+        Args:
+            cle: Cle du jeu de donnees
+
+        Returns:
+            Optional[GenerationDataset]: Generation ("0", sans date, avant le premier crawl), None si illisible
+        """
+        with self.session_db() as db:
+            try:
+                ligne = db.query(DatasetMetadataSQL.version, DatasetMetadataSQL.mis_a_jour_le).filter(
+                    DatasetMetadataSQL.cle == cle
+                ).first()
+            except SQLAlchemyError:
+                db.rollback()
+                return None
+            if ligne is None:
+                return GenerationDataset(version="0")
+            return GenerationDataset(version=str(ligne.version or 0), mis_a_jour_le=ligne.mis_a_jour_le)
+
+    def incrementer_version(self, cle: str = CLE_VERSION_LIVRES) -> int:
+        """
+        Incrementer la version du jeu de donnees et valider la transaction.
+
+        Args:
+            cle: Cle du jeu de donnees
+
+        Returns:
+            int: Nouvelle version
+        """
+        with self.session_db() as db:
+            metadata = db.query(DatasetMetadataSQL).filter(
+                DatasetMetadataSQL.cle == cle
+            ).with_for_update().first()
+
+            if metadata is None:
+                metadata = DatasetMetadataSQL(cle=cle, version=1)
+                db.add(metadata)
+            else:
+                metadata.version = metadata.version + 1
+                metadata.mis_a_jour_le = func.now()
+
+            db.commit()
+            return metadata.version
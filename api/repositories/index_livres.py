@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Index en mémoire du repository JSON, construits au chargement des flux.
+
+- par identifiant : id -> livre ;
+- par catégorie : catégorie en minuscules -> positions des livres ;
+- index inversé des trigrammes (calculés comme pg_trgm) du titre et de la
+  description, pour les recherches classées par similarité ;
+- index inversé des sous-chaînes de trois caractères du titre, pour le
+  filtre titre (sous-chaîne sans casse) sans parcourir tous les titres.
+
+Les positions (rang du livre dans la liste chargée) sont stockées dans des
+array('I') croissants : quatre octets par entrée, ce qui garde les index
+compacts pour des centaines de milliers de livres. Une recherche ne lit que
+les listes des trigrammes de la requête, jamais tous les livres.
+"""
+import re
+from array import array
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from api.models.book import Book
+
+# Couverture minimum des trigrammes de la requête pour la recherche classée
+COUVERTURE_MIN = 0.6
+
+MOTIF_MOT = re.compile(r"[^\W_]+")
+
+
+@lru_cache(maxsize=262144)
+def trigrammes_mot(mot: str) -> FrozenSet[str]:
+    """
+    Calculer les trigrammes d'un mot en minuscules, mémorisés : le vocabulaire
+    est bien plus petit que le nombre de mots lus au chargement.
+
+    Args:
+        mot: Mot en minuscules
+
+    Returns:
+        FrozenSet[str]: Trigrammes du mot complété de deux espaces devant et d'un derrière
+    """
+    mot = f"  {mot} "
+    return frozenset(mot[i:i + 3] for i in range(len(mot) - 2))
+
+
+def trigrammes(texte: str) -> Set[str]:
+    """
+    Calculer les trigrammes d'un texte comme pg_trgm : chaque mot en minuscules,
+    précédé de deux espaces et suivi d'un espace.
+
+    Args:
+        texte: Texte à découper
+
+    Returns:
+        Set[str]: Trigrammes du texte
+    """
+    return set().union(*map(trigrammes_mot, set(MOTIF_MOT.findall(texte.lower()))))
+
+
+def similarite_trigrammes(premier: Set[str], second: Set[str]) -> float:
+    """
+    Calculer la similarité de deux ensembles de trigrammes (fonction similarity de pg_trgm).
+
+    Args:
+        premier: Trigrammes du premier texte
+        second: Trigrammes du second texte
+
+    Returns:
+        float: Trigrammes communs / trigrammes distincts, entre 0 et 1
+    """
+    if not premier or not second:
+        return 0.0
+    return len(premier & second) / len(premier | second)
+
+
+def sous_chaines(texte: str) -> Set[str]:
+    """
+    Calculer les sous-chaînes de trois caractères d'un texte déjà en minuscules.
+
+    Un texte contient une sous-chaîne seulement s'il contient toutes ses
+    sous-chaînes de trois caractères.
+
+    Args:
+        texte: Texte en minuscules
+
+    Returns:
+        Set[str]: Sous-chaînes de trois caractères
+    """
+    return {texte[i:i + 3] for i in range(len(texte) - 2)}
+
+
+class IndexLivres:
+    """
+    Index par identifiant, par catégorie et de trigrammes sur une liste de livres.
+    """
+
+    def __init__(self, books: List[Book]):
+        """
+        Construire les index en un seul parcours des livres.
+
+        Args:
+            books: Livres chargés (les positions renvoyées sont leurs rangs)
+        """
+        self.books = books
+        self.par_id: Dict[int, Book] = {}
+        self.titres_minuscules: List[str] = []
+        self.tailles_titre = array("I")
+        # Les lectures utilisent get() : seuls les ajouts créent des listes
+        self.par_categorie: Dict[str, array] = defaultdict(lambda: array("I"))
+        self.trigrammes_titre: Dict[str, array] = defaultdict(lambda: array("I"))
+        self.trigrammes_description: Dict[str, array] = defaultdict(lambda: array("I"))
+        self.sous_chaines_titre: Dict[str, array] = defaultdict(lambda: array("I"))
+
+        for book in books:
+            self.ajouter(book)
+
+    def ajouter(self, book: Book) -> None:
+        """
+        Indexer un livre ajouté à la fin de la liste.
+
+        Args:
+            book: Dernier livre de la liste
+        """
+        position = len(self.titres_minuscules)
+        # Le premier livre d'un identifiant l'emporte, comme l'ancien parcours linéaire
+        self.par_id.setdefault(book.id, book)
+        self.par_categorie[book.categorie.lower()].append(position)
+
+        titre = book.title.lower()
+        self.titres_minuscules.append(titre)
+        trigrammes_du_titre = trigrammes(titre)
+        self.tailles_titre.append(len(trigrammes_du_titre))
+        for index, cles in ((self.trigrammes_titre, trigrammes_du_titre),
+                            (self.trigrammes_description, trigrammes(book.description)),
+                            (self.sous_chaines_titre, sous_chaines(titre))):
+            for cle in cles:
+                index[cle].append(position)
+
+    def livre(self, book_id: int) -> Optional[Book]:
+        """
+        Trouver un livre par son identifiant.
+
+        Args:
+            book_id: Identifiant du livre
+
+        Returns:
+            Optional[Book]: Le livre ou None
+        """
+        return self.par_id.get(book_id)
+
+    def identifiant(self, position: int) -> Optional[int]:
+        """
+        Identifiant du livre à une position, pour classer sans lire le livre entier.
+
+        Args:
+            position: Rang du livre
+
+        Returns:
+            Optional[int]: Identifiant du livre
+        """
+        return self.books[position].id
+
+    def positions_categorie(self, categorie: str) -> Iterable[int]:
+        """
+        Positions des livres d'une catégorie exacte, sans tenir compte de la casse.
+
+        Args:
+            categorie: Nom de la catégorie
+
+        Returns:
+            Iterable[int]: Positions croissantes
+        """
+        return self.par_categorie.get(categorie.strip().lower(), ())
+
+    def positions_titre_contenant(self, texte: str) -> Optional[List[int]]:
+        """
+        Positions des livres dont le titre contient le texte, sans tenir compte de la casse.
+
+        Les candidats sont l'intersection des listes des sous-chaînes du texte,
+        en commençant par la plus courte, puis chaque titre candidat est vérifié.
+
+        Args:
+            texte: Sous-chaîne recherchée
+
+        Returns:
+            Optional[List[int]]: Positions croissantes, ou None si le texte est
+            trop court pour l'index (moins de trois caractères)
+        """
+        texte = texte.lower()
+        if len(texte) < 3:
+            return None
+
+        listes = [self.sous_chaines_titre.get(sous_chaine) for sous_chaine in sous_chaines(texte)]
+        if any(liste is None for liste in listes):
+            return []
+        listes.sort(key=len)
+        candidats = set(listes[0])
+        for liste in listes[1:]:
+            candidats.intersection_update(liste)
+            if not candidats:
+                return []
+        return sorted(position for position in candidats if texte in self.titres_minuscules[position])
+
+    def similarites_titre(self, texte: str, seuil: float) -> List[Tuple[float, int]]:
+        """
+        Similarité pg_trgm du titre des livres partageant au moins un trigramme avec le texte.
+
+        Args:
+            texte: Texte recherché
+            seuil: Similarité minimum
+
+        Returns:
+            List[Tuple[float, int]]: (similarité, position) au-dessus du seuil
+        """
+        trigrammes_texte = trigrammes(texte)
+        communs = Counter()
+        for trigramme in trigrammes_texte:
+            communs.update(self.trigrammes_titre.get(trigramme, ()))
+
+        resultats = []
+        for position, nombre in communs.items():
+            similarite = nombre / (len(trigrammes_texte) + self.tailles_titre[position] - nombre)
+            if similarite >= seuil:
+                resultats.append((similarite, position))
+        return resultats
+
+    def similarites_categorie(self, texte: str, seuil: float) -> List[Tuple[float, int]]:
+        """
+        Similarité pg_trgm de la catégorie, calculée une fois par catégorie distincte.
+
+        Args:
+            texte: Texte recherché
+            seuil: Similarité minimum
+
+        Returns:
+            List[Tuple[float, int]]: (similarité, position) au-dessus du seuil
+        """
+        trigrammes_texte = trigrammes(texte)
+        resultats = []
+        for categorie, positions in self.par_categorie.items():
+            similarite = similarite_trigrammes(trigrammes_texte, trigrammes(categorie))
+            if similarite >= seuil:
+                resultats.extend((similarite, position) for position in positions)
+        return resultats
+
+    def classer(self, texte: str, couverture_min: float = COUVERTURE_MIN) -> List[Tuple[float, int]]:
+        """
+        Classer les livres par pertinence pour un texte, sur le titre et la description.
+
+        La couverture est la part des trigrammes du texte présents dans le titre
+        ou la description ; la pertinence y ajoute la similarité du titre, qui
+        pèse donc plus qu'une occurrence dans la description.
+
+        Args:
+            texte: Texte recherché
+            couverture_min: Couverture minimum, entre 0 et 1
+
+        Returns:
+            List[Tuple[float, int]]: (pertinence, position) des livres retenus
+        """
+        trigrammes_texte = trigrammes(texte)
+        if not trigrammes_texte:
+            return []
+
+        communs_titre = Counter()
+        couverts = Counter()
+        for trigramme in trigrammes_texte:
+            dans_titre = self.trigrammes_titre.get(trigramme, ())
+            communs_titre.update(dans_titre)
+            couverts.update(set(dans_titre).union(self.trigrammes_description.get(trigramme, ())))
+
+        resultats = []
+        for position, nombre in couverts.items():
+            couverture = nombre / len(trigrammes_texte)
+            if couverture < couverture_min:
+                continue
+            commun = communs_titre.get(position, 0)
+            similarite = commun / (len(trigrammes_texte) + self.tailles_titre[position] - commun)
+            resultats.append((round(couverture + similarite, 4), position))
+        return resultats
+
@@ -0,0 +1,496 @@
+# -*- coding: utf-8 -*-
+"""
+Jeu de livres partagé entre les workers de l'API (BOOKS_API_SOURCE=partage).
+
+Un processus chargeur lit les flux de Scrapy, construit une fois les livres
+et leurs index, puis publie le jeu dans BOOKS_PARTAGE_DOSSIER (/dev/shm par
+défaut : un fichier en mémoire partagée) au format de l'instantané binaire,
+index compris. Un pointeur `courant`, remplacé d'un bloc, désigne le fichier
+de la version publiée.
+
+Chaque worker projette ce fichier en lecture seule : les livres et les index
+sont lus dans la projection, sans copie par worker. La mémoire reste donc
+proportionnelle au jeu de données et non au nombre de workers. Un worker
+relit le pointeur à chaque lecture de la version (au plus une fois par
+BOOKS_CACHE_INTERVALLE_VERSION secondes) et passe à la nouvelle projection ;
+les requêtes en cours terminent sur l'ancienne.
+
+Lancer le chargeur à côté des workers :
+
+    python -m api.repositories.jeu_partage
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional
+
+from api.models.book import Book
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.generation_dataset import GenerationDataset
+from api.models.pagination import PageLivres, Pagination
+from api.models.statistique_categorie import StatistiqueCategorie
+from api.repositories.book_repository import BookRepository, JeuLivres
+from api.repositories.index_livres import IndexLivres
+from api.repositories.rechargement import INTERVALLE_RECHARGEMENT, SurveillanceFichiers
+from books_toscrape.books_toscrape.instantane_binaire import (ID_ABSENT, NOMS_COLONNES, InstantaneLivres,
+                                                              ecrire_instantane)
+
+logger = logging.getLogger(__name__)
+
+DOSSIER_PARTAGE = os.environ.get("BOOKS_PARTAGE_DOSSIER") or os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "books-api")
+FICHIER_COURANT = "courant"
+# Versions gardées sur disque : un worker peut encore ouvrir la précédente pendant une publication
+GENERATIONS_CONSERVEES = 2
+
+# Index de IndexLivres publiés avec le jeu
+INDEX_PUBLIES = ("par_categorie", "trigrammes_titre", "trigrammes_description", "sous_chaines_titre")
+
+
+def lire_pointeur(dossier: str = DOSSIER_PARTAGE) -> Optional[Dict[str, Any]]:
+    """
+    Lire le pointeur vers la version publiée.
+
+    Args:
+        dossier: Dossier de publication
+
+    Returns:
+        Optional[Dict[str, Any]]: Fichier, version et date de la version publiée, None si rien n'est publié
+    """
+    try:
+        with open(os.path.join(dossier, FICHIER_COURANT), "r", encoding="utf-8") as fichier:
+            return json.load(fichier)
+    except (OSError, ValueError):
+        return None
+
+
+def publier_jeu(jeu: JeuLivres, dossier: str = DOSSIER_PARTAGE) -> str:
+    """
+    Publier un jeu de livres et ses index, puis faire pointer `courant` dessus.
+
+    Args:
+        jeu: Jeu chargé depuis les flux (version = signature des flux)
+        dossier: Dossier de publication
+
+    Returns:
+        str: Nom du fichier publié
+    """
+    os.makedirs(dossier, exist_ok=True)
+    books, index = jeu.books, jeu.index
+    nom = f"livres-{hashlib.sha1((jeu.version or '').encode('utf-8')).hexdigest()[:16]}.bin"
+
+    # Positions triées par identifiant (tri stable : le premier livre d'un identifiant l'emporte)
+    ordre_id = array("I", sorted((position for position, book in enumerate(books) if book.id is not None),
+                                 key=lambda position: books[position].id))
+    ecrire_instantane(
+        os.path.join(dossier, nom),
+        ({champ: getattr(book, champ) for champ in NOMS_COLONNES} for book in books),
+        jeu.version or "",
+        tableaux={"tailles_titre": index.tailles_titre, "ordre_id": ordre_id},
+        index={nom_index: getattr(index, nom_index) for nom_index in INDEX_PUBLIES},
+    )
+
+    pointeur = {"fichier": nom, "version": jeu.version,
+                "mis_a_jour_le": jeu.date.isoformat() if jeu.date else None}
+    temporaire = os.path.join(dossier, f"{FICHIER_COURANT}.{os.getpid()}.tmp")
+    with open(temporaire, "w", encoding="utf-8") as fichier:
+        json.dump(pointeur, fichier)
+    os.replace(temporaire, os.path.join(dossier, FICHIER_COURANT))
+
+    nettoyer_publications(dossier)
+    return nom
+
+
+def nettoyer_publications(dossier: str = DOSSIER_PARTAGE) -> None:
+    """
+    Supprimer les anciennes versions publiées au-delà de GENERATIONS_CONSERVEES.
+
+    Un worker qui projette encore un fichier supprimé le garde jusqu'à sa fermeture.
+
+    Args:
+        dossier: Dossier de publication
+    """
+    chemins = [os.path.join(dossier, nom) for nom in os.listdir(dossier)
+               if nom.startswith("livres-") and nom.endswith(".bin")]
+    chemins.sort(key=os.path.getmtime, reverse=True)
+    for chemin in chemins[GENERATIONS_CONSERVEES:]:
+        try:
+            os.remove(chemin)
+        except OSError:
+            pass
+
+
+class LivresPartages(Sequence):
+    """
+    Livres d'une projection : chaque Book est construit à la lecture, sans copie du jeu par worker.
+    """
+
+    def __init__(self, instantane: InstantaneLivres):
+        """
+        Initialiser la séquence sur une projection.
+
+        Args:
+            instantane: Jeu publié projeté en lecture seule
+        """
+        self.instantane = instantane
+
+    def __len__(self) -> int:
+        return len(self.instantane)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        # Les colonnes de l'instantané suivent l'ordre des champs de Book
+        return Book(*self.instantane.ligne(position))
+
+
+class TitresMinuscules(Sequence):
+    """
+    Titres en minuscules d'une projection, décodés à la lecture (vérification du filtre titre).
+    """
+
+    def __init__(self, instantane: InstantaneLivres):
+        """
+        Initialiser la séquence sur une projection.
+
+        Args:
+            instantane: Jeu publié projeté en lecture seule
+        """
+        self.instantane = instantane
+
+    def __len__(self) -> int:
+        return len(self.instantane)
+
+    def __getitem__(self, position):
+        return self.instantane.valeur("title", position).lower()
+
+
+class IndexPartage(IndexLivres):
+    """
+    Index d'un jeu publié, lus dans la projection : mêmes recherches que IndexLivres, aucune construction.
+    """
+
+    def __init__(self, instantane: InstantaneLivres):
+        """
+        Brancher les index sur les sections de la projection.
+
+        Args:
+            instantane: Jeu publié projeté en lecture seule
+        """
+        self.instantane = instantane
+        self.books = LivresPartages(instantane)
+        self.titres_minuscules = TitresMinuscules(instantane)
+        self.tailles_titre = instantane.colonne("tailles_titre")
+        self.ordre_id = instantane.colonne("ordre_id")
+        self.ids = instantane.colonne("id")
+        for nom_index in INDEX_PUBLIES:
+            setattr(self, nom_index, instantane.index(nom_index))
+
+    def ajouter(self, book: Book) -> None:
+        """
+        Refuser l'ajout : le jeu publié est en lecture seule.
+
+        Raises:
+            ValueError: Toujours
+        """
+        raise ValueError("Le jeu partagé est en lecture seule")
+
+    def identifiant(self, position: int) -> Optional[int]:
+        """
+        Identifiant du livre à une position, lu dans la colonne id.
+
+        Args:
+            position: Rang du livre
+
+        Returns:
+            Optional[int]: Identifiant du livre
+        """
+        identifiant = self.ids[position]
+        return None if identifiant == ID_ABSENT else identifiant
+
+    def valeur(self, position: int, champ: str) -> Any:
+        """
+        Valeur d'un champ d'un livre, lue dans sa colonne sans construire le livre.
+
+        Args:
+            position: Rang du livre
+            champ: Attribut de Book
+
+        Returns:
+            Any: Valeur du champ
+        """
+        return self.instantane.valeur(champ, position)
+
+    def filtrer(self, positions: Optional[Iterable[int]], filtres: FiltresRecherche) -> List[int]:
+        """
+        Appliquer les filtres titre, prix et note sur les colonnes.
+
+        Args:
+            positions: Positions candidates, None pour tous les livres
+            filtres: Filtres de la recherche
+
+        Returns:
+            List[int]: Positions retenues, dans l'ordre de chargement
+        """
+        titre = filtres.titre.lower() if filtres.titre else None
+        prix = self.instantane.colonne("prix_numerique")
+        notes = self.instantane.colonne("note_etoiles_nombre")
+        return [
+            position for position in (range(len(self.books)) if positions is None else positions)
+            if (titre is None or titre in self.titres_minuscules[position])
+            and (filtres.prix_min is None or prix[position] >= filtres.prix_min)
+            and (filtres.prix_max is None or prix[position] <= filtres.prix_max)
+            and (filtres.note_min is None or notes[position] >= filtres.note_min)
+        ]
+
+    def livre(self, book_id: int) -> Optional[Book]:
+        """
+        Trouver un livre par son identifiant, par dichotomie sur les positions triées par id.
+
+        Args:
+            book_id: Identifiant du livre
+
+        Returns:
+            Optional[Book]: Le livre ou None
+        """
+        ordre, ids = self.ordre_id, self.ids
+        numero = bisect_left(ordre, book_id, key=ids.__getitem__)
+        if numero == len(ordre) or ids[ordre[numero]] != book_id:
+            return None
+        return self.books[ordre[numero]]
+
+
+class BookRepositoryPartage(BookRepository):
+    """
+    Repository des workers : livres et index lus dans le jeu publié par le chargeur, en lecture seule.
+    """
+
+    def __init__(self, dossier: str = DOSSIER_PARTAGE):
+        """
+        Projeter la version publiée, s'il y en a une.
+
+        Args:
+            dossier: Dossier de publication
+        """
+        self.dossier = dossier
+        super().__init__()
+
+    def lire_jeu(self) -> JeuLivres:
+        """
+        Projeter la version désignée par le pointeur.
+
+        Returns:
+            JeuLivres: Jeu publié (vide, sans version, si rien n'est publié ou lisible)
+        """
+        pointeur = lire_pointeur(self.dossier)
+        if pointeur is None:
+            return JeuLivres(index=IndexLivres([]))
+        try:
+            instantane = InstantaneLivres(os.path.join(self.dossier, pointeur["fichier"]))
+        except (OSError, ValueError) as e:
+            logger.warning("Jeu publié illisible: %s", e)
+            return JeuLivres(index=IndexLivres([]))
+
+        date = pointeur.get("mis_a_jour_le")
+        return JeuLivres(index=IndexPartage(instantane), version=pointeur.get("version"),
+                         date=datetime.fromisoformat(date) if date else None)
+
+    def signature_fichiers(self) -> Optional[str]:
+        """
+        Version désignée par le pointeur.
+
+        Returns:
+            Optional[str]: Version publiée, None si rien n'est publié
+        """
+        pointeur = lire_pointeur(self.dossier)
+        return pointeur.get("version") if pointeur else None
+
+    def obtenir_version_dataset(self) -> Optional[str]:
+        """
+        Passer à la version publiée si elle a changé, puis la retourner.
+
+        Returns:
+            Optional[str]: Version projetée, None si rien n'est publié
+        """
+        self.recharger()
+        return super().obtenir_version_dataset()
+
+    def obtenir_generation_dataset(self) -> Optional[GenerationDataset]:
+        """
+        Passer à la version publiée si elle a changé, puis retourner sa génération.
+
+        Returns:
+            Optional[GenerationDataset]: Génération projetée, None si rien n'est publié
+        """
+        self.recharger()
+        return super().obtenir_generation_dataset()
+
+    def rechercher_livres(self, filtres: FiltresRecherche,
+                          pagination: Optional[Pagination] = None,
+                          champs: Optional[List[str]] = None) -> PageLivres:
+        """
+        Rechercher des livres comme le repository JSON, filtres et tri lus dans les colonnes.
+
+        Seuls les livres de la page sont construits depuis la projection.
+
+        Args:
+            filtres: Titre, catégorie, prix min/max et note minimum
+            pagination: Tri, limite et curseur (None = tous les livres triés par id)
+            champs: Champs à lire ; None = livres complets (Book), sinon dictionnaires
+
+        Returns:
+            PageLivres: Livres correspondant à tous les filtres et curseur suivant
+        """
+        index = self.index
+        if not isinstance(index, IndexPartage):
+            return super().rechercher_livres(filtres, pagination, champs)
+
+        pagination = pagination or Pagination()
+        classement = [((index.valeur(position, pagination.champ), index.identifiant(position)), position)
+                      for position in index.filtrer(self.positions_candidates(index, filtres), filtres)]
+
+        # Même ordre et même reprise par clé (valeur de tri, id) que le repository JSON
+        classement.sort(key=itemgetter(0), reverse=pagination.descendant)
+        position = pagination.position()
+        if position is not None:
+            position = tuple(position)
+            classement = [(cle, rang) for cle, rang in classement
+                          if (cle < position if pagination.descendant else cle > position)]
+
+        if pagination.limite is not None:
+            classement = classement[:pagination.limite + 1]
+
+        page = pagination.paginer([index.books[rang] for _, rang in classement])
+        if champs is not None:
+            page.livres = [{champ: getattr(book, champ) for champ in champs} for book in page.livres]
+        return page
+
+    def obtenir_statistiques_categories(self) -> List[StatistiqueCategorie]:
+        """
+        Calculer les statistiques de chaque catégorie depuis les colonnes catégorie et prix.
+
+        Returns:
+            List[StatistiqueCategorie]: Statistiques classées par rang
+        """
+        index = self.index
+        if not isinstance(index, IndexPartage):
+            return super().obtenir_statistiques_categories()
+        instantane = index.instantane
+        return self.classer_categories(zip(instantane.valeurs("categorie"), instantane.colonne("prix_numerique")))
+
+    def get_all_books(self) -> List[Book]:
+        """
+        Récupérer tous les livres du jeu publié.
+
+        Returns:
+            List[Book]: Livres construits depuis la projection
+        """
+        return list(self.books)
+
+    def save_book(self, book: Book) -> Book:
+        """
+        Refuser l'écriture : le jeu est publié par le chargeur.
+
+        Raises:
+            ValueError: Toujours
+        """
+        raise ValueError("Le jeu partagé est en lecture seule")
+
+    def update_book(self, book_id: int, book_data: Book) -> Optional[Book]:
+        """
+        Refuser l'écriture : le jeu est publié par le chargeur.
+
+        Raises:
+            ValueError: Toujours
+        """
+        raise ValueError("Le jeu partagé est en lecture seule")
+
+    def delete_book(self, book_id: int) -> bool:
+        """
+        Refuser l'écriture : le jeu est publié par le chargeur.
+
+        Raises:
+            ValueError: Toujours
+        """
+        raise ValueError("Le jeu partagé est en lecture seule")
+
+
+class ChargeurPartage:
+    """
+    Processus chargeur : publie le jeu des flux au démarrage puis à chaque crawl terminé.
+    """
+
+    def __init__(self, dossier: str = DOSSIER_PARTAGE):
+        """
+        Charger les flux une première fois.
+
+        Args:
+            dossier: Dossier de publication
+        """
+        self.dossier = dossier
+        self.depot = BookRepository()
+        self.version: Optional[str] = None
+        self.arret = threading.Event()
+
+    def publier_si_change(self, surveillance: SurveillanceFichiers) -> bool:
+        """
+        Recharger les flux s'ils ont changé et sont stables, et publier la nouvelle version.
+
+        Args:
+            surveillance: Surveillance gardant la signature du passage précédent
+
+        Returns:
+            bool: True si une version a été publiée
+        """
+        surveillance.verifier(self.depot)
+        jeu = self.depot.jeu
+        if jeu.version is None or jeu.version == self.version:
+            return False
+        nom = publier_jeu(jeu, self.dossier)
+        self.version = jeu.version
+        logger.info("Version %s publiée (%s livres, %s)", jeu.version, len(jeu.books), nom)
+        return True
+
+    def executer(self, intervalle: float) -> None:
+        """
+        Publier puis surveiller les flux jusqu'à l'arrêt.
+
+        Args:
+            intervalle: Secondes entre deux vérifications des flux
+        """
+        surveillance = SurveillanceFichiers(intervalle)
+        self.publier_si_change(surveillance)
+        while not self.arret.wait(intervalle):
+            try:
+                self.publier_si_change(surveillance)
+            except Exception:
+                logger.exception("Publication du jeu impossible")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publier le jeu de livres partagé par les workers de l'API")
+    parser.add_argument("--dossier", default=DOSSIER_PARTAGE, help="Dossier de publication")
+    parser.add_argument("--intervalle", type=float, default=INTERVALLE_RECHARGEMENT or 5,
+                        help="Secondes entre deux vérifications des flux")
+    parser.add_argument("--une-fois", action="store_true", help="Publier la version actuelle puis quitter")
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    chargeur = ChargeurPartage(arguments.dossier)
+    if arguments.une_fois:
+        chargeur.publier_si_change(SurveillanceFichiers(arguments.intervalle))
+    else:
+        chargeur.executer(arguments.intervalle)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Rechargement à chaud des repositories JSON quand les flux de Scrapy changent.
+
+Chaque repository JSON s'enregistre à sa création. Un thread de surveillance
+compare, toutes les BOOKS_JSON_INTERVALLE_RECHARGEMENT secondes, la signature
+des fichiers (date de modification et taille) à celle du jeu chargé. Un
+changement n'est pris en compte que lorsque la signature est restée la même
+sur deux passages : un crawl encore en train d'écrire n'est pas chargé à moitié.
+
+Le nouveau jeu est lu et indexé dans le thread de surveillance, pendant que
+les requêtes continuent sur l'ancien, puis le remplace d'un bloc.
+
+Un repository surveillé fournit :
+- signature_fichiers() : signature actuelle des fichiers (None sans fichier) ;
+- version_chargee() : signature des fichiers du jeu en mémoire ;
+- recharger(force) : relire et remplacer le jeu, True s'il a été remplacé.
+"""
+import logging
+import os
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 0 désactive la surveillance (rechargement par l'endpoint d'administration seulement)
+INTERVALLE_RECHARGEMENT = float(os.environ.get("BOOKS_JSON_INTERVALLE_RECHARGEMENT", "5"))
+
+# Repositories JSON du processus ; un repository abandonné n'est pas retenu
+_depots: "weakref.WeakSet" = weakref.WeakSet()
+_verrou_depots = threading.Lock()
+_surveillance: Optional["SurveillanceFichiers"] = None
+
+
+def surveiller(depot) -> None:
+    """
+    Enregistrer un repository JSON pour le rechargement à chaud.
+
+    Args:
+        depot: Repository fournissant signature_fichiers, version_chargee et recharger
+    """
+    with _verrou_depots:
+        _depots.add(depot)
+
+
+def depots_surveilles() -> List[Any]:
+    """
+    Repositories JSON enregistrés.
+
+    Returns:
+        List[Any]: Repositories, par nom de classe
+    """
+    with _verrou_depots:
+        return sorted(_depots, key=lambda depot: type(depot).__name__)
+
+
+def recharger_depots(force: bool = False) -> List[Dict[str, Any]]:
+    """
+    Recharger tous les repositories JSON dont les fichiers ont changé.
+
+    Args:
+        force: Relire même les fichiers inchangés
+
+    Returns:
+        List[Dict[str, Any]]: Par repository, son nom, s'il a été rechargé et sa version
+    """
+    resultats = []
+    for depot in depots_surveilles():
+        try:
+            recharge = depot.recharger(force)
+        except Exception:
+            logger.exception("Rechargement de %s impossible", type(depot).__name__)
+            recharge = False
+        resultats.append({
+            "depot": type(depot).__name__,
+            "recharge": recharge,
+            "version": depot.version_chargee(),
+        })
+    return resultats
+
+
+class SurveillanceFichiers(threading.Thread):
+    """
+    Thread de surveillance des flux JSON : recharge un repository dont les fichiers ont changé puis sont stables.
+    """
+
+    def __init__(self, intervalle: float = INTERVALLE_RECHARGEMENT):
+        """
+        Initialiser la surveillance.
+
+        Args:
+            intervalle: Secondes entre deux vérifications
+        """
+        super().__init__(name="surveillance-flux-json", daemon=True)
+        self.intervalle = intervalle
+        self.arret = threading.Event()
+        # Dernière signature vue par repository, pour attendre qu'elle soit stable
+        self.signatures: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def run(self) -> None:
+        """
+        Vérifier les fichiers à chaque intervalle jusqu'à l'arrêt.
+        """
+        while not self.arret.wait(self.intervalle):
+            for depot in depots_surveilles():
+                try:
+                    self.verifier(depot)
+                except Exception:
+                    logger.exception("Surveillance de %s impossible", type(depot).__name__)
+
+    def verifier(self, depot) -> bool:
+        """
+        Recharger un repository si ses fichiers ont changé et n'ont pas bougé depuis le passage précédent.
+
+        Args:
+            depot: Repository surveillé
+
+        Returns:
+            bool: True si le repository a été rechargé
+        """
+        signature = depot.signature_fichiers()
+        precedente = self.signatures.get(depot)
+        self.signatures[depot] = signature
+        if signature is None or signature == depot.version_chargee() or signature != precedente:
+            return False
+
+        recharge = depot.recharger()
+        if recharge:
+            logger.info("%s rechargé (version %s)", type(depot).__name__, depot.version_chargee())
+        return recharge
+
+    def arreter(self) -> None:
+        """
+        Demander l'arrêt du thread.
+        """
+        self.arret.set()
+
+
+def demarrer_surveillance() -> Optional[SurveillanceFichiers]:
+    """
+    Démarrer le thread de surveillance du processus, une seule fois.
+
+    Returns:
+        Optional[SurveillanceFichiers]: Le thread, None si la surveillance est désactivée
+    """
+    global _surveillance
+    if INTERVALLE_RECHARGEMENT <= 0:
+        return None
+    with _verrou_depots:
+        if _surveillance is None:
+            _surveillance = SurveillanceFichiers()
+            _surveillance.start()
+        return _surveillance
+
+
+def arreter_surveillance() -> None:
+    """
+    Arrêter le thread de surveillance s'il tourne.
+    """
+    global _surveillance
+    with _verrou_depots:
+        if _surveillance is not None:
+            _surveillance.arreter()
+            _surveillance = None
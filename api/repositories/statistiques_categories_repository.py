@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Repository PostgreSQL pour les statistiques par categorie.
+
+Les agregats sont calcules par un seul GROUP BY (avec fonctions de fenetre
+pour le rang et le pourcentage) et stockes dans une vue materialisee,
+rafraichie par le pipeline a la fin de chaque crawl.
+"""
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from database_config import SessionLocal, session_requete
+
+NOM_VUE = "statistiques_categories"
+
+# Un seul passage sur books pour les deux agregats :
+# - classement par nombre de livres (categorie renseignee)
+# - prix moyen des livres dont le prix est renseigne
+REQUETE_STATISTIQUES = """
+SELECT categorie,
+       COUNT(*) AS nombre_livres,
+       ROW_NUMBER() OVER (ORDER BY COUNT(*) DESC, categorie) AS rang,
+       ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (), 2) AS pourcentage_total,
+       COUNT(*) FILTER (WHERE prix_numerique > 0) AS nombre_livres_prix,
+       ROUND(AVG(prix_numerique) FILTER (WHERE prix_numerique > 0)::numeric, 2) AS prix_moyen
+FROM books
+WHERE categorie IS NOT NULL AND categorie <> ''
+GROUP BY categorie
+"""
+
+
+class StatistiquesCategoriesRepository:
+    """
+    Repository PostgreSQL pour la vue materialisee des statistiques par categorie.
+    """
+
+    def __init__(self, session: Optional[Session] = None):
+        """
+        Initialiser le repository.
+
+        Args:
+            session: Session existante a reutiliser (pipeline), sinon celle de la requete ou une session par appel
+        """
+        self.session = session
+
+    @contextmanager
+    def session_db(self) -> Iterator[Session]:
+        """
+        Fournir la session du repository, celle de la requete HTTP en cours,
+        ou une session ouverte et fermee pour l'appel.
+
+        Yields:
+            Session: Session SQLAlchemy
+        """
+        session = self.session or session_requete.get()
+        if session is not None:
+            yield session
+            return
+
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def vue_existe(self, db: Session) -> bool:
+        """
+        Verifier que la vue materialisee existe.
+
+        Args:
+            db: Session SQLAlchemy
+
+        Returns:
+            bool: True si la vue existe
+        """
+        return db.execute(text("SELECT to_regclass(:nom)"), {"nom": NOM_VUE}).scalar() is not None
+
+    def creer_vue(self) -> None:
+        """
+        Creer la vue materialisee et son index unique (requis pour un rafraichissement concurrent).
+        """
+        with self.session_db() as db:
+            db.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {NOM_VUE} AS {REQUETE_STATISTIQUES}"))
+            db.execute(text(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{NOM_VUE}_categorie ON {NOM_VUE} (categorie)"
+            ))
+            db.commit()
+
+    def rafraichir_vue(self) -> None:
+        """
+        Recalculer la vue materialisee sans bloquer les lectures en cours.
+        """
+        with self.session_db() as db:
+            db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {NOM_VUE}"))
+            db.commit()
+
+    def lire_statistiques(self) -> List[dict]:
+        """
+        Lire les statistiques par categorie, classees par rang.
+
+        Si la vue n'a pas encore ete creee par un crawl, la requete
+        d'agregation est executee directement.
+
+        Returns:
+            List[dict]: Une ligne par categorie
+        """
+        with self.session_db() as db:
+            source = NOM_VUE if self.vue_existe(db) else f"({REQUETE_STATISTIQUES}) AS statistiques"
+            lignes = db.execute(text(f"SELECT * FROM {source} ORDER BY rang")).mappings().all()
+            return [dict(ligne) for ligne in lignes]
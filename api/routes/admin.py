@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Routes d'administration : rechargement des flux JSON sans redemarrer l'API.
+
+Les routes sont desactivees (403) tant que BOOKS_ADMIN_TOKEN n'est pas defini,
+puis exigent ce jeton dans l'en-tete X-Admin-Token.
+"""
+import hmac
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from api.repositories.rechargement import recharger_depots
+
+JETON_ADMIN = os.environ.get("BOOKS_ADMIN_TOKEN") or None
+
+
+def verifier_jeton(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Verifier le jeton d'administration.
+
+    Raises:
+        HTTPException: 403 si l'administration est desactivee, 401 si le jeton est absent ou faux
+    """
+    if JETON_ADMIN is None:
+        raise HTTPException(status_code=403, detail="Administration desactivee (BOOKS_ADMIN_TOKEN absent)")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), JETON_ADMIN.encode()):
+        raise HTTPException(status_code=401, detail="Jeton d'administration invalide")
+
+
+router = APIRouter(dependencies=[Depends(verifier_jeton)])
+
+
+@router.post("/recharger")
+async def recharger_flux(force: bool = Query(False, description="Relire meme les fichiers inchanges")):
+    """
+    Relire les flux JSON de Scrapy et remplacer les jeux charges dont les fichiers ont change.
+
+    Les requetes en cours continuent sur l'ancien jeu ; les caches de lecture
+    et les instantanes suivent la nouvelle version a leur prochaine verification.
+    """
+    try:
+        return {"depots": await run_in_threadpool(recharger_depots, force)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
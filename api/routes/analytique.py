@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from api.services.analytique_service import AnalytiqueService
+from api.models.distribution_categorie import CHAMPS_ANALYTIQUES, PERCENTILES_DEFAUT, DistributionCategorie
+from api.models.histogramme import INTERVALLES_DEFAUT, Histogramme
+from api.models.notes_categorie import NotesCategorie
+from api.models.valeur_stock_categorie import ValeurStockCategorie
+from api.routes.books import book_service
+from api.routes.reponse_rapide import repondre
+
+router = APIRouter()
+# Meme service livres que /books : la source JSON n'est chargee qu'une fois
+analytique_service = AnalytiqueService(book_service)
+
+DESCRIPTION_CHAMP = f"Champ analyse: {', '.join(CHAMPS_ANALYTIQUES)}"
+DESCRIPTION_CATEGORIE = "Categorie exacte (toutes si absent)"
+
+
+def analyser_percentiles(valeur: str) -> List[float]:
+    """
+    Lire les percentiles separes par des virgules.
+
+    Raises:
+        ValueError: Si une valeur n'est pas un nombre
+    """
+    try:
+        return [float(morceau) for morceau in valeur.split(",") if morceau.strip()]
+    except ValueError:
+        raise ValueError(f"Percentiles invalides: {valeur}")
+
+
+@router.get("/distribution", response_model=List[DistributionCategorie])
+async def obtenir_distribution(
+    champ: str = Query("prix", description=DESCRIPTION_CHAMP),
+    percentiles: str = Query(",".join(f"{p:g}" for p in PERCENTILES_DEFAUT),
+                             description="Percentiles separes par des virgules (0 a 100)"),
+    categorie: Optional[str] = Query(None, description=DESCRIPTION_CATEGORIE)
+):
+    """Minimum, maximum, moyenne et percentiles d'un champ par categorie."""
+    try:
+        return repondre(await analytique_service.distribution(champ, analyser_percentiles(percentiles), categorie))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+
+@router.get("/histogramme", response_model=Histogramme)
+async def obtenir_histogramme(
+    champ: str = Query("prix", description=DESCRIPTION_CHAMP),
+    intervalles: int = Query(INTERVALLES_DEFAUT, description="Nombre d'intervalles de meme largeur"),
+    categorie: Optional[str] = Query(None, description=DESCRIPTION_CATEGORIE)
+):
+    """Histogramme d'un champ, sur tous les livres ou sur une categorie."""
+    try:
+        return repondre(await analytique_service.histogramme(champ, intervalles, categorie))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+
+@router.get("/valeur-stock", response_model=List[ValeurStockCategorie])
+async def obtenir_valeur_stock():
+    """Stock total et valeur du stock (prix x stock) par categorie, par valeur decroissante."""
+    try:
+        return repondre(await analytique_service.valeur_stock())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+
+@router.get("/notes-par-categorie", response_model=List[NotesCategorie])
+async def obtenir_notes_par_categorie(
+    categorie: Optional[str] = Query(None, description=DESCRIPTION_CATEGORIE)
+):
+    """Tableau croise note x categorie : nombre de livres par note et note moyenne."""
+    try:
+        return repondre(await analytique_service.notes_par_categorie(categorie))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
@@ -1,75 +1,239 @@
 # -*- coding: utf-8 -*-
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
-from api.services.book_service import BookService
+from fastapi import APIRouter, Body, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from api.services.fabrique import appeler_service, creer_book_service
 from api.models.book import Book
+from api.models.book_resume import BookResume, CHAMPS_LIVRE, CHAMPS_RESUME, analyser_champs
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.lot_livres import TAILLE_LOT_MAX, LotLivres
+from api.models.pagination import Pagination
+from api.models.resultat_approximatif import LIMITE_APPROXIMATIVE, SEUIL_SIMILARITE, ResultatApproximatif
+from api.models.resultat_plein_texte import LIMITE_PLEIN_TEXTE, ResultatPleinTexte
+from api.routes.export import FORMATS_EXPORT, TAILLE_LOT_EXPORT, flux_export, flux_export_async
+from api.routes.reponse_rapide import REPONSE_RAPIDE, repondre
 
 router = APIRouter()
-book_service = BookService()
+book_service = creer_book_service()
 
+# En-tete portant le curseur de la page suivante (absent sur la derniere page)
+ENTETE_CURSEUR_SUIVANT = "X-Curseur-Suivant"
 
-@router.get("/", response_model=List[Book])
-def obtenir_tous_les_livres():
-    """Recuperer tous les livres."""
+DESCRIPTION_TRI = "Tri: id, prix, note, avis, titre (prefixe - pour l'ordre decroissant)"
+DESCRIPTION_LIMITE = "Nombre maximum de livres par page (tous si absent)"
+DESCRIPTION_CURSEUR = "Curseur de l'en-tete X-Curseur-Suivant de la page precedente"
+DESCRIPTION_CHAMPS = "Champs a retourner separes par des virgules (resume si absent)"
+
+
+async def lire_page(response: Response, filtres: FiltresRecherche, sort: str, limit: Optional[int],
+              curseur: Optional[str], fields: Optional[str]):
+    """
+    Lire une page de livres et placer le curseur suivant en en-tete.
+
+    Sans fields, les livres sont des resumes (BookResume). Avec fields, seuls
+    les champs demandes sont lus et retournes, hors response_model.
+    Avec BOOKS_API_REPONSE_RAPIDE, la page est encodee directement (orjson).
+    """
+    pagination = Pagination.depuis_parametres(sort, limit, curseur)
+    champs = analyser_champs(fields)
+    page = await appeler_service(book_service.rechercher_livres, filtres, pagination, champs or CHAMPS_RESUME)
+
+    entetes = {ENTETE_CURSEUR_SUIVANT: page.curseur_suivant} if page.curseur_suivant else {}
+    if champs is not None and not REPONSE_RAPIDE:
+        return JSONResponse(content=page.livres, headers=entetes)
+    return repondre(page.livres, response, entetes)
+
+
+@router.get("/", response_model=List[BookResume])
+async def obtenir_tous_les_livres(
+    response: Response,
+    sort: str = Query("id", description=DESCRIPTION_TRI),
+    limit: Optional[int] = Query(None, description=DESCRIPTION_LIMITE),
+    curseur: Optional[str] = Query(None, description=DESCRIPTION_CURSEUR),
+    fields: Optional[str] = Query(None, description=DESCRIPTION_CHAMPS)
+):
+    """Recuperer tous les livres, tries et pagines par cle."""
+    try:
+        return await lire_page(response, FiltresRecherche(), sort, limit, curseur, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+
+def analyser_ids(valeurs: List[str]) -> List[int]:
+    """
+    Lire les IDs d'un lot, separes par des virgules et/ou repetes (?ids=1,2&ids=3).
+
+    Raises:
+        ValueError: Si une valeur n'est pas un entier
+    """
+    ids = []
+    for valeur in valeurs:
+        for morceau in valeur.split(","):
+            morceau = morceau.strip()
+            if not morceau:
+                continue
+            try:
+                ids.append(int(morceau))
+            except ValueError:
+                raise ValueError(f"ID de livre invalide: {morceau}")
+    return ids
+
+
+async def lire_lot(ids: List[int]):
+    """Lire un lot de livres en une requete et le retourner par le chemin configure."""
     try:
-        return book_service.get_all_books()
+        return repondre(await appeler_service(book_service.get_books_by_ids, ids))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+
+# Declarees avant /{book_id}, qui capturerait sinon les chemins /batch, /export, /fulltext et /fuzzy
+@router.get("/batch", response_model=LotLivres)
+async def obtenir_livres_par_ids(
+    ids: List[str] = Query(..., description=f"IDs separes par des virgules (au plus {TAILLE_LOT_MAX})")
+):
+    """Recuperer plusieurs livres par leurs IDs, dans l'ordre demande, avec les IDs absents."""
+    try:
+        book_ids = analyser_ids(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await lire_lot(book_ids)
+
+
+@router.post("/batch", response_model=LotLivres)
+async def obtenir_livres_par_ids_post(
+    ids: List[int] = Body(..., embed=True, description=f"IDs des livres (au plus {TAILLE_LOT_MAX})")
+):
+    """Recuperer plusieurs livres par une liste d'IDs en corps JSON : {"ids": [...]}."""
+    return await lire_lot(ids)
+
+
+@router.get("/export")
+async def exporter_livres(
+    format: str = Query("ndjson", description="Format du flux: ndjson ou csv"),
+    titre: Optional[str] = Query(None, description="Rechercher par titre"),
+    categorie: Optional[str] = Query(None, description="Categorie exacte"),
+    prix_min: Optional[float] = Query(None, description="Prix minimum"),
+    prix_max: Optional[float] = Query(None, description="Prix maximum"),
+    note_min: Optional[int] = Query(None, description="Note minimum (1-5)"),
+    fields: Optional[str] = Query(None, description="Champs a exporter separes par des virgules (tous si absent)")
+):
+    """
+    Exporter les livres filtres en flux NDJSON ou CSV, tries par id.
+
+    Les livres sont lus par lots avec un curseur cote serveur et envoyes au
+    fil de la lecture : la memoire reste constante, quel que soit le catalogue.
+    """
+    try:
+        if format not in FORMATS_EXPORT:
+            raise ValueError(f"Format inconnu: {format} (attendu: {', '.join(FORMATS_EXPORT)})")
+        champs = analyser_champs(fields) or CHAMPS_LIVRE
+        filtres = FiltresRecherche(titre=titre, categorie=categorie, prix_min=prix_min,
+                                   prix_max=prix_max, note_min=note_min)
+        lignes = book_service.exporter_livres(filtres, champs, TAILLE_LOT_EXPORT)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if hasattr(lignes, "__aiter__"):
+        corps = flux_export_async(lignes, format, champs, TAILLE_LOT_EXPORT)
+    else:
+        corps = flux_export(lignes, format, champs, TAILLE_LOT_EXPORT)
+    return StreamingResponse(
+        corps,
+        media_type=FORMATS_EXPORT[format],
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'}
+    )
+
+
+@router.get("/fulltext", response_model=List[ResultatPleinTexte])
+async def rechercher_plein_texte(
+    response: Response,
+    q: str = Query(..., description="Mots recherches dans le titre et la description (\"phrase\", -exclu, or)"),
+    limit: int = Query(LIMITE_PLEIN_TEXTE, description="Nombre maximum de resultats par page"),
+    curseur: Optional[str] = Query(None, description=DESCRIPTION_CURSEUR)
+):
+    """Rechercher des livres en plein texte, classes par pertinence, avec extraits surlignes."""
+    try:
+        page = await appeler_service(book_service.recherche_plein_texte, q, limit, curseur)
+        entetes = {ENTETE_CURSEUR_SUIVANT: page.curseur_suivant} if page.curseur_suivant else {}
+        return repondre(page.livres, response, entetes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+
+@router.get("/fuzzy", response_model=List[ResultatApproximatif])
+async def rechercher_approximativement(
+    q: str = Query(..., description="Titre ou categorie, fautes de frappe tolerees"),
+    champ: str = Query("titre", description="Champ compare: titre ou categorie"),
+    seuil: float = Query(SEUIL_SIMILARITE, description="Similarite minimum des trigrammes (0 a 1)"),
+    limit: int = Query(LIMITE_APPROXIMATIVE, description="Nombre maximum de resultats")
+):
+    """Rechercher des livres par similarite de trigrammes du titre ou de la categorie."""
+    try:
+        return repondre(await appeler_service(book_service.recherche_approximative, q, champ, seuil, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
 
 
 @router.get("/{book_id}", response_model=Book)
-def obtenir_livre_par_id(book_id: int):
+async def obtenir_livre_par_id(book_id: int):
     """Recuperer un livre par son ID."""
     try:
-        livre = book_service.get_book_by_id(book_id)
+        livre = await appeler_service(book_service.get_book_by_id, book_id)
         if not livre:
             raise HTTPException(status_code=404, detail="Livre non trouve")
-        return livre
+        return repondre(livre)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
 
 
-@router.get("/category/{category_name}", response_model=List[Book])
-def obtenir_livres_par_categorie(category_name: str):
-    """Recuperer tous les livres d'une categorie."""
+@router.get("/category/{category_name}", response_model=List[BookResume])
+async def obtenir_livres_par_categorie(
+    category_name: str,
+    response: Response,
+    sort: str = Query("id", description=DESCRIPTION_TRI),
+    limit: Optional[int] = Query(None, description=DESCRIPTION_LIMITE),
+    curseur: Optional[str] = Query(None, description=DESCRIPTION_CURSEUR),
+    fields: Optional[str] = Query(None, description=DESCRIPTION_CHAMPS)
+):
+    """Recuperer les livres d'une categorie, tries et pagines par cle."""
     try:
-        return book_service.find_by_category(category_name)
+        return await lire_page(response, FiltresRecherche(categorie=category_name), sort, limit, curseur, fields)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
 
 
-@router.get("/search/", response_model=List[Book])
-def rechercher_livres(
+@router.get("/search/", response_model=List[BookResume])
+async def rechercher_livres(
+    response: Response,
     titre: Optional[str] = Query(None, description="Rechercher par titre"),
     prix_min: Optional[float] = Query(None, description="Prix minimum"),
     prix_max: Optional[float] = Query(None, description="Prix maximum"),
-    note_min: Optional[int] = Query(None, description="Note minimum (1-5)")
+    note_min: Optional[int] = Query(None, description="Note minimum (1-5)"),
+    sort: str = Query("id", description=DESCRIPTION_TRI),
+    limit: Optional[int] = Query(None, description=DESCRIPTION_LIMITE),
+    curseur: Optional[str] = Query(None, description=DESCRIPTION_CURSEUR),
+    fields: Optional[str] = Query(None, description=DESCRIPTION_CHAMPS)
 ):
-    """Rechercher des livres avec des filtres."""
+    """Rechercher des livres avec des filtres, tries et pagines par cle."""
     try:
-        tous_les_livres = book_service.get_all_books()
-        resultats = tous_les_livres
-
-        if titre:
-            resultats = [livre for livre in resultats
-                        if titre.lower() in livre.title.lower()]
-
-        if prix_min is not None:
-            resultats = [livre for livre in resultats
-                        if livre.prix_numerique >= prix_min]
-
-        if prix_max is not None:
-            resultats = [livre for livre in resultats
-                        if livre.prix_numerique <= prix_max]
-
-        if note_min is not None:
-            resultats = [livre for livre in resultats
-                        if livre.note_etoiles_nombre >= note_min]
-
-        return resultats
+        filtres = FiltresRecherche(titre=titre, prix_min=prix_min, prix_max=prix_max, note_min=note_min)
+        return await lire_page(response, filtres, sort, limit, curseur, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
\ No newline at end of file
@@ -2,32 +2,34 @@
 from typing import List
 from fastapi import APIRouter, HTTPException
 from api.services.category_service import CategoryService
-from api.services.book_service import BookService
+from api.services.fabrique import appeler_service
 from api.models.prix_moyen_categorie import PrixMoyenCategorie
 from api.models.top_categorie import TopCategorie
+from api.routes.books import book_service
 
 router = APIRouter()
 category_service = CategoryService()
-book_service = BookService()
 
 
 @router.get("/")
-def obtenir_toutes_les_categories():
+async def obtenir_toutes_les_categories():
     """Recuperer toutes les categories."""
     try:
-        return category_service.get_all_categories()
+        return await appeler_service(category_service.get_all_categories)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
 
 
 @router.get("/{category_id}")
-def obtenir_categorie_par_id(category_id: int):
+async def obtenir_categorie_par_id(category_id: int):
     """Recuperer une categorie par son ID."""
     try:
-        categorie = category_service.get_category_by_id(category_id)
+        categorie = await appeler_service(category_service.get_category_by_id, category_id)
         if not categorie:
             raise HTTPException(status_code=404, detail="Categorie non trouvee")
         return categorie
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -35,7 +37,7 @@ def obtenir_categorie_par_id(category_id: int):
 
 
 @router.get("/prix-moyen/", response_model=List[PrixMoyenCategorie])
-def obtenir_prix_moyen_par_categorie():
+async def obtenir_prix_moyen_par_categorie():
     """
     Calculer et retourner le prix moyen des livres par catégorie.
 
@@ -44,13 +46,13 @@ def obtenir_prix_moyen_par_categorie():
                                   nombre de livres, triée par prix décroissant
     """
     try:
-        return book_service.calculer_prix_moyen_par_categorie()
+        return await appeler_service(book_service.calculer_prix_moyen_par_categorie)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
 
 
 @router.get("/top-nombre-livres/", response_model=List[TopCategorie])
-def obtenir_top_categories_par_nombre_livres():
+async def obtenir_top_categories_par_nombre_livres():
     """
     Obtenir le classement des catégories par nombre de livres.
 
@@ -59,6 +61,6 @@ def obtenir_top_categories_par_nombre_livres():
                            avec rang, nombre de livres et pourcentage du total
     """
     try:
-        return book_service.obtenir_top_categories_par_nombre_livres()
+        return await appeler_service(book_service.obtenir_top_categories_par_nombre_livres)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Reponses conditionnelles des routes livres, categories et analyses (ETag, Last-Modified, 304).
+
+Les donnees ne changent qu'a la fin d'un crawl, quand le pipeline incremente
+la version du jeu de donnees. L'ETag d'une reponse est donc derive de cette
+version, du chemin et des parametres de la requete, et Last-Modified est la
+date de la derniere incrementation. Un client qui renvoie un ETag a jour
+dans If-None-Match recoit 304 avant l'appel de la route, donc sans requete
+sur les livres : cet ETag n'a pu etre obtenu que sur une reponse 200.
+If-None-Match: * et If-Modified-Since ne disent rien de l'existence de la
+ressource : la route repond, et seule une reponse 200 devient 304.
+
+La generation du jeu de donnees est relue au plus une fois par intervalle
+(BOOKS_CACHE_INTERVALLE_VERSION) par processus, pas a chaque requete.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+from api.models.generation_dataset import GenerationDataset
+from api.services.cache import INTERVALLE_VERSION_SECONDES, appliquer_version_caches
+
+logger = logging.getLogger(__name__)
+
+PREFIXES_CONDITIONNELS = ("/books", "/categories", "/analytique")
+METHODES_CONDITIONNELLES = ("GET", "HEAD")
+# Les clients peuvent garder la reponse mais doivent la revalider a chaque usage
+CACHE_CONTROL = "no-cache"
+
+
+class SuiviGeneration:
+    """
+    Derniere generation du jeu de donnees lue, relue au plus une fois par intervalle.
+    """
+
+    def __init__(self, lire: Callable[[], Awaitable[Optional[GenerationDataset]]],
+                 intervalle: float = INTERVALLE_VERSION_SECONDES):
+        """
+        Initialiser le suivi.
+
+        Args:
+            lire: Coroutine retournant la generation courante (None si illisible)
+            intervalle: Intervalle minimum entre deux lectures, en secondes
+        """
+        self.lire = lire
+        self.intervalle = intervalle
+        self.generation: Optional[GenerationDataset] = None
+        self.lue_le = float("-inf")
+        self.verrou = asyncio.Lock()
+
+    def a_relire(self) -> bool:
+        """
+        Indiquer si l'intervalle depuis la derniere lecture est ecoule.
+
+        Returns:
+            bool: True si la generation doit etre relue
+        """
+        return time.monotonic() - self.lue_le >= self.intervalle
+
+    async def obtenir(self) -> Optional[GenerationDataset]:
+        """
+        Retourner la generation courante, relue si l'intervalle est ecoule.
+
+        Une seule lecture a la fois : les requetes concurrentes attendent son
+        resultat. Quand la version change, les caches de lecture sont alignes.
+
+        Returns:
+            Optional[GenerationDataset]: Generation courante, None si illisible
+        """
+        if not self.a_relire():
+            return self.generation
+
+        async with self.verrou:
+            if self.a_relire():
+                try:
+                    generation = await self.lire()
+                except Exception:
+                    logger.exception("Lecture de la version du jeu de donnees impossible")
+                    generation = None
+                if generation is not None:
+                    appliquer_version_caches(generation.version)
+                self.generation = generation
+                self.lue_le = time.monotonic()
+        return self.generation
+
+
+def calculer_etag(version: str, chemin: str, query_string: bytes) -> str:
+    """
+    Calculer l'ETag d'une reponse depuis la version du jeu de donnees et la requete.
+
+    Les parametres sont tries : ?a=1&b=2 et ?b=2&a=1 partagent le meme ETag.
+    L'ETag est faible, le corps pouvant differer d'un octet a l'autre selon
+    l'encodeur JSON configure sans changer de contenu.
+
+    Args:
+        version: Version du jeu de donnees
+        chemin: Chemin de la requete
+        query_string: Parametres bruts de la requete
+
+    Returns:
+        str: ETag faible, guillemets compris
+    """
+    parametres = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    empreinte = hashlib.sha1(repr((version, chemin, parametres)).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{empreinte}"'
+
+
+def date_http(date: datetime) -> str:
+    """
+    Formater une date pour l'en-tete Last-Modified.
+
+    Args:
+        date: Date, avec ou sans fuseau (sans fuseau = UTC)
+
+    Returns:
+        str: Date HTTP en GMT
+    """
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return format_datetime(date.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_correspond(if_none_match: str, etag: str) -> bool:
+    """
+    Comparer If-None-Match a l'ETag (comparaison faible, comme l'exige RFC 9110).
+
+    "*" n'est pas traite ici : il depend de l'existence de la ressource, que
+    seule la route connait.
+
+    Args:
+        if_none_match: Valeur de l'en-tete (liste d'ETags)
+        etag: ETag de la reponse
+
+    Returns:
+        bool: True si l'un des ETags correspond
+    """
+    opaque = etag.removeprefix("W/")
+    return any(candidat.strip().removeprefix("W/") == opaque for candidat in if_none_match.split(","))
+
+
+def non_modifie_depuis(if_modified_since: str, mis_a_jour_le: datetime) -> bool:
+    """
+    Indiquer si les donnees n'ont pas change depuis la date envoyee par le client.
+
+    Args:
+        if_modified_since: Valeur de l'en-tete If-Modified-Since
+        mis_a_jour_le: Date de la derniere mise a jour du jeu de donnees
+
+    Returns:
+        bool: True si la derniere mise a jour n'est pas posterieure a la date (a la seconde pres)
+    """
+    try:
+        date_client = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if date_client.tzinfo is None:
+        date_client = date_client.replace(tzinfo=timezone.utc)
+    if mis_a_jour_le.tzinfo is None:
+        mis_a_jour_le = mis_a_jour_le.replace(tzinfo=timezone.utc)
+    return mis_a_jour_le.replace(microsecond=0) <= date_client
+
+
+def entetes_validation(generation: GenerationDataset, etag: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    En-tetes de validation communs aux reponses 200 et 304.
+
+    Args:
+        generation: Generation du jeu de donnees
+        etag: ETag de la reponse
+
+    Returns:
+        Tuple[Tuple[str, str], ...]: Paires (nom, valeur)
+    """
+    entetes = [("ETag", etag), ("Cache-Control", CACHE_CONTROL)]
+    if generation.mis_a_jour_le is not None:
+        entetes.append(("Last-Modified", date_http(generation.mis_a_jour_le)))
+    return tuple(entetes)
+
+
+class ReponsesConditionnelles:
+    """
+    Middleware ASGI : 304 sur les requetes conditionnelles, ETag et Last-Modified sur les reponses 200.
+    """
+
+    def __init__(self, app, suivi: SuiviGeneration, prefixes: Tuple[str, ...] = PREFIXES_CONDITIONNELS):
+        """
+        Initialiser le middleware.
+
+        Args:
+            app: Application ASGI suivante
+            suivi: Suivi de la generation du jeu de donnees
+            prefixes: Chemins concernes
+        """
+        self.app = app
+        self.suivi = suivi
+        self.prefixes = prefixes
+
+    async def __call__(self, scope, receive, send):
+        """
+        Traiter une requete : repondre 304 si le client est a jour, sinon marquer la reponse.
+        """
+        if (scope["type"] != "http" or scope["method"] not in METHODES_CONDITIONNELLES
+                or not scope["path"].startswith(self.prefixes)):
+            await self.app(scope, receive, send)
+            return
+
+        generation = await self.suivi.obtenir()
+        if generation is None:
+            await self.app(scope, receive, send)
+            return
+
+        etag = calculer_etag(generation.version, scope["path"], scope.get("query_string", b""))
+        entetes = entetes_validation(generation, etag)
+        requete = Headers(scope=scope)
+
+        # If-None-Match l'emporte sur If-Modified-Since quand les deux sont envoyes.
+        # a_jour : 304 immediat ; si_existe : 304 seulement si la route repond 200
+        a_jour = si_existe = False
+        if "if-none-match" in requete:
+            if requete["if-none-match"].strip() == "*":
+                si_existe = True
+            else:
+                a_jour = etag_correspond(requete["if-none-match"], etag)
+        elif "if-modified-since" in requete and generation.mis_a_jour_le is not None:
+            si_existe = non_modifie_depuis(requete["if-modified-since"], generation.mis_a_jour_le)
+
+        if a_jour:
+            await Response(status_code=304, headers=dict(entetes))(scope, receive, send)
+            return
+
+        converti = False
+
+        async def envoyer(message):
+            nonlocal converti
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                if si_existe:
+                    # La ressource existe et n'a pas change : le corps est jete
+                    converti = True
+                    message = {"type": "http.response.start", "status": 304,
+                               "headers": MutableHeaders(headers=dict(entetes)).raw}
+                else:
+                    reponse = MutableHeaders(scope=message)
+                    for nom, valeur in entetes:
+                        reponse[nom] = valeur
+            elif message["type"] == "http.response.body" and converti:
+                if message.get("more_body", False):
+                    return
+                message = {"type": "http.response.body", "body": b"", "more_body": False}
+            await send(message)
+
+        await self.app(scope, receive, envoyer)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Mise en forme du flux d'export des livres (NDJSON ou CSV).
+
+Les livres arrivent du repository par lots (curseur cote serveur) et sont
+encodes lot par lot : la memoire reste constante quelle que soit la taille
+du catalogue, et le premier octet part des le premier lot.
+"""
+import csv
+import io
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List
+
+from api.routes.reponse_rapide import encoder_json
+
+# Format -> type de contenu de la reponse
+FORMATS_EXPORT = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+TAILLE_LOT_EXPORT = int(os.environ.get("BOOKS_EXPORT_TAILLE_LOT", "1000"))
+
+
+def encoder_lot(format_export: str, lignes: List[Dict[str, Any]], champs: List[str]) -> bytes:
+    """
+    Encoder un lot de livres.
+
+    Args:
+        format_export: ndjson ou csv
+        lignes: Livres du lot
+        champs: Colonnes du CSV, dans l'ordre
+
+    Returns:
+        bytes: Lignes encodees en UTF-8
+    """
+    if format_export == "ndjson":
+        return b"".join(encoder_json(ligne) + b"\n" for ligne in lignes)
+
+    tampon = io.StringIO()
+    ecrivain = csv.DictWriter(tampon, fieldnames=champs, lineterminator="\n")
+    ecrivain.writerows(lignes)
+    return tampon.getvalue().encode("utf-8")
+
+
+def entete_export(format_export: str, champs: List[str]) -> bytes:
+    """
+    Encoder l'en-tete du flux (ligne des colonnes en CSV, rien en NDJSON).
+
+    Args:
+        format_export: ndjson ou csv
+        champs: Colonnes du CSV
+
+    Returns:
+        bytes: En-tete encode
+    """
+    if format_export != "csv":
+        return b""
+    return encoder_lot("csv", [dict(zip(champs, champs))], champs)
+
+
+def flux_export(lignes: Iterable[Dict[str, Any]], format_export: str,
+                champs: List[str], taille_lot: int) -> Iterator[bytes]:
+    """
+    Encoder un flux synchrone de livres par lots (parcouru dans le pool de threads).
+
+    Args:
+        lignes: Livres lus par le repository
+        format_export: ndjson ou csv
+        champs: Champs exportes
+        taille_lot: Nombre de livres par morceau envoye
+
+    Yields:
+        bytes: Morceaux du corps de la reponse
+    """
+    yield entete_export(format_export, champs)
+    lot = []
+    for ligne in lignes:
+        lot.append(ligne)
+        if len(lot) >= taille_lot:
+            yield encoder_lot(format_export, lot, champs)
+            lot = []
+    if lot:
+        yield encoder_lot(format_export, lot, champs)
+
+
+async def flux_export_async(lignes: AsyncIterator[Dict[str, Any]], format_export: str,
+                            champs: List[str], taille_lot: int) -> AsyncIterator[bytes]:
+    """
+    Encoder un flux asynchrone de livres par lots.
+
+    Args:
+        lignes: Livres lus par le repository asynchrone
+        format_export: ndjson ou csv
+        champs: Champs exportes
+        taille_lot: Nombre de livres par morceau envoye
+
+    Yields:
+        bytes: Morceaux du corps de la reponse
+    """
+    yield entete_export(format_export, champs)
+    lot = []
+    async for ligne in lignes:
+        lot.append(ligne)
+        if len(lot) >= taille_lot:
+            yield encoder_lot(format_export, lot, champs)
+            lot = []
+    if lot:
+        yield encoder_lot(format_export, lot, champs)
@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+"""
+Instantanes pre-rendus et pre-compresses des routes les plus lues.
+
+/books/, /categories/, /categories/prix-moyen/ et /categories/top-nombre-livres/
+(sans parametres) renvoient les memes octets pour toute une generation du jeu
+de donnees. Ces reponses sont rendues une fois, au demarrage de l'API puis a
+chaque nouvelle version (fin de crawl), en passant par les routes elles-memes,
+et gardees en memoire en trois variantes : brute, gzip et brotli. Une requete
+est servie depuis la memoire selon Accept-Encoding, sans aucun calcul.
+
+Avec BOOKS_INSTANTANES_DOSSIER, les instantanes sont aussi ecrits dans ce
+dossier : les autres workers et les redemarrages les relisent au lieu de les
+recalculer, tant que la version n'a pas change.
+
+Sans le paquet brotli, seules les variantes brute et gzip sont produites.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.routes.conditionnel import SuiviGeneration
+from database_config import lire_booleen
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+INSTANTANES_ACTIVES = lire_booleen("BOOKS_API_INSTANTANES", True)
+DOSSIER_INSTANTANES = os.environ.get("BOOKS_INSTANTANES_DOSSIER") or None
+
+CHEMINS_INSTANTANES = ("/books/", "/categories/", "/categories/prix-moyen/", "/categories/top-nombre-livres/")
+
+# Encodages par ordre de preference (le plus compact d'abord) et extension de fichier
+EXTENSIONS_ENCODAGES = {"br": ".br", "gzip": ".gz", "identity": ""}
+NIVEAU_GZIP = 9
+NIVEAU_BROTLI = 11
+
+MANIFESTE = "instantanes.json"
+
+
+@dataclass
+class Instantane:
+    """
+    Reponse rendue d'une route, avec ses variantes compressees.
+    """
+    type_contenu: str
+    corps: Dict[str, bytes] = field(default_factory=dict)
+
+
+def compresser(corps: bytes) -> Dict[str, bytes]:
+    """
+    Produire les variantes d'un corps de reponse.
+
+    Args:
+        corps: Corps rendu par la route
+
+    Returns:
+        Dict[str, bytes]: Corps par encodage (identity, gzip et br si disponible)
+    """
+    variantes = {"identity": corps, "gzip": gzip.compress(corps, compresslevel=NIVEAU_GZIP, mtime=0)}
+    if brotli is not None:
+        variantes["br"] = brotli.compress(corps, quality=NIVEAU_BROTLI)
+    return variantes
+
+
+def choisir_encodage(accept_encoding: str, disponibles: Dict[str, bytes]) -> str:
+    """
+    Choisir la variante a envoyer selon Accept-Encoding.
+
+    Args:
+        accept_encoding: Valeur de l'en-tete (vide si absent)
+        disponibles: Variantes de l'instantane
+
+    Returns:
+        str: Encodage accepte le plus compact, identity par defaut
+    """
+    acceptes = {}
+    for element in accept_encoding.split(","):
+        nom, _, parametres = element.strip().partition(";")
+        qualite = 1.0
+        parametres = parametres.strip().replace(" ", "")
+        if parametres.startswith("q="):
+            try:
+                qualite = float(parametres[2:])
+            except ValueError:
+                qualite = 0.0
+        if nom:
+            acceptes[nom.lower()] = qualite
+
+    for encodage in EXTENSIONS_ENCODAGES:
+        if encodage == "identity" or encodage not in disponibles:
+            continue
+        if acceptes.get(encodage, acceptes.get("*", 0.0)) > 0:
+            return encodage
+    return "identity"
+
+
+def prefixe_version(version: str) -> str:
+    """
+    Prefixe des fichiers d'une generation dans le dossier partage.
+
+    Args:
+        version: Version des donnees rendues
+
+    Returns:
+        str: Prefixe court derive de la version, par exemple v3f2a...-
+    """
+    return "v" + hashlib.sha1(version.encode("utf-8")).hexdigest()[:16] + "-"
+
+
+def nom_fichier(chemin: str, version: str) -> str:
+    """
+    Nom de fichier d'un instantane dans le dossier.
+
+    La version fait partie du nom : un worker qui sauvegarde la generation
+    suivante n'ecrase jamais les corps qu'un autre worker est en train de lire.
+
+    Args:
+        chemin: Chemin de la route
+        version: Version des donnees rendues
+
+    Returns:
+        str: Nom sans extension d'encodage, par exemple v3f2a...-categories-prix-moyen.json
+    """
+    return prefixe_version(version) + "-".join(partie for partie in chemin.split("/") if partie) + ".json"
+
+
+def ecrire_atomique(fichier: str, contenu: bytes) -> None:
+    """
+    Ecrire un fichier sans que les lecteurs ne voient jamais un contenu partiel.
+
+    Args:
+        fichier: Chemin du fichier
+        contenu: Octets a ecrire
+    """
+    temporaire = f"{fichier}.{os.getpid()}.tmp"
+    with open(temporaire, "wb") as sortie:
+        sortie.write(contenu)
+    os.replace(temporaire, fichier)
+
+
+class InstantanesReponses:
+    """
+    Instantanes de la generation courante, rendus par les routes et servis depuis la memoire.
+    """
+
+    def __init__(self, chemins: Tuple[str, ...] = CHEMINS_INSTANTANES, dossier: Optional[str] = DOSSIER_INSTANTANES):
+        """
+        Initialiser le magasin d'instantanes.
+
+        Args:
+            chemins: Routes pre-rendues
+            dossier: Dossier partage des instantanes (None = memoire seule)
+        """
+        self.chemins = chemins
+        self.dossier = dossier
+        self.version: Optional[str] = None
+        self.instantanes: Dict[str, Instantane] = {}
+        self.rendus = 0
+        self.servis = 0
+
+    def obtenir(self, chemin: str, version: str) -> Optional[Instantane]:
+        """
+        Lire l'instantane d'une route pour une version.
+
+        Args:
+            chemin: Chemin de la route
+            version: Version courante du jeu de donnees
+
+        Returns:
+            Optional[Instantane]: L'instantane, None s'il est absent ou d'une autre version
+        """
+        if version != self.version:
+            return None
+        return self.instantanes.get(chemin)
+
+    def remplacer(self, version: str, instantanes: Dict[str, Instantane]) -> None:
+        """
+        Publier les instantanes d'une version (remplacement atomique du dictionnaire).
+
+        Args:
+            version: Version des donnees rendues
+            instantanes: Instantanes par chemin
+        """
+        self.instantanes = instantanes
+        self.version = version
+
+    def charger(self, version: str) -> bool:
+        """
+        Relire les instantanes d'une version depuis le dossier partage.
+
+        Args:
+            version: Version attendue
+
+        Returns:
+            bool: True si les instantanes de cette version ont ete charges
+        """
+        if self.dossier is None:
+            return False
+        try:
+            with open(os.path.join(self.dossier, MANIFESTE), encoding="utf-8") as fichier:
+                manifeste = json.load(fichier)
+            if manifeste.get("version") != version:
+                return False
+
+            instantanes = {}
+            for chemin, type_contenu in manifeste["chemins"].items():
+                instantane = Instantane(type_contenu=type_contenu)
+                for encodage in manifeste["encodages"]:
+                    fichier = os.path.join(self.dossier, nom_fichier(chemin, version) + EXTENSIONS_ENCODAGES[encodage])
+                    with open(fichier, "rb") as entree:
+                        instantane.corps[encodage] = entree.read()
+                instantanes[chemin] = instantane
+        except (OSError, ValueError, KeyError):
+            return False
+
+        self.remplacer(version, instantanes)
+        return True
+
+    def sauvegarder(self, version: str, instantanes: Dict[str, Instantane]) -> None:
+        """
+        Ecrire les instantanes dans le dossier partage, le manifeste en dernier.
+
+        Les fichiers des generations precedentes sont supprimes une fois le
+        manifeste publie ; un worker qui les lisait encore echoue et rend lui-meme.
+
+        Args:
+            version: Version des donnees rendues
+            instantanes: Instantanes par chemin
+        """
+        if self.dossier is None:
+            return
+        try:
+            os.makedirs(self.dossier, exist_ok=True)
+            encodages = set(EXTENSIONS_ENCODAGES)
+            for chemin, instantane in instantanes.items():
+                encodages &= set(instantane.corps)
+                for encodage, corps in instantane.corps.items():
+                    ecrire_atomique(os.path.join(self.dossier,
+                                                 nom_fichier(chemin, version) + EXTENSIONS_ENCODAGES[encodage]),
+                                    corps)
+            manifeste = {
+                "version": version,
+                "encodages": sorted(encodages),
+                "chemins": {chemin: instantane.type_contenu for chemin, instantane in instantanes.items()},
+            }
+            ecrire_atomique(os.path.join(self.dossier, MANIFESTE), json.dumps(manifeste).encode("utf-8"))
+            self.supprimer_anciennes(version)
+        except OSError:
+            logger.exception("Ecriture des instantanes impossible dans %s", self.dossier)
+
+    def supprimer_anciennes(self, version: str) -> None:
+        """
+        Supprimer les corps des autres generations du dossier partage.
+
+        Args:
+            version: Version publiee dans le manifeste
+        """
+        courant = prefixe_version(version)
+        for nom in os.listdir(self.dossier):
+            if not nom.startswith("v") or nom.startswith(courant) or nom.endswith(".tmp"):
+                continue
+            if not nom.endswith(tuple(".json" + extension for extension in EXTENSIONS_ENCODAGES.values())):
+                continue
+            try:
+                os.remove(os.path.join(self.dossier, nom))
+            except FileNotFoundError:
+                pass
+
+    def statistiques(self) -> Dict[str, Any]:
+        """
+        Compteurs des instantanes.
+
+        Returns:
+            Dict[str, Any]: Version, rendus, reponses servies et tailles par variante
+        """
+        return {
+            "version_dataset": self.version,
+            "rendus": self.rendus,
+            "servis": self.servis,
+            "tailles_octets": {
+                chemin: {encodage: len(corps) for encodage, corps in instantane.corps.items()}
+                for chemin, instantane in self.instantanes.items()
+            },
+        }
+
+
+async def rendre_route(app, scope_modele: Dict[str, Any], chemin: str) -> Optional[Tuple[str, bytes]]:
+    """
+    Rendre une route en l'appelant comme une requete GET sans parametres.
+
+    Args:
+        app: Application ASGI a appeler (routes)
+        scope_modele: Scope d'une requete ou du lifespan (application, serveur)
+        chemin: Chemin de la route
+
+    Returns:
+        Optional[Tuple[str, bytes]]: (type de contenu, corps), None si la route ne repond pas 200
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": chemin,
+        "raw_path": chemin.encode("latin-1"),
+        "root_path": scope_modele.get("root_path", ""),
+        "query_string": b"",
+        "headers": [(b"host", b"instantanes"), (b"accept", b"application/json")],
+        "client": None,
+        "server": scope_modele.get("server"),
+        "app": scope_modele.get("app"),
+        "state": scope_modele.get("state", {}),
+    }
+    demande_envoyee = False
+    reponse: Dict[str, Any] = {"status": None, "headers": [], "corps": []}
+
+    async def recevoir():
+        nonlocal demande_envoyee
+        if not demande_envoyee:
+            demande_envoyee = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Pas de deconnexion : la requete interne dure jusqu'a la fin de la reponse
+        await asyncio.Event().wait()
+
+    async def envoyer(message):
+        if message["type"] == "http.response.start":
+            reponse["status"] = message["status"]
+            reponse["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            reponse["corps"].append(message.get("body", b""))
+
+    await app(scope, recevoir, envoyer)
+    if reponse["status"] != 200:
+        return None
+    type_contenu = dict(reponse["headers"]).get(b"content-type", b"application/json").decode("latin-1")
+    return type_contenu, b"".join(reponse["corps"])
+
+
+class ServirInstantanes:
+    """
+    Middleware ASGI : sert les routes pre-rendues depuis la memoire, et les rend a chaque nouvelle version.
+    """
+
+    def __init__(self, app, suivi: SuiviGeneration, instantanes: InstantanesReponses):
+        """
+        Initialiser le middleware.
+
+        Args:
+            app: Application ASGI suivante (routes)
+            suivi: Suivi de la generation du jeu de donnees (partage avec les reponses conditionnelles)
+            instantanes: Magasin d'instantanes
+        """
+        self.app = app
+        self.suivi = suivi
+        self.instantanes = instantanes
+        self.scope_modele: Dict[str, Any] = {}
+        self.rendu_en_cours: Optional[asyncio.Task] = None
+        self.arrete = False
+
+    async def __call__(self, scope, receive, send):
+        """
+        Servir un instantane a jour, sinon transmettre la requete et lancer le rendu de la nouvelle version.
+        """
+        if scope["type"] == "lifespan":
+            await self.app(scope, self.rendre_au_demarrage(scope, receive), send)
+            return
+
+        if (scope["type"] != "http" or scope["method"] not in ("GET", "HEAD")
+                or scope["path"] not in self.instantanes.chemins or scope.get("query_string")):
+            await self.app(scope, receive, send)
+            return
+
+        self.scope_modele = scope
+        generation = await self.suivi.obtenir()
+        instantane = self.instantanes.obtenir(scope["path"], generation.version) if generation else None
+        if instantane is None:
+            if generation is not None:
+                self.lancer_rendu()
+            await self.app(scope, receive, send)
+            return
+
+        await self.envoyer_instantane(scope, send, instantane)
+
+    def rendre_au_demarrage(self, scope, receive):
+        """
+        Envelopper receive du lifespan pour lancer le rendu une fois l'API demarree
+        et l'annuler avant l'arret.
+
+        Args:
+            scope: Scope du lifespan
+            receive: Fonction receive d'origine
+
+        Returns:
+            Coroutine receive enveloppee
+        """
+        async def recevoir():
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.scope_modele = scope
+                # Le rendu passe par les routes : il attend la fin du demarrage dans la boucle
+                asyncio.get_running_loop().call_soon(self.lancer_rendu)
+            elif message["type"] == "lifespan.shutdown":
+                # Avant les handlers d'arret : le rendu passe par les routes et le pool de threads
+                await self.arreter_rendu()
+            return message
+        return recevoir
+
+    def lancer_rendu(self) -> None:
+        """
+        Lancer le rendu en tache de fond, un seul a la fois.
+        """
+        if self.arrete:
+            return
+        if self.rendu_en_cours is None or self.rendu_en_cours.done():
+            self.rendu_en_cours = asyncio.get_running_loop().create_task(self.rendre())
+
+    async def arreter_rendu(self) -> None:
+        """
+        Annuler le rendu en cours et attendre sa fin, sans en relancer ensuite.
+        """
+        self.arrete = True
+        tache, self.rendu_en_cours = self.rendu_en_cours, None
+        if tache is None or tache.done():
+            return
+        tache.cancel()
+        try:
+            await tache
+        except asyncio.CancelledError:
+            pass
+
+    async def rendre(self) -> None:
+        """
+        Rendre toutes les routes pour la version courante, ou les relire depuis le dossier partage.
+        """
+        generation = await self.suivi.obtenir()
+        if generation is None or generation.version == self.instantanes.version:
+            return
+        if await asyncio.to_thread(self.instantanes.charger, generation.version):
+            return
+
+        instantanes = {}
+        try:
+            for chemin in self.instantanes.chemins:
+                rendu = await rendre_route(self.app, self.scope_modele, chemin)
+                if rendu is None:
+                    logger.warning("Instantane de %s non rendu (reponse differente de 200)", chemin)
+                    continue
+                type_contenu, corps = rendu
+                variantes = await asyncio.to_thread(compresser, corps)
+                instantanes[chemin] = Instantane(type_contenu=type_contenu, corps=variantes)
+        except Exception:
+            logger.exception("Rendu des instantanes impossible")
+            return
+
+        # Une version publiee pendant le rendu rendrait ces octets obsoletes
+        courante = await self.suivi.obtenir()
+        if courante is None or courante.version != generation.version:
+            return
+        self.instantanes.remplacer(generation.version, instantanes)
+        self.instantanes.rendus += 1
+        await asyncio.to_thread(self.instantanes.sauvegarder, generation.version, instantanes)
+
+    async def envoyer_instantane(self, scope, send, instantane: Instantane) -> None:
+        """
+        Envoyer la variante acceptee par le client, telle quelle.
+
+        Args:
+            scope: Scope de la requete
+            send: Fonction send ASGI
+            instantane: Instantane a envoyer
+        """
+        accept_encoding = ""
+        for nom, valeur in scope["headers"]:
+            if nom == b"accept-encoding":
+                accept_encoding = valeur.decode("latin-1")
+                break
+        encodage = choisir_encodage(accept_encoding, instantane.corps)
+        corps = instantane.corps[encodage]
+
+        entetes: List[Tuple[bytes, bytes]] = [
+            (b"content-type", instantane.type_contenu.encode("latin-1")),
+            (b"content-length", str(len(corps)).encode("latin-1")),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if encodage != "identity":
+            entetes.append((b"content-encoding", encodage.encode("latin-1")))
+
+        self.instantanes.servis += 1
+        await send({"type": "http.response.start", "status": 200, "headers": entetes})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else corps})
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Chemin de reponse rapide des routes livres (opt-in : BOOKS_API_REPONSE_RAPIDE=1).
+
+Par defaut, FastAPI valide chaque livre retourne contre le response_model
+(pydantic), le convertit avec jsonable_encoder puis l'encode avec le module
+json. Les livres sortent pourtant deja types du repository ou du cache. Le
+chemin rapide encode directement les dataclasses et dictionnaires en octets
+JSON avec orjson : la route retourne une Response, que FastAPI transmet telle
+quelle. Le response_model reste declare sur la route pour le schema OpenAPI.
+
+Sans orjson installe, l'encodage retombe sur le module json (sans validation
+pydantic, mais sans le gain d'encodage).
+"""
+import json
+from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+from database_config import lire_booleen
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+REPONSE_RAPIDE = lire_booleen("BOOKS_API_REPONSE_RAPIDE", False)
+
+
+def _convertir_dataclass(valeur: Any) -> Any:
+    """
+    Convertir une dataclass pour le module json (repli sans orjson).
+
+    Args:
+        valeur: Objet non serialisable par json
+
+    Returns:
+        dict: Champs de la dataclass
+
+    Raises:
+        TypeError: Si l'objet n'est pas une dataclass
+    """
+    if is_dataclass(valeur):
+        return asdict(valeur)
+    raise TypeError(f"Type non serialisable en JSON: {type(valeur).__name__}")
+
+
+def encoder_json(contenu: Any) -> bytes:
+    """
+    Encoder des livres (dataclasses, dictionnaires, listes) en octets JSON.
+
+    Args:
+        contenu: Valeur a encoder
+
+    Returns:
+        bytes: JSON encode en UTF-8
+    """
+    if orjson is not None:
+        return orjson.dumps(contenu)
+    return json.dumps(contenu, default=_convertir_dataclass, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class ReponseJSONRapide(Response):
+    """
+    Reponse JSON encodee sans validation pydantic ni jsonable_encoder.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        """
+        Encoder le contenu, sauf s'il est deja en octets.
+
+        Args:
+            content: Livres a encoder, ou JSON deja encode
+
+        Returns:
+            bytes: Corps de la reponse
+        """
+        if isinstance(content, bytes):
+            return content
+        return encoder_json(content)
+
+
+def repondre(contenu: Any, response: Optional[Response] = None,
+             entetes: Optional[Dict[str, str]] = None) -> Any:
+    """
+    Retourner le contenu d'une route livres par le chemin configure.
+
+    Args:
+        contenu: Livres, resultats ou livre seul
+        response: Reponse injectee par FastAPI (chemin standard, pour les en-tetes)
+        entetes: En-tetes a ajouter
+
+    Returns:
+        ReponseJSONRapide si le chemin rapide est active, sinon le contenu,
+        valide et encode par FastAPI selon le response_model
+    """
+    if REPONSE_RAPIDE:
+        return ReponseJSONRapide(content=contenu, headers=entetes)
+    if entetes and response is not None:
+        response.headers.update(entetes)
+    return contenu
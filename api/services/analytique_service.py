@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Service des analyses numériques (prix, notes, stock, avis) par catégorie.
+
+Les colonnes NumPy sont chargées une fois par version du jeu de données, en
+un seul parcours par lots des livres (flux d'export du service livres), puis
+toutes les analyses sont calculées en mémoire sans requête.
+"""
+import asyncio
+from typing import List, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+
+from api.models.distribution_categorie import (CHAMPS_ANALYTIQUES, PERCENTILES_DEFAUT, PERCENTILES_MAX,
+                                               DistributionCategorie)
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.histogramme import INTERVALLES_DEFAUT, INTERVALLES_MAX, Histogramme
+from api.models.notes_categorie import NotesCategorie
+from api.models.valeur_stock_categorie import ValeurStockCategorie
+from api.services.colonnes_livres import CHAMPS_COLONNES, ColonnesLivres, ConstructeurColonnes
+from api.services.fabrique import appeler_service
+
+# Nombre de livres lus à la fois au chargement des colonnes
+TAILLE_LOT_COLONNES = 5000
+
+
+class AnalytiqueService:
+    """
+    Analyses vectorisées sur les colonnes des livres de la version courante.
+    """
+
+    def __init__(self, book_service):
+        """
+        Initialiser le service sur le service livres du mode configuré.
+
+        Args:
+            book_service: BookService ou BookServiceAsync (flux des livres et cache de version)
+        """
+        self.book_service = book_service
+        self.colonnes: Optional[ColonnesLivres] = None
+        self.verrou = asyncio.Lock()
+
+    async def version_courante(self) -> Optional[str]:
+        """
+        Lire la version du jeu de données, au plus une fois par intervalle (celle du cache livres).
+
+        Returns:
+            Optional[str]: Version courante, None si illisible
+        """
+        cache = self.book_service.cache
+        if cache.version_a_relire():
+            cache.appliquer_version(await appeler_service(self.book_service.book_repository.obtenir_version_dataset))
+        return cache.version
+
+    async def obtenir_colonnes(self) -> ColonnesLivres:
+        """
+        Retourner les colonnes de la version courante, chargées au premier appel de chaque version.
+
+        Un seul chargement à la fois : les requêtes concurrentes attendent son résultat.
+        Sans version lisible, les colonnes sont rechargées à chaque appel.
+
+        Returns:
+            ColonnesLivres: Colonnes de la version courante
+        """
+        version = await self.version_courante()
+        colonnes = self.colonnes
+        if colonnes is not None and version is not None and colonnes.version == version:
+            return colonnes
+
+        async with self.verrou:
+            colonnes = self.colonnes
+            if colonnes is None or version is None or colonnes.version != version:
+                colonnes = await self.charger_colonnes(version)
+                self.colonnes = colonnes
+        return colonnes
+
+    async def charger_colonnes(self, version: Optional[str]) -> ColonnesLivres:
+        """
+        Lire les champs analytiques de tous les livres et construire les colonnes.
+
+        Args:
+            version: Version du jeu de données lue avant le chargement
+
+        Returns:
+            ColonnesLivres: Nouvelles colonnes
+        """
+        lignes = self.book_service.exporter_livres(FiltresRecherche(), CHAMPS_COLONNES, TAILLE_LOT_COLONNES)
+        if hasattr(lignes, "__aiter__"):
+            constructeur = ConstructeurColonnes()
+            async for ligne in lignes:
+                constructeur.ajouter(ligne)
+            return constructeur.terminer(version)
+        return await run_in_threadpool(lambda: ConstructeurColonnes().ajouter_tous(lignes).terminer(version))
+
+    @staticmethod
+    def valider_champ(champ: str) -> str:
+        """
+        Valider le champ analysé.
+
+        Args:
+            champ: prix, note, stock ou avis
+
+        Returns:
+            str: Le champ
+
+        Raises:
+            ValueError: Si le champ est inconnu
+        """
+        if champ not in CHAMPS_ANALYTIQUES:
+            raise ValueError(f"Champ inconnu: {champ} (attendu: {', '.join(CHAMPS_ANALYTIQUES)})")
+        return champ
+
+    @staticmethod
+    def valider_categorie(colonnes: ColonnesLivres, categorie: Optional[str]) -> Optional[str]:
+        """
+        Valider la catégorie analysée.
+
+        Args:
+            colonnes: Colonnes chargées
+            categorie: Nom de la catégorie, ou None pour toutes
+
+        Returns:
+            Optional[str]: La catégorie, None si absente ou vide
+
+        Raises:
+            ValueError: Si la catégorie est inconnue
+        """
+        if categorie is None or not categorie.strip():
+            return None
+        if categorie.strip().lower() not in colonnes.codes_par_nom:
+            raise ValueError(f"Catégorie inconnue: {categorie}")
+        return categorie
+
+    async def distribution(self, champ: str = "prix", percentiles: Sequence[float] = PERCENTILES_DEFAUT,
+                           categorie: Optional[str] = None) -> List[DistributionCategorie]:
+        """
+        Minimum, maximum, moyenne et percentiles d'un champ par catégorie.
+
+        Args:
+            champ: prix, note, stock ou avis
+            percentiles: Percentiles voulus, entre 0 et 100
+            categorie: Une catégorie, ou None pour toutes
+
+        Returns:
+            List[DistributionCategorie]: Distribution par catégorie
+
+        Raises:
+            ValueError: Si le champ, un percentile ou la catégorie est invalide
+        """
+        self.valider_champ(champ)
+        if not percentiles or len(percentiles) > PERCENTILES_MAX:
+            raise ValueError(f"Il faut entre 1 et {PERCENTILES_MAX} percentiles")
+        if any(not 0 <= percentile <= 100 for percentile in percentiles):
+            raise ValueError("Les percentiles doivent être compris entre 0 et 100")
+
+        colonnes = await self.obtenir_colonnes()
+        return colonnes.distribution(champ, percentiles, self.valider_categorie(colonnes, categorie))
+
+    async def histogramme(self, champ: str = "prix", intervalles: int = INTERVALLES_DEFAUT,
+                          categorie: Optional[str] = None) -> Histogramme:
+        """
+        Histogramme d'un champ, sur tous les livres ou sur une catégorie.
+
+        Args:
+            champ: prix, note, stock ou avis
+            intervalles: Nombre d'intervalles
+            categorie: Une catégorie, ou None pour tous les livres
+
+        Returns:
+            Histogramme: Bornes et comptes
+
+        Raises:
+            ValueError: Si le champ, le nombre d'intervalles ou la catégorie est invalide
+        """
+        self.valider_champ(champ)
+        if not 1 <= intervalles <= INTERVALLES_MAX:
+            raise ValueError(f"Le nombre d'intervalles doit être compris entre 1 et {INTERVALLES_MAX}")
+
+        colonnes = await self.obtenir_colonnes()
+        return colonnes.histogramme(champ, intervalles, self.valider_categorie(colonnes, categorie))
+
+    async def valeur_stock(self) -> List[ValeurStockCategorie]:
+        """
+        Stock total et valeur du stock par catégorie.
+
+        Returns:
+            List[ValeurStockCategorie]: Catégories par valeur de stock décroissante
+        """
+        return (await self.obtenir_colonnes()).valeur_stock()
+
+    async def notes_par_categorie(self, categorie: Optional[str] = None) -> List[NotesCategorie]:
+        """
+        Tableau croisé des notes par catégorie.
+
+        Args:
+            categorie: Une catégorie, ou None pour toutes
+
+        Returns:
+            List[NotesCategorie]: Nombre de livres par note et note moyenne
+
+        Raises:
+            ValueError: Si la catégorie est inconnue
+        """
+        colonnes = await self.obtenir_colonnes()
+        return colonnes.notes_par_categorie(self.valider_categorie(colonnes, categorie))
@@ -1,9 +1,21 @@
-from typing import List, Optional
+from dataclasses import astuple
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+from api.interfaces.book_repository_interface import BookRepositoryInterface
 from api.interfaces.book_service_interface import BookServiceInterface
 from api.repositories.book_repository_sql import BookRepositorySQL
 from api.models.book import Book
+from api.models.book_resume import CHAMPS_LIVRE
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.generation_dataset import GenerationDataset
+from api.models.lot_livres import TAILLE_LOT_MAX, LotLivres
+from api.models.pagination import PageLivres, Pagination
+from api.models.resultat_approximatif import (CHAMPS_APPROXIMATIFS, LIMITE_APPROXIMATIVE, LIMITE_APPROXIMATIVE_MAX,
+                                             SEUIL_SIMILARITE, ResultatApproximatif)
+from api.models.resultat_plein_texte import CHAMPS_TRI_PLEIN_TEXTE, LIMITE_PLEIN_TEXTE, LONGUEUR_MAX_REQUETE
 from api.models.prix_moyen_categorie import PrixMoyenCategorie
 from api.models.top_categorie import TopCategorie
+from api.models.statistique_categorie import StatistiqueCategorie
+from api.services.cache import obtenir_cache
 
 
 class BookService(BookServiceInterface):
@@ -12,11 +24,31 @@ class BookService(BookServiceInterface):
     Fait le lien entre les contrôleurs et le repository.
     """
 
-    def __init__(self):
+    def __init__(self, book_repository: Optional[BookRepositoryInterface] = None):
         """
         Initialiser le service avec une instance de BookRepository.
+
+        Les lectures passent par un cache partagé, invalidé quand la version
+        du jeu de données change (fin de crawl).
+
+        Args:
+            book_repository: Repository des livres (BookRepositorySQL par défaut)
+        """
+        self.book_repository = book_repository or BookRepositorySQL()
+        self.cache = obtenir_cache("livres")
+
+    def lire_en_cache(self, cle: Hashable, calculer: Callable[[], Any]) -> Any:
+        """
+        Lire une valeur à travers le cache, en la calculant en cas d'échec.
+
+        Args:
+            cle: Clé de la lecture (méthode et paramètres)
+            calculer: Appel au repository produisant la valeur
+
+        Returns:
+            Any: Valeur cachée ou calculée
         """
-        self.book_repository = BookRepositorySQL()
+        return self.cache.lire(cle, calculer, self.book_repository.obtenir_version_dataset)
 
     def get_all_books(self) -> List[Book]:
         """
@@ -25,7 +57,7 @@ class BookService(BookServiceInterface):
         Returns:
             List[Book]: Liste de tous les livres
         """
-        return self.book_repository.get_all_books()
+        return self.lire_en_cache(("tous",), self.book_repository.get_all_books)
 
     def get_book_by_id(self, book_id: int) -> Optional[Book]:
         """
@@ -40,13 +72,101 @@ class BookService(BookServiceInterface):
         Raises:
             ValueError: Si l'ID est invalide
         """
-        if book_id <= 0:
-            raise ValueError("L'ID du livre doit être un nombre positif")
+        self.valider_id_livre(book_id)
+
+        # Un livre absent est aussi mis en cache (None)
+        return self.lire_en_cache(("livre", book_id), lambda: self.book_repository.get_book_by_id(book_id))
+
+    def get_books_by_ids(self, book_ids: List[int]) -> LotLivres:
+        """
+        Récupérer un lot de livres par leurs IDs.
+
+        Chaque livre partage l'entrée de cache de get_book_by_id ; les IDs
+        absents du cache sont lus ensemble, en une seule requête.
+
+        Args:
+            book_ids: IDs des livres, dans l'ordre voulu
+
+        Returns:
+            LotLivres: Livres trouvés dans l'ordre demandé et IDs absents
+
+        Raises:
+            ValueError: Si le lot est vide, trop grand ou contient un ID invalide
+        """
+        book_ids = self.preparer_lot(book_ids)
+        valeurs = self.cache.lire_plusieurs([("livre", book_id) for book_id in book_ids], self.lire_lot,
+                                            self.book_repository.obtenir_version_dataset)
+        return self.assembler_lot(book_ids, valeurs)
+
+    def lire_lot(self, cles: List[Tuple[str, int]]) -> Dict[Tuple[str, int], Book]:
+        """
+        Lire en une requête les livres des clés absentes du cache.
 
-        return self.book_repository.get_book_by_id(book_id)
+        Args:
+            cles: Clés ("livre", id) absentes du cache
 
+        Returns:
+            Dict[Tuple[str, int], Book]: Livres trouvés par clé
+        """
+        return {("livre", book.id): book for book in self.book_repository.get_books_by_ids([cle[1] for cle in cles])}
 
+    @staticmethod
+    def preparer_lot(book_ids: List[int]) -> List[int]:
+        """
+        Valider un lot d'IDs et retirer les doublons en gardant le premier rang.
 
+        Args:
+            book_ids: IDs demandés
+
+        Returns:
+            List[int]: IDs distincts, dans l'ordre demandé
+
+        Raises:
+            ValueError: Si le lot est vide, dépasse TAILLE_LOT_MAX ou contient un ID invalide
+        """
+        book_ids = list(dict.fromkeys(book_ids))
+        if not book_ids:
+            raise ValueError("Le lot doit contenir au moins un ID de livre")
+        if len(book_ids) > TAILLE_LOT_MAX:
+            raise ValueError(f"Le lot ne peut pas dépasser {TAILLE_LOT_MAX} IDs de livres")
+        for book_id in book_ids:
+            BookService.valider_id_livre(book_id)
+        return book_ids
+
+    @staticmethod
+    def assembler_lot(book_ids: List[int], valeurs: Dict[Hashable, Optional[Book]]) -> LotLivres:
+        """
+        Remettre les livres lus dans l'ordre demandé et relever les IDs absents.
+
+        Args:
+            book_ids: IDs distincts, dans l'ordre demandé
+            valeurs: Livre (ou None) par clé ("livre", id)
+
+        Returns:
+            LotLivres: Livres et IDs absents
+        """
+        lot = LotLivres()
+        for book_id in book_ids:
+            book = valeurs.get(("livre", book_id))
+            if book is None:
+                lot.manquants.append(book_id)
+            else:
+                lot.livres.append(book)
+        return lot
+
+    @staticmethod
+    def valider_id_livre(book_id: int) -> None:
+        """
+        Valider l'ID d'un livre.
+
+        Args:
+            book_id: L'ID du livre
+
+        Raises:
+            ValueError: Si l'ID est invalide
+        """
+        if book_id <= 0:
+            raise ValueError("L'ID du livre doit être un nombre positif")
 
     def find_by_category(self, category: str) -> List[Book]:
         """
@@ -58,16 +178,231 @@ class BookService(BookServiceInterface):
         Returns:
             List[Book]: Liste des livres de cette catégorie
 
+        Raises:
+            ValueError: Si la catégorie est vide
+        """
+        category = self.normaliser_categorie(category)
+        return self.lire_en_cache(("categorie", category), lambda: self.book_repository.find_by_category(category))
+
+    @staticmethod
+    def normaliser_categorie(category: str) -> str:
+        """
+        Valider et normaliser un nom de catégorie.
+
+        Args:
+            category: Le nom de la catégorie
+
+        Returns:
+            str: Nom sans espaces superflus
+
         Raises:
             ValueError: Si la catégorie est vide
         """
         if not category or not category.strip():
             raise ValueError("Le nom de la catégorie ne peut pas être vide")
+        return category.strip()
+
+    def rechercher_livres(self, filtres: FiltresRecherche,
+                          pagination: Optional[Pagination] = None,
+                          champs: Optional[List[str]] = None) -> PageLivres:
+        """
+        Rechercher des livres selon des filtres combinés, exécutés par le repository.
+
+        Args:
+            filtres: Titre, catégorie, prix min/max et note minimum
+            pagination: Tri, limite et curseur (None = tous les livres triés par id)
+            champs: Champs à lire ; None = livres complets (Book), sinon dictionnaires
+
+        Returns:
+            PageLivres: Livres correspondant à tous les filtres et curseur suivant
+
+        Raises:
+            ValueError: Si l'intervalle de prix, la note, la catégorie ou le curseur est invalide
+        """
+        pagination, cle = self.preparer_recherche(filtres, pagination, champs)
+        return self.lire_en_cache(cle, lambda: self.book_repository.rechercher_livres(filtres, pagination, champs))
+
+    @staticmethod
+    def preparer_recherche(filtres: FiltresRecherche, pagination: Optional[Pagination],
+                           champs: Optional[List[str]]) -> Tuple[Pagination, Hashable]:
+        """
+        Valider et normaliser une recherche, et calculer sa clé de cache.
+
+        Args:
+            filtres: Titre, catégorie, prix min/max et note minimum (normalisés sur place)
+            pagination: Tri, limite et curseur
+            champs: Champs demandés
+
+        Returns:
+            Tuple[Pagination, Hashable]: Pagination effective et clé de cache
 
-        # Normaliser le nom de la catégorie
-        category = category.strip()
+        Raises:
+            ValueError: Si l'intervalle de prix, la note, la catégorie ou le curseur est invalide
+        """
+        if filtres.prix_min is not None and filtres.prix_max is not None and filtres.prix_min > filtres.prix_max:
+            raise ValueError("Le prix minimum ne peut pas dépasser le prix maximum")
+
+        if filtres.note_min is not None and not 0 <= filtres.note_min <= 5:
+            raise ValueError("La note minimum doit être comprise entre 0 et 5")
+
+        # Un titre vide ou composé d'espaces ne filtre pas
+        if filtres.titre is not None:
+            filtres.titre = filtres.titre.strip() or None
+
+        if filtres.categorie is not None:
+            filtres.categorie = BookService.normaliser_categorie(filtres.categorie)
+
+        pagination = pagination or Pagination()
+        # Valide le curseur avant d'interroger le repository
+        pagination.position()
+
+        cle = ("recherche", astuple(filtres),
+               (pagination.tri, pagination.descendant, pagination.limite, pagination.curseur),
+               tuple(champs) if champs is not None else None)
+        return pagination, cle
+
+    def exporter_livres(self, filtres: FiltresRecherche, champs: Optional[List[str]],
+                        taille_lot: int) -> Iterator[Dict[str, Any]]:
+        """
+        Exporter les livres filtrés en flux, sans passer par le cache.
+
+        Les filtres sont validés immédiatement ; les livres ne sont lus qu'au
+        parcours du flux, par lots.
+
+        Args:
+            filtres: Titre, catégorie, prix min/max et note minimum
+            champs: Champs à exporter ; None = tous les champs de Book
+            taille_lot: Nombre de lignes lues à la fois
+
+        Returns:
+            Iterator[Dict[str, Any]]: Livres, un dictionnaire des champs par ligne
+
+        Raises:
+            ValueError: Si l'intervalle de prix, la note ou la catégorie est invalide
+        """
+        self.preparer_recherche(filtres, None, champs)
+        return self.book_repository.exporter_livres(filtres, champs or CHAMPS_LIVRE, taille_lot)
+
+    def recherche_plein_texte(self, texte: str, limite: int = LIMITE_PLEIN_TEXTE,
+                              curseur: Optional[str] = None) -> PageLivres:
+        """
+        Rechercher des livres en plein texte, classés par pertinence.
 
-        return self.book_repository.find_by_category(category)
+        Args:
+            texte: Requête saisie par l'utilisateur
+            limite: Nombre maximum de résultats par page
+            curseur: Curseur renvoyé par la page précédente
+
+        Returns:
+            PageLivres: ResultatPleinTexte classés par pertinence et curseur suivant
+
+        Raises:
+            ValueError: Si la requête, la limite ou le curseur est invalide
+        """
+        texte, pagination, cle = self.preparer_plein_texte(texte, limite, curseur)
+        return self.lire_en_cache(cle, lambda: self.book_repository.recherche_plein_texte(texte, pagination))
+
+    @staticmethod
+    def preparer_plein_texte(texte: str, limite: int,
+                             curseur: Optional[str]) -> Tuple[str, Pagination, Hashable]:
+        """
+        Valider une recherche plein texte et calculer sa clé de cache.
+
+        Args:
+            texte: Requête saisie par l'utilisateur
+            limite: Nombre maximum de résultats par page
+            curseur: Curseur renvoyé par la page précédente
+
+        Returns:
+            Tuple[str, Pagination, Hashable]: Requête normalisée, pagination et clé de cache
+
+        Raises:
+            ValueError: Si la requête, la limite ou le curseur est invalide
+        """
+        texte = (texte or "").strip()
+        if not texte:
+            raise ValueError("La requête de recherche ne peut pas être vide")
+        if len(texte) > LONGUEUR_MAX_REQUETE:
+            raise ValueError(f"La requête de recherche est limitée à {LONGUEUR_MAX_REQUETE} caractères")
+
+        pagination = Pagination.depuis_parametres("-pertinence", limite, curseur, champs_tri=CHAMPS_TRI_PLEIN_TEXTE)
+        pagination.position()
+        return texte, pagination, ("plein_texte", texte, pagination.limite, pagination.curseur)
+
+    def recherche_approximative(self, texte: str, champ: str = "titre",
+                                seuil: float = SEUIL_SIMILARITE,
+                                limite: int = LIMITE_APPROXIMATIVE) -> List[ResultatApproximatif]:
+        """
+        Rechercher des livres dont le titre ou la catégorie ressemble au texte (trigrammes).
+
+        Args:
+            texte: Texte saisi, éventuellement avec des fautes de frappe
+            champ: Champ comparé ("titre" ou "categorie")
+            seuil: Similarité minimum, entre 0 et 1
+            limite: Nombre maximum de résultats
+
+        Returns:
+            List[ResultatApproximatif]: Livres classés par similarité décroissante
+
+        Raises:
+            ValueError: Si le texte, le champ, le seuil ou la limite est invalide
+        """
+        texte, attribut, cle = self.preparer_approximative(texte, champ, seuil, limite)
+        return self.lire_en_cache(
+            cle, lambda: self.book_repository.recherche_approximative(texte, attribut, seuil, limite)
+        )
+
+    @staticmethod
+    def preparer_approximative(texte: str, champ: str, seuil: float,
+                               limite: int) -> Tuple[str, str, Hashable]:
+        """
+        Valider une recherche approximative et calculer sa clé de cache.
+
+        Args:
+            texte: Texte saisi
+            champ: Champ comparé ("titre" ou "categorie")
+            seuil: Similarité minimum
+            limite: Nombre maximum de résultats
+
+        Returns:
+            Tuple[str, str, Hashable]: Texte normalisé, attribut de Book et clé de cache
+
+        Raises:
+            ValueError: Si le texte, le champ, le seuil ou la limite est invalide
+        """
+        texte = (texte or "").strip()
+        if not texte:
+            raise ValueError("Le texte recherché ne peut pas être vide")
+        if len(texte) > LONGUEUR_MAX_REQUETE:
+            raise ValueError(f"Le texte recherché est limité à {LONGUEUR_MAX_REQUETE} caractères")
+        if champ not in CHAMPS_APPROXIMATIFS:
+            raise ValueError(f"Champ inconnu: {champ} (attendu: {', '.join(CHAMPS_APPROXIMATIFS)})")
+        if not 0 < seuil <= 1:
+            raise ValueError("Le seuil de similarité doit être compris entre 0 (exclu) et 1")
+        if not 1 <= limite <= LIMITE_APPROXIMATIVE_MAX:
+            raise ValueError(f"La limite doit être comprise entre 1 et {LIMITE_APPROXIMATIVE_MAX}")
+
+        attribut = CHAMPS_APPROXIMATIFS[champ]
+        return texte, attribut, ("approximative", texte, attribut, seuil, limite)
+
+    def obtenir_generation_dataset(self) -> Optional[GenerationDataset]:
+        """
+        Récupérer la génération du jeu de données, lue directement (sans cache) :
+        c'est elle qui invalide les caches et les réponses conditionnelles.
+
+        Returns:
+            Optional[GenerationDataset]: Génération courante, None si elle ne peut pas être lue
+        """
+        return self.book_repository.obtenir_generation_dataset()
+
+    def obtenir_statistiques_categories(self) -> List[StatistiqueCategorie]:
+        """
+        Récupérer les statistiques par catégorie, calcul partagé par les deux agrégats.
+
+        Returns:
+            List[StatistiqueCategorie]: Statistiques classées par rang
+        """
+        return self.lire_en_cache(("statistiques_categories",), self.book_repository.obtenir_statistiques_categories)
 
     def calculer_prix_moyen_par_categorie(self) -> List[PrixMoyenCategorie]:
         """
@@ -76,32 +411,28 @@ class BookService(BookServiceInterface):
         Returns:
             List[PrixMoyenCategorie]: Liste des prix moyens par catégorie
         """
-        tous_les_livres = self.book_repository.get_all_books()
-
-        # Dictionnaire pour regrouper par catégorie
-        categories_dict = {}
-
-        for livre in tous_les_livres:
-            if livre.categorie and livre.prix_numerique > 0:
-                if livre.categorie not in categories_dict:
-                    categories_dict[livre.categorie] = {
-                        'total_prix': 0.0,
-                        'nombre_livres': 0
-                    }
-
-                categories_dict[livre.categorie]['total_prix'] += livre.prix_numerique
-                categories_dict[livre.categorie]['nombre_livres'] += 1
-
-        # Calculer les prix moyens
-        resultats = []
-        for categorie, data in categories_dict.items():
-            if data['nombre_livres'] > 0:
-                prix_moyen = round(data['total_prix'] / data['nombre_livres'], 2)
-                resultats.append(PrixMoyenCategorie(
-                    categorie=categorie,
-                    prix_moyen=prix_moyen,
-                    nombre_livres=data['nombre_livres']
-                ))
+        return self.prix_moyen_depuis_statistiques(self.obtenir_statistiques_categories())
+
+    @staticmethod
+    def prix_moyen_depuis_statistiques(statistiques: List[StatistiqueCategorie]) -> List[PrixMoyenCategorie]:
+        """
+        Extraire les prix moyens par catégorie des statistiques.
+
+        Args:
+            statistiques: Statistiques par catégorie
+
+        Returns:
+            List[PrixMoyenCategorie]: Prix moyens triés par prix décroissant
+        """
+        resultats = [
+            PrixMoyenCategorie(
+                categorie=statistique.categorie,
+                prix_moyen=statistique.prix_moyen,
+                nombre_livres=statistique.nombre_livres_prix
+            )
+            for statistique in statistiques
+            if statistique.nombre_livres_prix > 0
+        ]
 
         # Trier par prix moyen décroissant
         resultats.sort(key=lambda x: x.prix_moyen, reverse=True)
@@ -114,33 +445,25 @@ class BookService(BookServiceInterface):
         Returns:
             List[TopCategorie]: Liste des catégories classées par nombre de livres décroissant
         """
-        tous_les_livres = self.book_repository.get_all_books()
+        return self.top_depuis_statistiques(self.obtenir_statistiques_categories())
 
-        # Dictionnaire pour compter les livres par catégorie
-        categories_count = {}
-
-        for livre in tous_les_livres:
-            if livre.categorie:
-                if livre.categorie not in categories_count:
-                    categories_count[livre.categorie] = 0
-                categories_count[livre.categorie] += 1
-
-        # Trier par nombre de livres décroissant
-        categories_triees = sorted(categories_count.items(), key=lambda x: x[1], reverse=True)
-
-        # Calculer le total pour les pourcentages
-        total_livres = sum(categories_count.values())
-
-        # Créer le classement avec rang
-        resultats = []
-        for rang, (categorie, nombre_livres) in enumerate(categories_triees, 1):
-            pourcentage = round((nombre_livres / total_livres) * 100, 2) if total_livres > 0 else 0.0
+    @staticmethod
+    def top_depuis_statistiques(statistiques: List[StatistiqueCategorie]) -> List[TopCategorie]:
+        """
+        Extraire le classement des catégories par nombre de livres des statistiques.
 
-            resultats.append(TopCategorie(
-                rang=rang,
-                categorie=categorie,
-                nombre_livres=nombre_livres,
-                pourcentage_total=pourcentage
-            ))
+        Args:
+            statistiques: Statistiques par catégorie, classées par rang
 
-        return resultats
+        Returns:
+            List[TopCategorie]: Classement par nombre de livres décroissant
+        """
+        return [
+            TopCategorie(
+                rang=statistique.rang,
+                categorie=statistique.categorie,
+                nombre_livres=statistique.nombre_livres,
+                pourcentage_total=statistique.pourcentage_total
+            )
+            for statistique in statistiques
+        ]
@@ -0,0 +1,238 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from api.interfaces.book_service_async_interface import BookServiceAsyncInterface
+from api.repositories.book_repository_async import BookRepositoryAsync
+from api.models.book import Book
+from api.models.book_resume import CHAMPS_LIVRE
+from api.models.filtres_recherche import FiltresRecherche
+from api.models.generation_dataset import GenerationDataset
+from api.models.lot_livres import LotLivres
+from api.models.pagination import PageLivres, Pagination
+from api.models.resultat_approximatif import LIMITE_APPROXIMATIVE, SEUIL_SIMILARITE, ResultatApproximatif
+from api.models.resultat_plein_texte import LIMITE_PLEIN_TEXTE
+from api.models.prix_moyen_categorie import PrixMoyenCategorie
+from api.models.top_categorie import TopCategorie
+from api.models.statistique_categorie import StatistiqueCategorie
+from api.services.book_service import BookService
+from api.services.cache import obtenir_cache
+
+
+class BookServiceAsync(BookServiceAsyncInterface):
+    """
+    Service asynchrone pour les livres : même logique métier que BookService,
+    sur le repository asynchrone, sans passer par le pool de threads.
+    """
+
+    def __init__(self):
+        """
+        Initialiser le service avec une instance de BookRepositoryAsync.
+        """
+        self.book_repository = BookRepositoryAsync()
+        self.cache = obtenir_cache("livres")
+
+    async def lire_en_cache(self, cle: Hashable, calculer: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Lire une valeur à travers le cache, en la calculant en cas d'échec.
+
+        Args:
+            cle: Clé de la lecture (méthode et paramètres)
+            calculer: Coroutine du repository produisant la valeur
+
+        Returns:
+            Any: Valeur cachée ou calculée
+        """
+        return await self.cache.lire_async(cle, calculer, self.book_repository.obtenir_version_dataset)
+
+    async def get_all_books(self) -> List[Book]:
+        """
+        Récupérer tous les livres avec validation métier.
+
+        Returns:
+            List[Book]: Liste de tous les livres
+        """
+        return await self.lire_en_cache(("tous",), self.book_repository.get_all_books)
+
+    async def get_book_by_id(self, book_id: int) -> Optional[Book]:
+        """
+        Récupérer un livre par son ID avec validation.
+
+        Args:
+            book_id: L'ID du livre à récupérer
+
+        Returns:
+            Optional[Book]: Le livre trouvé ou None
+
+        Raises:
+            ValueError: Si l'ID est invalide
+        """
+        BookService.valider_id_livre(book_id)
+        return await self.lire_en_cache(("livre", book_id), lambda: self.book_repository.get_book_by_id(book_id))
+
+    async def get_books_by_ids(self, book_ids: List[int]) -> LotLivres:
+        """
+        Récupérer un lot de livres par leurs IDs, les absents du cache en une requête.
+
+        Args:
+            book_ids: IDs des livres, dans l'ordre voulu
+
+        Returns:
+            LotLivres: Livres trouvés dans l'ordre demandé et IDs absents
+
+        Raises:
+            ValueError: Si le lot est vide, trop grand ou contient un ID invalide
+        """
+        book_ids = BookService.preparer_lot(book_ids)
+        valeurs = await self.cache.lire_plusieurs_async([("livre", book_id) for book_id in book_ids], self.lire_lot,
+                                                        self.book_repository.obtenir_version_dataset)
+        return BookService.assembler_lot(book_ids, valeurs)
+
+    async def lire_lot(self, cles: List[Tuple[str, int]]) -> Dict[Tuple[str, int], Book]:
+        """
+        Lire en une requête les livres des clés absentes du cache.
+
+        Args:
+            cles: Clés ("livre", id) absentes du cache
+
+        Returns:
+            Dict[Tuple[str, int], Book]: Livres trouvés par clé
+        """
+        livres = await self.book_repository.get_books_by_ids([cle[1] for cle in cles])
+        return {("livre", book.id): book for book in livres}
+
+    async def find_by_category(self, category: str) -> List[Book]:
+        """
+        Rechercher des livres par catégorie avec normalisation.
+
+        Args:
+            category: Le nom de la catégorie à rechercher
+
+        Returns:
+            List[Book]: Liste des livres de cette catégorie
+
+        Raises:
+            ValueError: Si la catégorie est vide
+        """
+        category = BookService.normaliser_categorie(category)
+        return await self.lire_en_cache(("categorie", category),
+                                        lambda: self.book_repository.find_by_category(category))
+
+    async def rechercher_livres(self, filtres: FiltresRecherche,
+                                pagination: Optional[Pagination] = None,
+                                champs: Optional[List[str]] = None) -> PageLivres:
+        """
+        Rechercher des livres selon des filtres combinés, exécutés par le repository.
+
+        Args:
+            filtres: Titre, catégorie, prix min/max et note minimum
+            pagination: Tri, limite et curseur (None = tous les livres triés par id)
+            champs: Champs à lire ; None = livres complets (Book), sinon dictionnaires
+
+        Returns:
+            PageLivres: Livres correspondant à tous les filtres et curseur suivant
+
+        Raises:
+            ValueError: Si l'intervalle de prix, la note, la catégorie ou le curseur est invalide
+        """
+        pagination, cle = BookService.preparer_recherche(filtres, pagination, champs)
+        return await self.lire_en_cache(cle, lambda: self.book_repository.rechercher_livres(filtres, pagination, champs))
+
+    def exporter_livres(self, filtres: FiltresRecherche, champs: Optional[List[str]],
+                        taille_lot: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Exporter les livres filtrés en flux, sans passer par le cache.
+
+        Les filtres sont validés immédiatement ; les livres ne sont lus qu'au
+        parcours du flux, par lots.
+
+        Args:
+            filtres: Titre, catégorie, prix min/max et note minimum
+            champs: Champs à exporter ; None = tous les champs de Book
+            taille_lot: Nombre de lignes lues à la fois
+
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Livres, un dictionnaire des champs par ligne
+
+        Raises:
+            ValueError: Si l'intervalle de prix, la note ou la catégorie est invalide
+        """
+        BookService.preparer_recherche(filtres, None, champs)
+        return self.book_repository.exporter_livres(filtres, champs or CHAMPS_LIVRE, taille_lot)
+
+    async def recherche_plein_texte(self, texte: str, limite: int = LIMITE_PLEIN_TEXTE,
+                                    curseur: Optional[str] = None) -> PageLivres:
+        """
+        Rechercher des livres en plein texte, classés par pertinence.
+
+        Args:
+            texte: Requête saisie par l'utilisateur
+            limite: Nombre maximum de résultats par page
+            curseur: Curseur renvoyé par la page précédente
+
+        Returns:
+            PageLivres: ResultatPleinTexte classés par pertinence et curseur suivant
+
+        Raises:
+            ValueError: Si la requête, la limite ou le curseur est invalide
+        """
+        texte, pagination, cle = BookService.preparer_plein_texte(texte, limite, curseur)
+        return await self.lire_en_cache(cle, lambda: self.book_repository.recherche_plein_texte(texte, pagination))
+
+    async def recherche_approximative(self, texte: str, champ: str = "titre",
+                                      seuil: float = SEUIL_SIMILARITE,
+                                      limite: int = LIMITE_APPROXIMATIVE) -> List[ResultatApproximatif]:
+        """
+        Rechercher des livres dont le titre ou la catégorie ressemble au texte (trigrammes).
+
+        Args:
+            texte: Texte saisi, éventuellement avec des fautes de frappe
+            champ: Champ comparé ("titre" ou "categorie")
+            seuil: Similarité minimum, entre 0 et 1
+            limite: Nombre maximum de résultats
+
+        Returns:
+            List[ResultatApproximatif]: Livres classés par similarité décroissante
+
+        Raises:
+            ValueError: Si le texte, le champ, le seuil ou la limite est invalide
+        """
+        texte, attribut, cle = BookService.preparer_approximative(texte, champ, seuil, limite)
+        return await self.lire_en_cache(
+            cle, lambda: self.book_repository.recherche_approximative(texte, attribut, seuil, limite)
+        )
+
+    async def obtenir_generation_dataset(self) -> Optional[GenerationDataset]:
+        """
+        Récupérer la génération du jeu de données, lue directement (sans cache) :
+        c'est elle qui invalide les caches et les réponses conditionnelles.
+
+        Returns:
+            Optional[GenerationDataset]: Génération courante, None si elle ne peut pas être lue
+        """
+        return await self.book_repository.obtenir_generation_dataset()
+
+    async def obtenir_statistiques_categories(self) -> List[StatistiqueCategorie]:
+        """
+        Récupérer les statistiques par catégorie, calcul partagé par les deux agrégats.
+
+        Returns:
+            List[StatistiqueCategorie]: Statistiques classées par rang
+        """
+        return await self.lire_en_cache(("statistiques_categories",),
+                                        self.book_repository.obtenir_statistiques_categories)
+
+    async def calculer_prix_moyen_par_categorie(self) -> List[PrixMoyenCategorie]:
+        """
+        Calculer le prix moyen des livres par catégorie.
+
+        Returns:
+            List[PrixMoyenCategorie]: Liste des prix moyens par catégorie
+        """
+        return BookService.prix_moyen_depuis_statistiques(await self.obtenir_statistiques_categories())
+
+    async def obtenir_top_categories_par_nombre_livres(self) -> List[TopCategorie]:
+        """
+        Obtenir le classement des catégories par nombre de livres.
+
+        Returns:
+            List[TopCategorie]: Liste des catégories classées par nombre de livres décroissant
+        """
+        return BookService.top_depuis_statistiques(await self.obtenir_statistiques_categories())
@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de lecture des services, invalide par version du jeu de donnees.
+
+Les donnees ne changent qu'a la fin d'un crawl : le pipeline PostgreSQL
+incremente la version du jeu de donnees, et le cache est vide des que la
+version lue differe de celle des entrees. Les entrees sont evincees par LRU,
+par TTL et au-dela d'une taille memoire estimee.
+"""
+import dataclasses
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+# Marqueur d'absence : None est une valeur cachable (cache negatif)
+ABSENT = object()
+
+TAILLE_MAX_OCTETS = int(os.environ.get("BOOKS_CACHE_TAILLE_MAX_MO", "64")) * 1024 * 1024
+ENTREES_MAX = int(os.environ.get("BOOKS_CACHE_ENTREES_MAX", "1024"))
+TTL_SECONDES = float(os.environ.get("BOOKS_CACHE_TTL", "300"))
+# Intervalle minimum entre deux lectures de la version du jeu de donnees
+INTERVALLE_VERSION_SECONDES = float(os.environ.get("BOOKS_CACHE_INTERVALLE_VERSION", "2"))
+
+# Elements mesures par conteneur pour estimer la taille d'une valeur
+TAILLE_ECHANTILLON = 8
+TYPES_SIMPLES = (str, bytes, bytearray, int, float, bool)
+
+
+def estimer_taille(valeur: Any, profondeur: int = 3) -> int:
+    """
+    Estimer la taille memoire d'une valeur sans la parcourir entierement.
+
+    Un conteneur compte pour sa propre taille plus la taille moyenne d'un
+    echantillon de ses elements multipliee par leur nombre : le cout reste
+    constant meme pour le catalogue complet, sur le chemin d'un echec de cache.
+
+    Args:
+        valeur: Valeur a mettre en cache
+        profondeur: Niveaux de conteneurs et d'objets encore explores
+
+    Returns:
+        int: Taille estimee en octets
+    """
+    taille = sys.getsizeof(valeur, 0)
+    if profondeur <= 0 or valeur is None or isinstance(valeur, TYPES_SIMPLES):
+        return taille
+
+    if isinstance(valeur, dict):
+        echantillon = list(itertools.islice(valeur.items(), TAILLE_ECHANTILLON))
+        if not echantillon:
+            return taille
+        moyenne = sum(estimer_taille(cle, profondeur - 1) + estimer_taille(element, profondeur - 1)
+                      for cle, element in echantillon) / len(echantillon)
+        return taille + int(moyenne * len(valeur))
+
+    if isinstance(valeur, (list, tuple, set, frozenset)):
+        echantillon = list(itertools.islice(valeur, TAILLE_ECHANTILLON))
+        if not echantillon:
+            return taille
+        moyenne = sum(estimer_taille(element, profondeur - 1) for element in echantillon) / len(echantillon)
+        return taille + int(moyenne * len(valeur))
+
+    # Objet (dataclass, Book a slots) : ses attributs, en nombre fixe
+    if dataclasses.is_dataclass(valeur):
+        attributs = [getattr(valeur, champ.name, None) for champ in dataclasses.fields(valeur)]
+    else:
+        attributs = list(getattr(valeur, "__dict__", {}).values())
+    return taille + sum(estimer_taille(attribut, profondeur - 1) for attribut in attributs)
+
+
+class CacheLecture:
+    """
+    Cache LRU/TTL borne en memoire, vide a chaque changement de version.
+    """
+
+    def __init__(self, nom: str, taille_max_octets: int = TAILLE_MAX_OCTETS,
+                 entrees_max: int = ENTREES_MAX, ttl: float = TTL_SECONDES,
+                 intervalle_version: float = INTERVALLE_VERSION_SECONDES):
+        """
+        Initialiser le cache.
+
+        Args:
+            nom: Nom du cache (expose dans /metrics)
+            taille_max_octets: Taille memoire estimee maximale
+            entrees_max: Nombre maximal d'entrees
+            ttl: Duree de vie d'une entree en secondes
+            intervalle_version: Intervalle minimum entre deux lectures de version
+        """
+        self.nom = nom
+        self.taille_max_octets = taille_max_octets
+        self.entrees_max = entrees_max
+        self.ttl = ttl
+        self.intervalle_version = intervalle_version
+
+        self.entrees: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.taille_octets = 0
+        self.version: Optional[str] = None
+        self.version_lue_le = 0.0
+        self.verrou = threading.Lock()
+
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def synchroniser_version(self, lire_version: Callable[[], Optional[str]]) -> None:
+        """
+        Relire la version du jeu de donnees si l'intervalle est ecoule, et vider le cache si elle a change.
+
+        Args:
+            lire_version: Fonction retournant la version courante (None si illisible)
+        """
+        if self.version_a_relire():
+            self.appliquer_version(lire_version())
+
+    def version_a_relire(self) -> bool:
+        """
+        Indiquer si l'intervalle minimum depuis la derniere lecture de version est ecoule.
+
+        Returns:
+            bool: True si la version doit etre relue
+        """
+        return time.monotonic() - self.version_lue_le >= self.intervalle_version
+
+    def appliquer_version(self, version: Optional[str]) -> None:
+        """
+        Enregistrer la version lue et vider le cache si elle a change.
+
+        Args:
+            version: Version courante du jeu de donnees (None si illisible)
+        """
+        with self.verrou:
+            self.version_lue_le = time.monotonic()
+            if version != self.version or version is None:
+                if self.entrees:
+                    self.invalidations += 1
+                self.entrees.clear()
+                self.taille_octets = 0
+                self.version = version
+
+    def obtenir(self, cle: Hashable) -> Any:
+        """
+        Lire une entree du cache.
+
+        Args:
+            cle: Cle de l'entree
+
+        Returns:
+            Any: Valeur cachee (eventuellement None), ou ABSENT
+        """
+        with self.verrou:
+            entree = self.entrees.get(cle)
+            if entree is None:
+                self.echecs += 1
+                return ABSENT
+
+            valeur, expire_le, taille = entree
+            if expire_le <= time.monotonic():
+                del self.entrees[cle]
+                self.taille_octets -= taille
+                self.echecs += 1
+                return ABSENT
+
+            self.entrees.move_to_end(cle)
+            self.succes += 1
+            return valeur
+
+    def enregistrer(self, cle: Hashable, valeur: Any, version: Optional[str]) -> None:
+        """
+        Ajouter une entree en evincant les moins recemment utilisees si besoin.
+
+        Rien n'est enregistre tant que la version du jeu de donnees est inconnue,
+        ni si elle a change depuis le debut du calcul : la valeur viendrait de
+        l'ancien jeu et survivrait au vidage du cache.
+
+        Args:
+            cle: Cle de l'entree
+            valeur: Valeur a cacher (None = resultat negatif)
+            version: Version du cache lue avant le calcul de la valeur
+        """
+        taille = estimer_taille(valeur)
+        if version is None or taille > self.taille_max_octets:
+            return
+
+        with self.verrou:
+            if version != self.version:
+                return
+
+            ancienne = self.entrees.pop(cle, None)
+            if ancienne is not None:
+                self.taille_octets -= ancienne[2]
+
+            self.entrees[cle] = (valeur, time.monotonic() + self.ttl, taille)
+            self.taille_octets += taille
+
+            while self.entrees and (len(self.entrees) > self.entrees_max
+                                    or self.taille_octets > self.taille_max_octets):
+                _, (_, _, taille_evincee) = self.entrees.popitem(last=False)
+                self.taille_octets -= taille_evincee
+                self.evictions += 1
+
+    def lire(self, cle: Hashable, calculer: Callable[[], Any],
+             lire_version: Callable[[], Optional[str]]) -> Any:
+        """
+        Lecture a travers le cache : calculer et enregistrer la valeur en cas d'echec.
+
+        Args:
+            cle: Cle de l'entree
+            calculer: Fonction calculant la valeur (appel au repository)
+            lire_version: Fonction retournant la version du jeu de donnees
+
+        Returns:
+            Any: Valeur cachee ou calculee
+        """
+        self.synchroniser_version(lire_version)
+        version = self.version
+        valeur = self.obtenir(cle)
+        if valeur is ABSENT:
+            valeur = calculer()
+            self.enregistrer(cle, valeur, version)
+        return valeur
+
+    async def lire_async(self, cle: Hashable, calculer: Callable[[], Awaitable[Any]],
+                         lire_version: Callable[[], Awaitable[Optional[str]]]) -> Any:
+        """
+        Lecture asynchrone a travers le cache (repository asynchrone).
+
+        Args:
+            cle: Cle de l'entree
+            calculer: Coroutine calculant la valeur
+            lire_version: Coroutine retournant la version du jeu de donnees
+
+        Returns:
+            Any: Valeur cachee ou calculee
+        """
+        if self.version_a_relire():
+            self.appliquer_version(await lire_version())
+        version = self.version
+        valeur = self.obtenir(cle)
+        if valeur is ABSENT:
+            valeur = await calculer()
+            self.enregistrer(cle, valeur, version)
+        return valeur
+
+    def lire_plusieurs(self, cles: List[Hashable], calculer: Callable[[List[Hashable]], Dict[Hashable, Any]],
+                       lire_version: Callable[[], Optional[str]]) -> Dict[Hashable, Any]:
+        """
+        Lecture groupee a travers le cache : une seule lecture pour toutes les cles absentes.
+
+        Args:
+            cles: Cles des entrees
+            calculer: Fonction calculant les valeurs des cles absentes (une cle
+                sans valeur retournee est cachee a None)
+            lire_version: Fonction retournant la version du jeu de donnees
+
+        Returns:
+            Dict[Hashable, Any]: Valeur de chaque cle
+        """
+        self.synchroniser_version(lire_version)
+        version = self.version
+        valeurs, absentes = self.obtenir_plusieurs(cles)
+        if absentes:
+            self.enregistrer_plusieurs(absentes, calculer(absentes), valeurs, version)
+        return valeurs
+
+    async def lire_plusieurs_async(self, cles: List[Hashable],
+                                   calculer: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+                                   lire_version: Callable[[], Awaitable[Optional[str]]]) -> Dict[Hashable, Any]:
+        """
+        Lecture groupee asynchrone a travers le cache (repository asynchrone).
+
+        Args:
+            cles: Cles des entrees
+            calculer: Coroutine calculant les valeurs des cles absentes
+            lire_version: Coroutine retournant la version du jeu de donnees
+
+        Returns:
+            Dict[Hashable, Any]: Valeur de chaque cle
+        """
+        if self.version_a_relire():
+            self.appliquer_version(await lire_version())
+        version = self.version
+        valeurs, absentes = self.obtenir_plusieurs(cles)
+        if absentes:
+            self.enregistrer_plusieurs(absentes, await calculer(absentes), valeurs, version)
+        return valeurs
+
+    def obtenir_plusieurs(self, cles: List[Hashable]) -> tuple:
+        """
+        Lire plusieurs entrees du cache.
+
+        Args:
+            cles: Cles des entrees
+
+        Returns:
+            tuple: (valeurs trouvees par cle, cles absentes)
+        """
+        valeurs = {}
+        absentes = []
+        for cle in cles:
+            valeur = self.obtenir(cle)
+            if valeur is ABSENT:
+                absentes.append(cle)
+            else:
+                valeurs[cle] = valeur
+        return valeurs, absentes
+
+    def enregistrer_plusieurs(self, cles: List[Hashable], calculees: Dict[Hashable, Any],
+                              valeurs: Dict[Hashable, Any], version: Optional[str]) -> None:
+        """
+        Enregistrer les valeurs calculees des cles absentes (None si non calculee).
+
+        Args:
+            cles: Cles absentes du cache
+            calculees: Valeurs calculees par cle
+            valeurs: Valeurs a completer
+            version: Version du cache lue avant le calcul des valeurs
+        """
+        for cle in cles:
+            valeur = calculees.get(cle)
+            self.enregistrer(cle, valeur, version)
+            valeurs[cle] = valeur
+
+    def statistiques(self) -> Dict[str, Any]:
+        """
+        Compteurs du cache.
+
+        Returns:
+            Dict[str, Any]: Succes, echecs, taux de succes, evictions, taille
+        """
+        with self.verrou:
+            total = self.succes + self.echecs
+            return {
+                "version_dataset": self.version,
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "taux_succes": round(self.succes / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entrees": len(self.entrees),
+                "taille_octets": self.taille_octets,
+            }
+
+
+# Caches partages par toutes les instances de services du processus
+_caches: Dict[str, CacheLecture] = {}
+_verrou_caches = threading.Lock()
+
+
+def obtenir_cache(nom: str) -> CacheLecture:
+    """
+    Obtenir le cache partage d'un nom donne, cree au premier appel.
+
+    Args:
+        nom: Nom du cache
+
+    Returns:
+        CacheLecture: Cache partage
+    """
+    with _verrou_caches:
+        if nom not in _caches:
+            _caches[nom] = CacheLecture(nom)
+        return _caches[nom]
+
+
+def appliquer_version_caches(version: str) -> None:
+    """
+    Appliquer une version du jeu de donnees lue ailleurs a tous les caches du processus.
+
+    Les reponses conditionnelles lisent la version avant la route : les caches
+    sont alignes sur elle, pour qu'une reponse marquee d'une nouvelle version
+    ne soit jamais calculee depuis des entrees de l'ancienne.
+
+    Args:
+        version: Version courante du jeu de donnees
+    """
+    with _verrou_caches:
+        caches = list(_caches.values())
+    for cache in caches:
+        if cache.version != version:
+            cache.appliquer_version(version)
+
+
+def statistiques_caches() -> Dict[str, Dict[str, Any]]:
+    """
+    Compteurs de tous les caches du processus.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Statistiques par nom de cache
+    """
+    with _verrou_caches:
+        caches = list(_caches.values())
+    return {cache.nom: cache.statistiques() for cache in caches}
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Stockage en colonnes NumPy des champs numériques des livres, pour les analyses.
+
+Les colonnes (prix, note, stock, nombre d'avis) et le code de catégorie de
+chaque livre sont chargés une fois par version du jeu de données. Chaque
+colonne est aussi gardée triée par (catégorie, valeur) : les livres d'une
+catégorie forment un segment contigu, dont le minimum, le maximum et les
+percentiles se lisent par indexation, pour toutes les catégories à la fois.
+Une analyse ne parcourt donc jamais la base, et le plus souvent ne travaille
+que sur un élément par catégorie.
+"""
+from array import array
+from functools import cached_property
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from api.models.distribution_categorie import CHAMPS_ANALYTIQUES, DistributionCategorie
+from api.models.histogramme import Histogramme
+from api.models.notes_categorie import NOTES, NotesCategorie
+from api.models.valeur_stock_categorie import ValeurStockCategorie
+
+# Champs de Book lus pour construire les colonnes
+CHAMPS_COLONNES = ["categorie", *CHAMPS_ANALYTIQUES.values()]
+
+
+class ConstructeurColonnes:
+    """
+    Accumule les livres ligne par ligne dans des tableaux compacts, puis produit les colonnes.
+    """
+
+    def __init__(self):
+        """
+        Initialiser des colonnes vides.
+        """
+        self.codes_categories: Dict[str, int] = {}
+        self.codes = array("i")
+        self.valeurs = {attribut: array("d") for attribut in CHAMPS_ANALYTIQUES.values()}
+
+    def ajouter(self, ligne: Dict[str, Any]) -> None:
+        """
+        Ajouter un livre.
+
+        Args:
+            ligne: Champs CHAMPS_COLONNES du livre (valeur absente = 0)
+        """
+        categorie = ligne.get("categorie") or ""
+        code = self.codes_categories.setdefault(categorie, len(self.codes_categories))
+        self.codes.append(code)
+        for attribut, colonne in self.valeurs.items():
+            colonne.append(ligne.get(attribut) or 0)
+
+    def ajouter_tous(self, lignes: Iterable[Dict[str, Any]]) -> "ConstructeurColonnes":
+        """
+        Ajouter une suite de livres.
+
+        Args:
+            lignes: Livres à ajouter
+
+        Returns:
+            ConstructeurColonnes: Le constructeur, pour enchaîner terminer()
+        """
+        for ligne in lignes:
+            self.ajouter(ligne)
+        return self
+
+    def terminer(self, version: Optional[str]) -> "ColonnesLivres":
+        """
+        Produire les colonnes NumPy, catégories numérotées par ordre alphabétique.
+
+        Args:
+            version: Version du jeu de données lue
+
+        Returns:
+            ColonnesLivres: Colonnes prêtes pour les analyses
+        """
+        categories = sorted(self.codes_categories)
+        # Code d'insertion -> code alphabétique
+        renumerotation = np.empty(len(categories), dtype=np.int32)
+        for code_final, categorie in enumerate(categories):
+            renumerotation[self.codes_categories[categorie]] = code_final
+
+        codes = renumerotation[np.frombuffer(self.codes, dtype=np.int32)] if len(self.codes) else \
+            np.empty(0, dtype=np.int32)
+        valeurs = {
+            champ: np.frombuffer(self.valeurs[attribut], dtype=np.float64).copy()
+            for champ, attribut in CHAMPS_ANALYTIQUES.items()
+        }
+        return ColonnesLivres(version, categories, codes, valeurs)
+
+
+class ColonnesLivres:
+    """
+    Colonnes NumPy des livres d'une version du jeu de données, et analyses vectorisées par catégorie.
+    """
+
+    def __init__(self, version: Optional[str], categories: List[str], codes: np.ndarray,
+                 valeurs: Dict[str, np.ndarray]):
+        """
+        Indexer les colonnes par catégorie.
+
+        Args:
+            version: Version du jeu de données des colonnes
+            categories: Noms des catégories, dans l'ordre des codes
+            codes: Code de catégorie de chaque livre
+            valeurs: Colonne de chaque champ analytique, dans l'ordre des livres
+        """
+        self.version = version
+        self.categories = categories
+        self.codes_par_nom = {categorie.lower(): code for code, categorie in enumerate(categories)}
+        self.codes = codes
+        self.valeurs = valeurs
+
+        # Segment de chaque catégorie dans les colonnes triées : [debuts, debuts + nombres)
+        self.nombres = np.bincount(codes, minlength=len(categories))
+        self.debuts = np.concatenate(([0], np.cumsum(self.nombres)[:-1])).astype(np.int64)
+        self.triees = {champ: colonne[np.lexsort((colonne, codes))] for champ, colonne in valeurs.items()}
+        self.sommes = {champ: np.bincount(codes, weights=colonne, minlength=len(categories))
+                       for champ, colonne in valeurs.items()}
+
+    @property
+    def nombre_livres(self) -> int:
+        """
+        Nombre de livres chargés.
+
+        Returns:
+            int: Taille des colonnes
+        """
+        return len(self.codes)
+
+    def code_categorie(self, categorie: str) -> int:
+        """
+        Trouver le code d'une catégorie, sans tenir compte de la casse.
+
+        Args:
+            categorie: Nom de la catégorie
+
+        Returns:
+            int: Code de la catégorie
+
+        Raises:
+            KeyError: Si la catégorie est inconnue
+        """
+        return self.codes_par_nom[categorie.strip().lower()]
+
+    def selection(self, categorie: Optional[str]) -> np.ndarray:
+        """
+        Codes des catégories analysées.
+
+        Args:
+            categorie: Une catégorie, ou None pour toutes
+
+        Returns:
+            np.ndarray: Codes retenus
+        """
+        if categorie is None:
+            return np.arange(len(self.categories))
+        return np.array([self.code_categorie(categorie)])
+
+    def distribution(self, champ: str, percentiles: Sequence[float],
+                     categorie: Optional[str] = None) -> List[DistributionCategorie]:
+        """
+        Minimum, maximum, moyenne et percentiles d'un champ par catégorie.
+
+        Les percentiles sont interpolés linéairement (comme numpy.percentile)
+        dans le segment trié de chaque catégorie, pour toutes les catégories
+        et tous les percentiles en une seule opération.
+
+        Args:
+            champ: Champ analysé (clé de CHAMPS_ANALYTIQUES)
+            percentiles: Percentiles voulus, entre 0 et 100
+            categorie: Une catégorie, ou None pour toutes
+
+        Returns:
+            List[DistributionCategorie]: Distribution par catégorie, par ordre alphabétique
+        """
+        codes = self.selection(categorie)
+        triee = self.triees[champ]
+        debuts = self.debuts[codes]
+        nombres = self.nombres[codes]
+        fins = debuts + nombres - 1
+
+        rangs = np.asarray(percentiles, dtype=np.float64) / 100.0
+        positions = debuts[:, None] + rangs[None, :] * (nombres[:, None] - 1)
+        bas = np.floor(positions).astype(np.int64)
+        haut = np.minimum(bas + 1, fins[:, None])
+        valeurs_percentiles = triee[bas] + (triee[haut] - triee[bas]) * (positions - bas)
+        moyennes = self.sommes[champ][codes] / nombres
+
+        noms = [f"p{percentile:g}" for percentile in percentiles]
+        return [
+            DistributionCategorie(
+                categorie=self.categories[code],
+                nombre_livres=int(nombres[i]),
+                minimum=float(triee[debuts[i]]),
+                maximum=float(triee[fins[i]]),
+                moyenne=round(float(moyennes[i]), 4),
+                percentiles={nom: round(float(valeur), 4) for nom, valeur in zip(noms, valeurs_percentiles[i])},
+            )
+            for i, code in enumerate(codes)
+        ]
+
+    def histogramme(self, champ: str, intervalles: int, categorie: Optional[str] = None) -> Histogramme:
+        """
+        Histogramme d'un champ, sur tous les livres ou sur le segment d'une catégorie.
+
+        Args:
+            champ: Champ analysé (clé de CHAMPS_ANALYTIQUES)
+            intervalles: Nombre d'intervalles de même largeur
+            categorie: Une catégorie, ou None pour tous les livres
+
+        Returns:
+            Histogramme: Bornes et comptes
+        """
+        if categorie is None:
+            valeurs = self.valeurs[champ]
+        else:
+            code = self.code_categorie(categorie)
+            valeurs = self.triees[champ][self.debuts[code]:self.debuts[code] + self.nombres[code]]
+            categorie = self.categories[code]
+
+        comptes, bornes = np.histogram(valeurs, bins=intervalles)
+        return Histogramme(champ=champ, categorie=categorie,
+                           bornes=[round(float(borne), 4) for borne in bornes], comptes=comptes.tolist())
+
+    @cached_property
+    def stock_par_categorie(self) -> np.ndarray:
+        """
+        Stock total et valeur du stock de chaque catégorie, calculés une fois par version.
+
+        Returns:
+            np.ndarray: Tableau (catégories, 2) : stock total, valeur du stock
+        """
+        stock = self.valeurs["stock"]
+        return np.stack([
+            np.bincount(self.codes, weights=stock, minlength=len(self.categories)),
+            np.bincount(self.codes, weights=stock * self.valeurs["prix"], minlength=len(self.categories)),
+        ], axis=1)
+
+    def valeur_stock(self) -> List[ValeurStockCategorie]:
+        """
+        Valeur du stock par catégorie.
+
+        Returns:
+            List[ValeurStockCategorie]: Catégories par valeur de stock décroissante
+        """
+        stock = self.stock_par_categorie
+        return [
+            ValeurStockCategorie(
+                categorie=self.categories[code],
+                nombre_livres=int(self.nombres[code]),
+                stock_total=int(stock[code, 0]),
+                valeur_stock=round(float(stock[code, 1]), 2),
+            )
+            for code in np.argsort(-stock[:, 1], kind="stable")
+        ]
+
+    @cached_property
+    def tableau_notes(self) -> np.ndarray:
+        """
+        Tableau croisé catégorie x note, calculé une fois par version.
+
+        Returns:
+            np.ndarray: Nombre de livres, tableau (catégories, notes)
+        """
+        notes = np.clip(self.valeurs["note"].astype(np.int64), NOTES.start, NOTES.stop - 1)
+        return np.bincount(self.codes * len(NOTES) + notes,
+                           minlength=len(self.categories) * len(NOTES)).reshape(len(self.categories), len(NOTES))
+
+    def notes_par_categorie(self, categorie: Optional[str] = None) -> List[NotesCategorie]:
+        """
+        Répartition des notes par catégorie.
+
+        Args:
+            categorie: Une catégorie, ou None pour toutes
+
+        Returns:
+            List[NotesCategorie]: Comptes par note et note moyenne des livres notés, par ordre alphabétique
+        """
+        codes = self.selection(categorie)
+        tableau = self.tableau_notes[codes]
+        nombres = self.nombres[codes]
+        # La note 0 (inconnue) ne compte pas dans la moyenne
+        notees = tableau[:, 1:]
+        moyennes = notees @ np.arange(1, len(NOTES)) / np.maximum(notees.sum(axis=1), 1)
+        return [
+            NotesCategorie(
+                categorie=self.categories[code],
+                nombre_livres=int(nombres[i]),
+                note_moyenne=round(float(moyennes[i]), 4),
+                notes={str(note): int(nombre) for note, nombre in zip(NOTES, tableau[i])},
+            )
+            for i, code in enumerate(codes)
+        ]
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Choix du service livres (synchrone ou asynchrone) selon la configuration.
+
+BOOKS_API_MODE=sync (defaut) : BookService, SQLAlchemy synchrone execute dans
+le pool de threads de Starlette.
+BOOKS_API_MODE=async : BookServiceAsync, SQLAlchemy asyncio + asyncpg, sans
+pool de threads.
+
+BOOKS_API_SOURCE=postgres (defaut) lit les livres dans PostgreSQL ;
+BOOKS_API_SOURCE=json les lit dans les flux JSON de Scrapy, indexes en
+memoire au chargement (deploiements hors ligne, sans base, mode sync).
+BOOKS_API_SOURCE=partage les lit dans le jeu publie en memoire partagee par
+le processus chargeur (api/repositories/jeu_partage.py), commun a tous les
+workers (sans base, mode sync).
+
+Les routes sont async et appellent le service via appeler_service, ce qui
+permet de comparer les deux modes sous la meme charge.
+"""
+import inspect
+import os
+
+from starlette.concurrency import run_in_threadpool
+
+MODES_API = ("sync", "async")
+MODE_API = os.environ.get("BOOKS_API_MODE", "sync").lower()
+
+SOURCES_API = ("postgres", "json", "partage")
+# Sources lues sans PostgreSQL
+SOURCES_SANS_BASE = ("json", "partage")
+SOURCE_API = os.environ.get("BOOKS_API_SOURCE", "postgres").lower()
+
+
+def creer_book_service():
+    """
+    Creer le service livres correspondant au mode configure.
+
+    Returns:
+        BookService ou BookServiceAsync
+
+    Raises:
+        ValueError: Si BOOKS_API_MODE ou BOOKS_API_SOURCE est inconnu, ou si
+            une source sans base (json, partage) est demandee en mode async
+    """
+    if MODE_API not in MODES_API:
+        raise ValueError(f"BOOKS_API_MODE inconnu: {MODE_API} (attendu: {', '.join(MODES_API)})")
+    if SOURCE_API not in SOURCES_API:
+        raise ValueError(f"BOOKS_API_SOURCE inconnu: {SOURCE_API} (attendu: {', '.join(SOURCES_API)})")
+
+    if SOURCE_API in SOURCES_SANS_BASE:
+        if MODE_API == "async":
+            raise ValueError(f"BOOKS_API_SOURCE={SOURCE_API} exige BOOKS_API_MODE=sync")
+        from api.services.book_service import BookService
+        if SOURCE_API == "partage":
+            from api.repositories.jeu_partage import BookRepositoryPartage
+            return BookService(BookRepositoryPartage())
+        from api.repositories.book_repository import BookRepository
+        return BookService(BookRepository())
+
+    if MODE_API == "async":
+        from api.services.book_service_async import BookServiceAsync
+        return BookServiceAsync()
+
+    from api.services.book_service import BookService
+    return BookService()
+
+
+def dependance_session():
+    """
+    Choisir la dependance FastAPI ouvrant la session de la requete selon le mode.
+
+    Returns:
+        Dependance get_database_session (sync), get_async_database_session (async)
+        ou sans_session (sources JSON et partagee)
+    """
+    if SOURCE_API in SOURCES_SANS_BASE:
+        return sans_session
+
+    from database_config import get_async_database_session, get_database_session
+
+    return get_async_database_session if MODE_API == "async" else get_database_session
+
+
+async def sans_session():
+    """
+    Dependance FastAPI des sources sans base : aucune session a ouvrir.
+
+    Returns:
+        None
+    """
+    yield None
+
+
+async def appeler_service(methode, *args, **kwargs):
+    """
+    Appeler une methode de service depuis une route async.
+
+    Les methodes async sont attendues directement ; les methodes synchrones
+    sont executees dans le pool de threads pour ne pas bloquer la boucle.
+
+    Args:
+        methode: Methode du service
+        *args: Arguments positionnels
+        **kwargs: Arguments nommes
+
+    Returns:
+        Resultat de la methode
+    """
+    if inspect.iscoroutinefunction(methode):
+        return await methode(*args, **kwargs)
+    return await run_in_threadpool(methode, *args, **kwargs)
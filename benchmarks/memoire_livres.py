@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la memoire occupee par livre en memoire (repository JSON, caches)
+
+Compare, pour les memes livres decodes depuis des lignes JSON (une chaine par
+champ et par livre, comme a la lecture des flux ou des lignes SQL) :
+- l'ancienne representation : dataclass avec un __dict__ par instance ;
+- Book : dataclass a slots, categorie, fil d'Ariane et type internes.
+
+Les livres sont ceux des flux JSON de Scrapy s'ils existent, completes par
+des livres generes. A lancer depuis la racine du projet :
+
+    python benchmarks/memoire_livres.py --livres 50000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import field, fields, make_dataclass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.models.book import Book
+from books_toscrape.books_toscrape.flux import lire_flux
+
+CATEGORIES = ["Mystery", "Historical Fiction", "Sequential Art", "Classics", "Philosophy",
+              "Romance", "Womens Fiction", "Fiction", "Childrens", "Religion"]
+
+# Ancienne representation : memes champs, sans slots ni chaines internees
+BookAvant = make_dataclass("BookAvant", [(f.name, f.type, field(default=f.default)) for f in fields(Book)])
+
+
+def lignes_json(nombre):
+    """
+    Produit les livres en lignes JSON, ceux des flux Scrapy d'abord
+
+    Args:
+        nombre: Nombre de livres voulus
+
+    Returns:
+        list: Lignes JSON encodees, une par livre
+    """
+    lignes = []
+    try:
+        for enregistrement in lire_flux("books", "books_toscrape"):
+            if len(lignes) >= nombre:
+                break
+            lignes.append(json.dumps(enregistrement))
+    except Exception:
+        pass
+
+    for numero in range(len(lignes), nombre):
+        categorie = CATEGORIES[numero % len(CATEGORIES)]
+        lignes.append(json.dumps({
+            "id": numero + 1,
+            "url_page": f"https://books.toscrape.com/catalogue/livre-{numero}/index.html",
+            "categorie": categorie,
+            "title": f"Livre numero {numero}",
+            "prix_numerique": 10.0 + numero % 50,
+            "note_etoiles_nombre": numero % 5 + 1,
+            "nombre_avis_clients": 0,
+            "en_stock": True,
+            "nombre_stock": numero % 20,
+            "description": "Une description assez longue pour ressembler au site. " * 12,
+            "url_image": f"https://books.toscrape.com/media/cache/{numero:032x}.jpg",
+            "fil_ariane": f"Home > Books > {categorie}",
+            "code_upc": f"{numero:016x}",
+            "type_produit": "Books",
+        }))
+    return lignes
+
+
+def mesurer(classe, lignes):
+    """
+    Mesure la memoire retenue par les livres construits depuis les lignes
+
+    Args:
+        classe: BookAvant ou Book
+        lignes: Lignes JSON des livres
+
+    Returns:
+        tuple: (octets retenus par livre, octets par instance seule)
+    """
+    noms = {f.name for f in fields(classe)}
+    gc.collect()
+    tracemalloc.start()
+    livres = [classe(**{cle: valeur for cle, valeur in json.loads(ligne).items() if cle in noms})
+              for ligne in lignes]
+    gc.collect()
+    retenus, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    instance = sys.getsizeof(livres[0]) + (sys.getsizeof(livres[0].__dict__) if hasattr(livres[0], "__dict__") else 0)
+    return retenus / len(livres), instance
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la memoire par livre")
+    parser.add_argument("--livres", type=int, default=50000, help="Nombre de livres charges")
+    options = parser.parse_args()
+
+    lignes = lignes_json(options.livres)
+    print(f"{len(lignes)} livres")
+    resultats = {}
+    for nom, classe in (("avant (__dict__)", BookAvant), ("Book (slots, internes)", Book)):
+        par_livre, instance = mesurer(classe, lignes)
+        resultats[nom] = par_livre
+        print(f"{nom:>24}: {par_livre:8.0f} o/livre (objet seul: {instance} o)")
+    avant, apres = resultats.values()
+    print(f"{'gain':>24}: {avant - apres:8.0f} o/livre ({(avant - apres) / avant:.0%})")
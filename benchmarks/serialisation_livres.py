@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark du temps CPU de serialisation d'une reponse de livres
+
+Compare, pour une meme liste de livres :
+- le chemin standard de FastAPI : validation pydantic contre le response_model,
+  conversion en types JSON puis encodage par JSONResponse (module json) ;
+- le chemin rapide (BOOKS_API_REPONSE_RAPIDE=1) : ReponseJSONRapide, orjson.
+
+Les livres sont ceux des flux JSON de Scrapy s'ils existent, sinon generes.
+A lancer depuis la racine du projet :
+
+    python benchmarks/serialisation_livres.py --livres 1000 --repetitions 50
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from api.models.book import Book
+from api.models.book_resume import BookResume, CHAMPS_RESUME
+from api.repositories.book_repository import BookRepository
+from api.routes.reponse_rapide import ReponseJSONRapide
+
+
+def charger_livres(nombre):
+    """
+    Charge les livres des flux Scrapy, completes par des livres generes
+
+    Args:
+        nombre: Nombre de livres voulus
+
+    Returns:
+        List[Book]: Livres
+    """
+    livres = BookRepository().get_all_books()[:nombre]
+    for numero in range(len(livres), nombre):
+        livres.append(Book(
+            id=numero + 1,
+            url_page=f"https://books.toscrape.com/catalogue/livre-{numero}/index.html",
+            categorie="Mystery",
+            title=f"Livre numero {numero}",
+            prix_numerique=10.0 + numero % 50,
+            note_etoiles_nombre=numero % 5 + 1,
+            nombre_avis_clients=numero % 7,
+            en_stock=numero % 3 != 0,
+            nombre_stock=numero % 20,
+            description="Une description assez longue pour ressembler au site. " * 12,
+            code_upc=f"{numero:016x}"
+        ))
+    return livres
+
+
+def reponse_standard(adaptateur, contenu):
+    """
+    Reproduit serialize_response de FastAPI puis JSONResponse
+
+    Args:
+        adaptateur: TypeAdapter du response_model
+        contenu: Valeur retournee par la route
+
+    Returns:
+        bytes: Corps de la reponse
+    """
+    valide = adaptateur.validate_python(contenu)
+    return JSONResponse(content=adaptateur.dump_python(valide, mode="json")).body
+
+
+def reponse_rapide(adaptateur, contenu):
+    """
+    Chemin rapide : encodage direct, sans validation
+
+    Args:
+        adaptateur: Inutilise (meme signature que reponse_standard)
+        contenu: Valeur retournee par la route
+
+    Returns:
+        bytes: Corps de la reponse
+    """
+    return ReponseJSONRapide(content=contenu).body
+
+
+def mesurer(fonction, adaptateur, contenu, repetitions):
+    """
+    Mesure le temps CPU moyen d'une reponse
+
+    Returns:
+        tuple: (millisecondes CPU par reponse, taille du corps en octets)
+    """
+    corps = fonction(adaptateur, contenu)
+    debut = time.process_time()
+    for _ in range(repetitions):
+        fonction(adaptateur, contenu)
+    return (time.process_time() - debut) * 1000 / repetitions, len(corps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de serialisation des reponses de livres")
+    parser.add_argument("--livres", type=int, default=1000, help="Nombre de livres par reponse")
+    parser.add_argument("--repetitions", type=int, default=50, help="Nombre de reponses mesurees")
+    options = parser.parse_args()
+
+    livres = charger_livres(options.livres)
+    scenarios = [
+        # GET /books/ : resumes (dictionnaires des colonnes lues)
+        ("resumes", TypeAdapter(List[BookResume]),
+         [{champ: getattr(livre, champ) for champ in CHAMPS_RESUME} for livre in livres]),
+        # GET /books/{id} en serie, ou liste complete : dataclasses Book
+        ("livres complets", TypeAdapter(List[Book]), livres),
+    ]
+
+    print(f"{len(livres)} livres par reponse, {options.repetitions} repetitions")
+    for nom, adaptateur, contenu in scenarios:
+        ms_standard, taille_standard = mesurer(reponse_standard, adaptateur, contenu, options.repetitions)
+        ms_rapide, taille_rapide = mesurer(reponse_rapide, adaptateur, contenu, options.repetitions)
+        # Les deux chemins produisent le meme JSON
+        assert json.loads(reponse_standard(adaptateur, contenu)) == json.loads(reponse_rapide(adaptateur, contenu))
+        print(f"{nom:>16}: standard {ms_standard:8.2f} ms CPU ({taille_standard} o) | "
+              f"rapide {ms_rapide:8.2f} ms CPU ({taille_rapide} o) | x{ms_standard / ms_rapide:.1f}")
@@ -2,15 +2,52 @@
 """
 Modele SQLAlchemy pour les livres.
 """
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, Index, Computed, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from database_config import Base
 
+# Configuration de recherche plein texte (les livres sont en anglais)
+CONFIGURATION_PLEIN_TEXTE = "english"
+
+# Vecteur pondere : titre (A), titre complet (B), description (C)
+EXPRESSION_VECTEUR_RECHERCHE = (
+    f"setweight(to_tsvector('{CONFIGURATION_PLEIN_TEXTE}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{CONFIGURATION_PLEIN_TEXTE}', coalesce(titre_complet, '')), 'B') || "
+    f"setweight(to_tsvector('{CONFIGURATION_PLEIN_TEXTE}', coalesce(description, '')), 'C')"
+)
+
 
 class BookSQL(Base):
     """
     Modele SQLAlchemy pour les livres.
     """
     __tablename__ = "books"
+    __table_args__ = (
+        # Recherche ILIKE '%...%' sur le titre (extension pg_trgm)
+        Index(
+            "ix_books_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        # Recherche approximative (operateur %) sur la categorie
+        Index(
+            "ix_books_categorie_trgm",
+            "categorie",
+            postgresql_using="gin",
+            postgresql_ops={"categorie": "gin_trgm_ops"},
+        ),
+        # Correspondance exacte normalisee : lower(categorie) = lower(:categorie)
+        Index("ix_books_categorie_lower", text("lower(categorie)")),
+        # Tri et pagination par cle (colonne, id) ; servent aussi les filtres
+        # d'intervalle sur la premiere colonne
+        Index("ix_books_prix_id", "prix_numerique", "id"),
+        Index("ix_books_note_id", "note_etoiles_nombre", "id"),
+        Index("ix_books_avis_id", "nombre_avis_clients", "id"),
+        Index("ix_books_title_id", "title", "id"),
+        # Recherche plein texte (@@) sur le vecteur genere
+        Index("ix_books_vecteur_recherche", "vecteur_recherche", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     url_page = Column(String(500), nullable=True)
@@ -31,6 +68,9 @@ class BookSQL(Base):
     type_produit = Column(String(50), nullable=True, default="Books")
     taxe = Column(Float, nullable=True, default=0.0)
     nombre_avis = Column(Integer, nullable=True, default=0)
+    # Colonne generee (STORED) : calculee par PostgreSQL a l'insertion et a la
+    # mise a jour des livres par le pipeline, jamais au moment de la requete
+    vecteur_recherche = Column(TSVECTOR, Computed(EXPRESSION_VECTEUR_RECHERCHE, persisted=True))
 
     def to_dict(self):
         """
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Repository PostgreSQL pour la version du jeu de donnees.
+"""
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from api.models.dataset_metadata import CLE_VERSION_LIVRES, DatasetMetadataSQL
+from database_config import SessionLocal
+
+
+class DatasetVersionRepository:
+    """
+    Repository PostgreSQL pour lire et incrementer la version du jeu de donnees.
+    """
+
+    def __init__(self, session: Optional[Session] = None):
+        """
+        Initialiser le repository.
+
+        Args:
+            session: Session existante a reutiliser (pipeline), sinon une session par appel
+        """
+        self.session = session
+
+    def obtenir_session_db(self) -> Session:
+        """
+        Obtenir une session de base de donnees.
+
+        Returns:
+            Session: Session fournie ou nouvelle session SQLAlchemy
+        """
+        return self.session or SessionLocal()
+
+    def obtenir_version(self, cle: str = CLE_VERSION_LIVRES) -> Optional[str]:
+        """
+        Lire la version courante du jeu de donnees.
+
+        Args:
+            cle: Cle du jeu de donnees
+
+        Returns:
+            Optional[str]: Version ("0" avant le premier crawl), None si illisible
+        """
+        db = self.obtenir_session_db()
+        try:
+            version = db.query(DatasetMetadataSQL.version).filter(DatasetMetadataSQL.cle == cle).scalar()
+            return str(version or 0)
+        except SQLAlchemyError:
+            db.rollback()
+            return None
+        finally:
+            if db is not self.session:
+                db.close()
+
+    def incrementer_version(self, cle: str = CLE_VERSION_LIVRES) -> int:
+        """
+        Incrementer la version du jeu de donnees et valider la transaction.
+
+        Args:
+            cle: Cle du jeu de donnees
+
+        Returns:
+            int: Nouvelle version
+        """
+        db = self.obtenir_session_db()
+        try:
+            metadata = db.query(DatasetMetadataSQL).filter(
+                DatasetMetadataSQL.cle == cle
+            ).with_for_update().first()
+
+            if metadata is None:
+                metadata = DatasetMetadataSQL(cle=cle, version=1)
+                db.add(metadata)
+            else:
+                metadata.version = metadata.version + 1
+                metadata.mis_a_jour_le = func.now()
+
+            db.commit()
+            return metadata.version
+        finally:
+            if db is not self.session:
+                db.close()
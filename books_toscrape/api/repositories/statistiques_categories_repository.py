@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Repository PostgreSQL pour les statistiques par categorie.
+
+Les agregats sont calcules par un seul GROUP BY (avec fonctions de fenetre
+pour le rang et le pourcentage) et stockes dans une vue materialisee,
+rafraichie par le pipeline a la fin de chaque crawl.
+"""
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from database_config import SessionLocal
+
+NOM_VUE = "statistiques_categories"
+
+# Un seul passage sur books pour les deux agregats :
+# - classement par nombre de livres (categorie renseignee)
+# - prix moyen des livres dont le prix est renseigne
+REQUETE_STATISTIQUES = """
+SELECT categorie,
+       COUNT(*) AS nombre_livres,
+       ROW_NUMBER() OVER (ORDER BY COUNT(*) DESC, categorie) AS rang,
+       ROUND(100.0 * COUNT(*) / SUM(COUNT(*)) OVER (), 2) AS pourcentage_total,
+       COUNT(*) FILTER (WHERE prix_numerique > 0) AS nombre_livres_prix,
+       ROUND(AVG(prix_numerique) FILTER (WHERE prix_numerique > 0)::numeric, 2) AS prix_moyen
+FROM books
+WHERE categorie IS NOT NULL AND categorie <> ''
+GROUP BY categorie
+"""
+
+
+class StatistiquesCategoriesRepository:
+    """
+    Repository PostgreSQL pour la vue materialisee des statistiques par categorie.
+    """
+
+    def __init__(self, session: Optional[Session] = None):
+        """
+        Initialiser le repository.
+
+        Args:
+            session: Session existante a reutiliser (pipeline), sinon une session par appel
+        """
+        self.session = session
+
+    def obtenir_session_db(self) -> Session:
+        """
+        Obtenir une session de base de donnees.
+
+        Returns:
+            Session: Session fournie ou nouvelle session SQLAlchemy
+        """
+        return self.session or SessionLocal()
+
+    def fermer_session_db(self, db: Session) -> None:
+        """
+        Fermer la session si elle a ete ouverte par le repository.
+
+        Args:
+            db: Session a fermer
+        """
+        if db is not self.session:
+            db.close()
+
+    def vue_existe(self, db: Session) -> bool:
+        """
+        Verifier que la vue materialisee existe.
+
+        Args:
+            db: Session SQLAlchemy
+
+        Returns:
+            bool: True si la vue existe
+        """
+        return db.execute(text("SELECT to_regclass(:nom)"), {"nom": NOM_VUE}).scalar() is not None
+
+    def creer_vue(self) -> None:
+        """
+        Creer la vue materialisee et son index unique (requis pour un rafraichissement concurrent).
+        """
+        db = self.obtenir_session_db()
+        try:
+            db.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {NOM_VUE} AS {REQUETE_STATISTIQUES}"))
+            db.execute(text(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{NOM_VUE}_categorie ON {NOM_VUE} (categorie)"
+            ))
+            db.commit()
+        finally:
+            self.fermer_session_db(db)
+
+    def rafraichir_vue(self) -> None:
+        """
+        Recalculer la vue materialisee sans bloquer les lectures en cours.
+        """
+        db = self.obtenir_session_db()
+        try:
+            db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {NOM_VUE}"))
+            db.commit()
+        finally:
+            self.fermer_session_db(db)
+
+    def lire_statistiques(self) -> List[dict]:
+        """
+        Lire les statistiques par categorie, classees par rang.
+
+        Si la vue n'a pas encore ete creee par un crawl, la requete
+        d'agregation est executee directement.
+
+        Returns:
+            List[dict]: Une ligne par categorie
+        """
+        db = self.obtenir_session_db()
+        try:
+            source = NOM_VUE if self.vue_existe(db) else f"({REQUETE_STATISTIQUES}) AS statistiques"
+            lignes = db.execute(text(f"SELECT * FROM {source} ORDER BY rang")).mappings().all()
+            return [dict(ligne) for ligne in lignes]
+        finally:
+            self.fermer_session_db(db)
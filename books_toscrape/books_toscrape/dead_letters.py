@@ -0,0 +1,172 @@
+"""
+Stockage des échecs du crawl (dead letters)
+
+Les items refusés par un pipeline et les requêtes en échec sont ajoutés,
+une entrée JSON compacte par ligne, dans un fichier dead-letter avec la
+classe d'erreur. rejouer_dead_letters.py les ré-injecte ensuite par lots
+sans relancer tout le crawl (les retries restent désactivés).
+"""
+import json
+import os
+from collections import Counter
+from datetime import datetime, timezone
+
+FICHIER_DEAD_LETTERS = "dead_letters.jsonl"
+
+# Clés de meta utiles pour reconstruire une requête de details_book_spider
+CLES_META_CONSERVEES = ('categorie_originale', 'titre_original', 'url_originale', 'nom_categorie')
+
+
+class DeadLetterStore:
+    """
+    Fichier JSON Lines des items et requêtes en échec
+    """
+
+    def __init__(self, chemin=FICHIER_DEAD_LETTERS):
+        """
+        Initialise le stockage
+
+        Args:
+            chemin: Chemin du fichier dead-letter
+        """
+        self.chemin = chemin
+
+    def ajouter(self, entree):
+        """
+        Ajoute une entrée au fichier
+
+        Args:
+            entree: Dictionnaire sérialisable décrivant l'échec
+        """
+        entree['horodatage'] = datetime.now(timezone.utc).isoformat()
+        ligne = serialiser(entree)
+        with open(self.chemin, 'a', encoding='utf-8') as fichier:
+            fichier.write(ligne + '\n')
+
+    def enregistrer_item(self, item, spider, erreur):
+        """
+        Enregistre un item qu'un pipeline n'a pas pu traiter
+
+        Args:
+            item: Dictionnaire de l'item
+            spider: Spider ayant produit l'item
+            erreur: Exception levée par le pipeline
+        """
+        self.ajouter({
+            'type': 'item',
+            'spider': spider.name,
+            'classe_erreur': type(erreur).__name__,
+            'message': str(erreur),
+            'item': item
+        })
+
+    def enregistrer_requete(self, failure, spider):
+        """
+        Enregistre les métadonnées d'une requête en échec
+
+        Args:
+            failure: Objet d'échec transmis à l'errback
+            spider: Spider ayant émis la requête
+        """
+        requete = failure.request
+        reponse = getattr(failure.value, 'response', None)
+        callback = getattr(requete.callback, '__name__', None)
+
+        self.ajouter({
+            'type': 'requete',
+            'spider': spider.name,
+            'classe_erreur': failure.type.__name__ if failure.type else 'Exception',
+            'message': str(failure.value),
+            'statut_http': reponse.status if reponse is not None else None,
+            'requete': {
+                'url': requete.url,
+                'callback': callback,
+                'meta': {cle: requete.meta[cle] for cle in CLES_META_CONSERVEES if cle in requete.meta}
+            }
+        })
+
+    def lire(self):
+        """
+        Lit toutes les entrées du fichier
+
+        Returns:
+            list: Entrées dead-letter, vide si le fichier est absent
+        """
+        if not os.path.exists(self.chemin):
+            return []
+
+        entrees = []
+        with open(self.chemin, 'r', encoding='utf-8') as fichier:
+            for ligne in fichier:
+                if ligne.strip():
+                    entrees.append(json.loads(ligne))
+        return entrees
+
+    def filtrer(self, type_entree):
+        """
+        Lit les entrées d'un type sans les retirer du fichier
+
+        Args:
+            type_entree: 'item' ou 'requete'
+
+        Returns:
+            list: Entrées du type demandé
+        """
+        return [entree for entree in self.lire() if entree.get('type') == type_entree]
+
+    def retirer(self, entrees):
+        """
+        Retire du fichier des entrées lues auparavant
+
+        Appelé une fois le rejeu terminé : les entrées sont comparées ligne à
+        ligne (horodatage compris), si bien que les nouveaux échecs ajoutés
+        pendant le rejeu restent dans le fichier.
+
+        Args:
+            entrees: Entrées à retirer, telles que retournées par lire ou filtrer
+        """
+        if not entrees or not os.path.exists(self.chemin):
+            return
+
+        a_retirer = Counter(serialiser(entree) for entree in entrees)
+        conservees = []
+        for entree in self.lire():
+            ligne = serialiser(entree)
+            if a_retirer[ligne] > 0:
+                a_retirer[ligne] -= 1
+            else:
+                conservees.append(ligne)
+
+        chemin_temporaire = self.chemin + '.tmp'
+        with open(chemin_temporaire, 'w', encoding='utf-8') as fichier:
+            for ligne in conservees:
+                fichier.write(ligne + '\n')
+        os.replace(chemin_temporaire, self.chemin)
+
+
+def serialiser(entree):
+    """
+    Sérialise une entrée sous forme de ligne JSON compacte
+
+    Args:
+        entree: Dictionnaire sérialisable
+
+    Returns:
+        str: Ligne JSON sans saut de ligne final
+    """
+    return json.dumps(entree, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def lots(entrees, taille_lot):
+    """
+    Découpe une liste d'entrées en lots
+
+    Args:
+        entrees: Liste à découper
+        taille_lot: Nombre maximal d'entrées par lot
+
+    Yields:
+        list: Lots successifs
+    """
+    for debut in range(0, len(entrees), taille_lot):
+        yield entrees[debut:debut + taille_lot]
@@ -0,0 +1,424 @@
+"""
+Flux JSON Lines compressés et rotatifs
+
+Les spiders exportent leurs items en JSON Lines compressés (gzip par défaut,
+zstd si le paquet zstandard est installé), découpés tous les N items :
+
+    categories-00001.jl.gz, categories-00002.jl.gz, ...
+
+Pendant le crawl, les parties sont écrites sous un nom de préparation
+(categories.encours-00001.jl.gz, ...) ; l'extension PublicationFlux ne les
+renomme en parties publiées, à la place des précédentes, que si le crawl se
+termine normalement. Un crawl en échec ou annulé laisse le flux précédent intact.
+
+lire_flux() relit ces fichiers en streaming, enregistrement par enregistrement,
+et accepte toujours l'ancien format (un tableau JSON unique produit par -o *.json).
+Ce module n'utilise que la bibliothèque standard : il est aussi importé par l'API.
+"""
+import glob
+import gzip
+import io
+import json
+import logging
+import os
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut, surchargées par FLUX_COMPRESSION et FLUX_ROTATION_ITEMS dans settings.py
+COMPRESSION_DEFAUT = "gzip"
+ROTATION_ITEMS_DEFAUT = 500
+
+EXTENSIONS_COMPRESSION = {
+    "gzip": ("jl.gz", "scrapy.extensions.postprocessing.GzipPlugin"),
+    "zstd": ("jl.zst", "books_toscrape.flux.ZstdPlugin"),
+    "aucune": ("jl", None),
+}
+
+# Ordre de recherche des fichiers d'un flux : parties rotatives, fichier unique, tableau JSON
+MOTIFS_PARTIES = ("{base}-*.jl.gz", "{base}-*.jl.zst", "{base}-*.jl")
+MOTIFS_UNIQUES = ("{base}.jl.gz", "{base}.jl.zst", "{base}.jl", "{base}.jsonl", "{base}.json")
+
+# Parties écrites pendant le crawl, publiées par PublicationFlux en fin de crawl réussi
+SUFFIXE_PREPARATION = ".encours"
+
+# Flux déjà décodés par un processus résident, indexés par (dossier, base)
+_cache_flux = {}
+
+
+class ZstdPlugin:
+    """
+    Plugin de post-traitement Scrapy compressant un flux en zstd
+    """
+
+    def __init__(self, file, feed_options):
+        import zstandard
+
+        niveau = feed_options.get("zstd_compresslevel", 3)
+        self.file = file
+        self.compresseur = zstandard.ZstdCompressor(level=niveau).stream_writer(file, closefd=False)
+
+    def write(self, data):
+        return self.compresseur.write(data)
+
+    def close(self):
+        self.compresseur.close()
+
+
+def configuration_flux(base, settings):
+    """
+    Construit la configuration FEEDS d'un flux rotatif compressé
+
+    Les parties sont écrites sous le nom de préparation du flux.
+
+    Args:
+        base: Nom de base des fichiers (ex: "categories")
+        settings: Settings Scrapy (FLUX_COMPRESSION, FLUX_ROTATION_ITEMS)
+
+    Returns:
+        dict: Valeur du setting FEEDS
+    """
+    compression = settings.get("FLUX_COMPRESSION", COMPRESSION_DEFAUT)
+    extension, plugin = EXTENSIONS_COMPRESSION[compression]
+
+    return {
+        f"{base}{SUFFIXE_PREPARATION}-%(batch_id)05d.{extension}": {
+            "format": "jsonlines",
+            "encoding": "utf8",
+            "overwrite": True,
+            "batch_item_count": settings.getint("FLUX_ROTATION_ITEMS", ROTATION_ITEMS_DEFAUT),
+            "postprocessing": [plugin] if plugin else [],
+        }
+    }
+
+
+def activer_flux(base, settings):
+    """
+    Active le flux rotatif d'un spider, sauf si -o/-O est passé en ligne de commande
+
+    Les parties du crawl précédent restent lisibles pendant tout le crawl :
+    les nouvelles sont écrites à part et publiées par PublicationFlux. Les
+    restes de préparation d'un crawl interrompu sont supprimés.
+
+    Args:
+        base: Nom de base des fichiers
+        settings: Settings Scrapy du crawler
+    """
+    if sortie_explicite(settings):
+        return
+
+    for chemin in parties_preparation(base):
+        os.remove(chemin)
+
+    settings.set("FEEDS", configuration_flux(base, settings), priority="spider")
+    settings.set("FLUX_EN_PREPARATION", base, priority="spider")
+
+
+def parties_preparation(base, dossier="."):
+    """
+    Liste les parties en préparation d'un flux
+
+    Args:
+        base: Nom de base des fichiers
+        dossier: Dossier contenant les fichiers
+
+    Returns:
+        list: Chemins triés des parties en préparation
+    """
+    chemin_base = glob.escape(os.path.join(dossier, base + SUFFIXE_PREPARATION))
+    return sorted(chemin for motif in MOTIFS_PARTIES for chemin in glob.glob(motif.format(base=chemin_base)))
+
+
+def publier_flux(base, dossier="."):
+    """
+    Remplace les fichiers publiés d'un flux par ses parties en préparation
+
+    Chaque partie est renommée par-dessus la partie de même numéro, puis les
+    fichiers restants du crawl précédent sont supprimés : un lecteur voit
+    toujours un flux, jamais un dossier vide.
+
+    Args:
+        base: Nom de base des fichiers
+        dossier: Dossier contenant les fichiers
+
+    Returns:
+        int: Nombre de parties publiées
+    """
+    publiees = set()
+    for chemin in parties_preparation(base, dossier):
+        dossier_partie, nom = os.path.split(chemin)
+        destination = os.path.join(dossier_partie, base + nom[len(base) + len(SUFFIXE_PREPARATION):])
+        os.replace(chemin, destination)
+        publiees.add(destination)
+
+    chemin_base = glob.escape(os.path.join(dossier, base))
+    anciens = [chemin for motif in MOTIFS_PARTIES for chemin in glob.glob(motif.format(base=chemin_base))]
+    anciens += [motif.format(base=os.path.join(dossier, base)) for motif in MOTIFS_UNIQUES
+                if not motif.endswith(".json")]
+    for chemin in anciens:
+        if chemin not in publiees and os.path.exists(chemin):
+            os.remove(chemin)
+    return len(publiees)
+
+
+class PublicationFlux:
+    """
+    Extension Scrapy publiant le flux rotatif du spider quand le crawl a réussi
+    """
+
+    def __init__(self, crawler, base):
+        self.crawler = crawler
+        self.base = base
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        from scrapy import signals
+        from scrapy.exceptions import NotConfigured
+
+        base = crawler.settings.get('FLUX_EN_PREPARATION')
+        if not base:
+            raise NotConfigured
+
+        extension = cls(crawler, base)
+        # Après spider_closed : les exports de flux ont écrit et fermé leurs dernières parties
+        crawler.signals.connect(extension.engine_stopped, signal=signals.engine_stopped)
+        return extension
+
+    def engine_stopped(self):
+        raison = self.crawler.stats.get_value('finish_reason') if self.crawler.stats else None
+        if raison != 'finished':
+            for chemin in parties_preparation(self.base):
+                os.remove(chemin)
+            logger.warning("Flux %s non publié (fin du crawl: %s), le flux précédent est conservé",
+                           self.base, raison)
+            return
+
+        nombre = publier_flux(self.base)
+        logger.info("Flux %s publié: %s parties", self.base, nombre)
+
+
+def sortie_explicite(settings):
+    """
+    Indique si une sortie -o/-O a été passée en ligne de commande
+
+    Args:
+        settings: Settings Scrapy du crawler
+
+    Returns:
+        bool: True si FEEDS vient de la ligne de commande
+    """
+    from scrapy.settings import get_settings_priority
+
+    return settings.getpriority("FEEDS") >= get_settings_priority("cmdline")
+
+
+def fichiers_flux(base, dossier="."):
+    """
+    Liste les fichiers d'un flux, dans l'ordre de lecture
+
+    Args:
+        base: Nom de base des fichiers
+        dossier: Dossier contenant les fichiers
+
+    Returns:
+        list: Chemins des parties rotatives, sinon du fichier unique trouvé
+    """
+    chemin_base = os.path.join(dossier, base)
+
+    for motif in MOTIFS_PARTIES:
+        parties = sorted(glob.glob(motif.format(base=glob.escape(chemin_base))))
+        if parties:
+            return parties
+
+    for motif in MOTIFS_UNIQUES:
+        chemin = motif.format(base=chemin_base)
+        if os.path.exists(chemin):
+            return [chemin]
+
+    return []
+
+
+def signature_flux(base, dossier="."):
+    """
+    Calcule la signature (nom, date de modification, taille) des fichiers d'un flux
+
+    Args:
+        base: Nom de base des fichiers
+        dossier: Dossier contenant les fichiers
+
+    Returns:
+        str: Signature des fichiers, chaîne vide sans fichier
+    """
+    signature = []
+    for chemin in fichiers_flux(base, dossier):
+        etat = os.stat(chemin)
+        signature.append(f"{os.path.basename(chemin)}:{etat.st_mtime_ns}:{etat.st_size}")
+    return "|".join(signature)
+
+
+def ouvrir_texte(chemin):
+    """
+    Ouvre un fichier de flux en texte, en le décompressant si besoin
+
+    Args:
+        chemin: Chemin du fichier
+
+    Returns:
+        TextIO: Fichier texte UTF-8
+    """
+    if chemin.endswith(".gz"):
+        return gzip.open(chemin, "rt", encoding="utf-8")
+
+    if chemin.endswith(".zst"):
+        import zstandard
+
+        brut = open(chemin, "rb")
+        lecteur = zstandard.ZstdDecompressor().stream_reader(brut, closefd=True)
+        return io.TextIOWrapper(lecteur, encoding="utf-8")
+
+    return open(chemin, "r", encoding="utf-8")
+
+
+def lire_fichier(chemin, derniere_partie=True):
+    """
+    Lit un fichier de flux enregistrement par enregistrement
+
+    Seule la dernière partie d'un flux peut être encore en cours d'écriture :
+    sa dernière ligne tronquée ou la fin de sa compression sont ignorées sans
+    bruit. Ailleurs, une ligne illisible est signalée et sautée, la lecture
+    continuant avec la ligne suivante.
+
+    Args:
+        chemin: Chemin du fichier
+        derniere_partie: True si le fichier est la partie la plus récente du flux
+
+    Yields:
+        dict: Enregistrements du fichier
+    """
+    with ouvrir_texte(chemin) as fichier:
+        if chemin.endswith(".json"):
+            # Ancien format : un tableau JSON unique
+            yield from json.load(fichier)
+            return
+
+        # Une ligne de retard pour savoir, au décodage, si elle est la dernière
+        en_attente = None
+        numero = 0
+        try:
+            for ligne in fichier:
+                if en_attente is not None:
+                    enregistrement = decoder_ligne(chemin, numero, en_attente, tolerer=False)
+                    if enregistrement is not None:
+                        yield enregistrement
+                en_attente = ligne
+                numero += 1
+        except (EOFError, zlib.error) as erreur:
+            if not derniere_partie:
+                logger.warning("Flux %s: compression tronquée après la ligne %d (%s), fin du fichier ignorée",
+                               chemin, numero, erreur)
+
+        if en_attente is not None:
+            enregistrement = decoder_ligne(chemin, numero, en_attente, tolerer=derniere_partie)
+            if enregistrement is not None:
+                yield enregistrement
+
+
+def decoder_ligne(chemin, numero, ligne, tolerer):
+    """
+    Décode une ligne JSON d'un flux
+
+    Args:
+        chemin: Chemin du fichier, pour le message d'avertissement
+        numero: Numéro de la ligne dans le fichier (à partir de 1)
+        ligne: Texte de la ligne
+        tolerer: True pour ignorer sans avertissement une ligne invalide
+
+    Returns:
+        dict | None: Enregistrement, None pour une ligne vide ou invalide
+    """
+    if not ligne.strip():
+        return None
+    try:
+        return json.loads(ligne)
+    except json.JSONDecodeError as erreur:
+        if not tolerer:
+            logger.warning("Flux %s: ligne %d illisible ignorée (%s)", chemin, numero, erreur)
+        return None
+
+
+def lire_flux(base, dossier="."):
+    """
+    Lit tous les enregistrements d'un flux en streaming
+
+    Args:
+        base: Nom de base des fichiers (ex: "books_by_categories")
+        dossier: Dossier contenant les fichiers
+
+    Yields:
+        dict: Enregistrements du flux, dans l'ordre des parties
+    """
+    fichiers = fichiers_flux(base, dossier)
+    for position, chemin in enumerate(fichiers, start=1):
+        yield from lire_fichier(chemin, derniere_partie=position == len(fichiers))
+
+
+def flux_existe(base, dossier="."):
+    """
+    Indique si un flux est disponible, quel que soit son format
+
+    Args:
+        base: Nom de base des fichiers
+        dossier: Dossier contenant les fichiers
+
+    Returns:
+        bool: True si au moins un fichier du flux existe
+    """
+    return bool(fichiers_flux(base, dossier))
+
+
+def lire_flux_memoire(base, dossier="."):
+    """
+    Lit un flux en le gardant en mémoire tant que ses fichiers ne changent pas
+
+    Utilisé par le service de crawl résident pour ne pas re-décoder les
+    graines à chaque travail. Le cache est invalidé par la signature
+    (chemin, date de modification, taille) des fichiers du flux.
+
+    Args:
+        base: Nom de base des fichiers
+        dossier: Dossier contenant les fichiers
+
+    Returns:
+        list: Enregistrements du flux
+    """
+    fichiers = fichiers_flux(base, dossier)
+    signature = []
+    for chemin in fichiers:
+        etat = os.stat(chemin)
+        signature.append((chemin, etat.st_mtime_ns, etat.st_size))
+    signature = tuple(signature)
+
+    en_cache = _cache_flux.get((dossier, base))
+    if en_cache and en_cache[0] == signature:
+        return en_cache[1]
+
+    enregistrements = [enregistrement
+                       for position, chemin in enumerate(fichiers, start=1)
+                       for enregistrement in lire_fichier(chemin, derniere_partie=position == len(fichiers))]
+    _cache_flux[(dossier, base)] = (signature, enregistrements)
+    return enregistrements
+
+
+def lecteur_flux(settings):
+    """
+    Choisit la fonction de lecture des flux selon FLUX_CACHE_MEMOIRE
+
+    Args:
+        settings: Settings Scrapy du crawler
+
+    Returns:
+        callable: lire_flux_memoire dans un processus résident, sinon lire_flux
+    """
+    if settings.getbool("FLUX_CACHE_MEMOIRE"):
+        return lire_flux_memoire
+    return lire_flux
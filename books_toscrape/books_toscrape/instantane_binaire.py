@@ -0,0 +1,663 @@
+"""
+Instantané binaire des livres, projeté en mémoire (mmap) par l'API
+
+À la fin d'un crawl, le flux des livres est converti une fois en un fichier
+binaire que chaque worker de l'API projette en lecture seule, sans
+décompression ni décodage JSON. Les pages du fichier sont partagées entre
+les workers par le cache de pages du système.
+
+Format (little-endian, sections alignées sur 8 octets) :
+
+    en-tête      magique, version du format, nombre de livres, de tableaux,
+                 de chaînes et d'index, chaîne de signature, position des tables
+    descripteurs nom, type (code array), taille et position de chaque tableau,
+                 puis nom, nombre de clés et positions de chaque index
+    colonnes     un tableau de largeur fixe par champ de Book : les nombres
+                 directement, les chaînes par leur indice dans la table ;
+                 d'autres tableaux peuvent suivre (ajoutés par l'écrivain)
+    index        facultatifs : clés (indices de chaînes triées par octets),
+                 début de la liste de chaque clé, listes de positions ("I")
+    table        positions de début des chaînes (nombre de chaînes + 1)
+    chaînes      chaînes UTF-8 distinctes, bout à bout
+
+Une chaîne répétée (catégorie, fil d'Ariane, type) n'est stockée qu'une fois.
+La signature est celle du flux converti : un instantané dont la signature ne
+correspond plus aux fichiers du flux est ignoré.
+
+Le fichier est écrit à côté puis renommé : un worker qui projette l'ancien
+instantané le garde intact jusqu'à sa fermeture.
+
+Ce module n'utilise que la bibliothèque standard : il est aussi importé par l'API.
+"""
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+from .flux import flux_existe, lire_flux, signature_flux
+
+logger = logging.getLogger(__name__)
+
+FICHIER_INSTANTANE = "livres.bin"
+
+# Flux des livres, par ordre de priorité (le premier présent est converti)
+FLUX_LIVRES = ("books_by_categories", "detail_books")
+
+MAGIQUE = b"LIVRBIN\x00"
+VERSION_FORMAT = 2
+
+# magique, version, livres, tableaux, chaînes, index, indice signature, position table, position chaînes
+EN_TETE = struct.Struct("<8sIIIIIIQQ")
+# nom, code du type, nombre de valeurs, position du tableau
+DESCRIPTEUR = struct.Struct("<24s1s3xIQ")
+# nom, nombre de clés, position des clés, des débuts de listes et des listes
+DESCRIPTEUR_INDEX = struct.Struct("<24sI4xQQQ")
+
+# Colonnes, dans l'ordre des champs de Book. "s" : indice dans la table des chaînes ("I")
+COLONNES = (
+    ("id", "q"),
+    ("url_page", "s"),
+    ("categorie", "s"),
+    ("title", "s"),
+    ("prix_numerique", "d"),
+    ("note_etoiles_nombre", "i"),
+    ("nombre_avis_clients", "i"),
+    ("en_stock", "?"),
+    ("nombre_stock", "i"),
+    ("description", "s"),
+    ("url_image", "s"),
+    ("nom_fichier_image", "s"),
+    ("alt_image", "s"),
+    ("fil_ariane", "s"),
+    ("code_upc", "s"),
+    ("type_produit", "s"),
+    ("taxe", "d"),
+    ("nombre_avis", "i"),
+)
+NOMS_COLONNES = tuple(nom for nom, _ in COLONNES)
+
+# Identifiant absent (id null dans le flux)
+ID_ABSENT = -(2 ** 63)
+
+# Colonnes dont les valeurs se répètent : décodées une fois par valeur distincte
+COLONNES_REPETEES = ("categorie", "fil_ariane", "type_produit")
+
+
+def normaliser_livre(enregistrement, numero):
+    """
+    Convertit un enregistrement du flux en champs de Book
+
+    Accepte les noms de champs du spider (titre, prix_numerique...) comme les
+    noms anglais des anciens flux.
+
+    Args:
+        enregistrement: Enregistrement JSON du flux
+        numero: Identifiant attribué si l'enregistrement n'en a pas
+
+    Returns:
+        dict: Valeur de chaque champ de Book
+    """
+    categorie = enregistrement.get('categorie') or enregistrement.get('category', '')
+
+    try:
+        prix = float(enregistrement.get('prix_numerique', enregistrement.get('price', 0.0)))
+    except (ValueError, TypeError):
+        prix = 0.0
+
+    try:
+        note = int(enregistrement.get('note_etoiles', enregistrement.get('star_rating', 0)))
+    except (ValueError, TypeError):
+        note = 0
+
+    disponibilite = enregistrement.get('disponibilite', enregistrement.get('availability', ''))
+
+    return {
+        "id": enregistrement.get('id', numero),
+        "url_page": enregistrement.get('url_page', enregistrement.get('url', '')),
+        "categorie": categorie,
+        "title": enregistrement.get('titre', enregistrement.get('title', '')),
+        "prix_numerique": prix,
+        "note_etoiles_nombre": note,
+        "nombre_avis_clients": int(enregistrement.get('nombre_avis', enregistrement.get('reviews', 0))),
+        "en_stock": 'in stock' in disponibilite.lower(),
+        "nombre_stock": int(enregistrement.get('nombre_stock', 0)),
+        "description": enregistrement.get('description', ''),
+        "url_image": enregistrement.get('url_image', enregistrement.get('image_url', '')),
+        "nom_fichier_image": '',
+        "alt_image": '',
+        "fil_ariane": str(enregistrement.get('fil_ariane', [])),
+        "code_upc": enregistrement.get('code_upc', ''),
+        "type_produit": enregistrement.get('type_produit', 'Books'),
+        "taxe": float(enregistrement.get('taxe', 0.0)),
+        "nombre_avis": int(enregistrement.get('nombre_avis', 0)),
+    }
+
+
+def aligner(position):
+    """
+    Arrondit une position au multiple de 8 supérieur
+
+    Args:
+        position: Position en octets
+
+    Returns:
+        int: Position alignée
+    """
+    return (position + 7) & ~7
+
+
+def en_little_endian(colonne):
+    """
+    Retourne les octets d'une colonne en little-endian, quel que soit le processeur
+
+    Args:
+        colonne: array de la colonne
+
+    Returns:
+        bytes: Octets de la colonne
+    """
+    if sys.byteorder != "little" and colonne.itemsize > 1:
+        colonne = array(colonne.typecode, colonne)
+        colonne.byteswap()
+    return colonne.tobytes()
+
+
+class TableChaines:
+    """
+    Chaînes distinctes de l'instantané, numérotées dans l'ordre d'ajout
+    """
+
+    def __init__(self):
+        self.indices = {}
+        self.positions = array("Q", [0])
+        self.donnees = bytearray()
+
+    def indice(self, chaine):
+        """
+        Retourne l'indice d'une chaîne, en l'ajoutant à la table si elle est nouvelle
+
+        Args:
+            chaine: Chaîne à stocker (None est stocké comme une chaîne vide)
+
+        Returns:
+            int: Indice de la chaîne
+        """
+        chaine = chaine or ""
+        indice = self.indices.get(chaine)
+        if indice is None:
+            indice = self.indices[chaine] = len(self.indices)
+            self.donnees += chaine.encode("utf-8")
+            self.positions.append(len(self.donnees))
+        return indice
+
+
+def ecrire_instantane(chemin, livres, signature="", tableaux=None, index=None):
+    """
+    Écrit un instantané binaire, dans un fichier temporaire renommé à la fin
+
+    Args:
+        chemin: Chemin de l'instantané
+        livres: Livres normalisés (dicts produits par normaliser_livre)
+        signature: Signature du flux converti
+        tableaux: Tableaux supplémentaires (nom -> array), écrits après les colonnes
+        index: Index inversés (nom -> clé -> positions croissantes)
+
+    Returns:
+        int: Nombre de livres écrits
+    """
+    chaines = TableChaines()
+    indice_signature = chaines.indice(signature)
+    codes = dict(COLONNES)
+    colonnes = {nom: array("I" if code == "s" else "b" if code == "?" else code) for nom, code in COLONNES}
+
+    nombre = 0
+    for livre in livres:
+        for nom, code in COLONNES:
+            valeur = livre.get(nom)
+            if code == "s":
+                colonnes[nom].append(chaines.indice(valeur))
+            elif nom == "id":
+                colonnes[nom].append(ID_ABSENT if valeur is None else valeur)
+            else:
+                colonnes[nom].append(valeur or 0)
+        nombre += 1
+    tableaux = {**colonnes, **(tableaux or {})}
+
+    # Index : clés triées par octets (recherche dichotomique à la lecture), listes bout à bout
+    sections_index = []
+    for nom, listes in (index or {}).items():
+        cles = sorted(listes, key=lambda cle: cle.encode("utf-8"))
+        debuts = array("Q", [0])
+        positions_listes = array("I")
+        for cle in cles:
+            positions_listes.extend(listes[cle])
+            debuts.append(len(positions_listes))
+        sections_index.append((nom, array("I", map(chaines.indice, cles)), debuts, positions_listes))
+
+    # Positions des sections, dans l'ordre d'écriture
+    blocs = list(tableaux.values())
+    for _, cles, debuts, positions_listes in sections_index:
+        blocs += [cles, debuts, positions_listes]
+    blocs.append(chaines.positions)
+    position = aligner(EN_TETE.size + DESCRIPTEUR.size * len(tableaux) + DESCRIPTEUR_INDEX.size * len(sections_index))
+    positions = []
+    for bloc in blocs:
+        positions.append(position)
+        position = aligner(position + len(bloc) * bloc.itemsize)
+    position_chaines = position
+
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    try:
+        with open(temporaire, "wb") as fichier:
+            fichier.write(EN_TETE.pack(MAGIQUE, VERSION_FORMAT, nombre, len(tableaux), len(chaines.indices),
+                                       len(sections_index), indice_signature, positions[-1], position_chaines))
+            for (nom, valeurs), position in zip(tableaux.items(), positions):
+                code = codes.get(nom, valeurs.typecode)
+                fichier.write(DESCRIPTEUR.pack(nom.encode("ascii"), code.encode("ascii"), len(valeurs), position))
+            for numero, (nom, cles, _, _) in enumerate(sections_index):
+                premier = len(tableaux) + 3 * numero
+                fichier.write(DESCRIPTEUR_INDEX.pack(nom.encode("ascii"), len(cles), *positions[premier:premier + 3]))
+            for bloc, position in zip(blocs, positions):
+                fichier.write(b"\0" * (position - fichier.tell()))
+                fichier.write(en_little_endian(bloc))
+            fichier.write(b"\0" * (position_chaines - fichier.tell()))
+            fichier.write(chaines.donnees)
+            fichier.flush()
+            os.fsync(fichier.fileno())
+        os.replace(temporaire, chemin)
+    except BaseException:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+    return nombre
+
+
+class IndexChaines(Mapping):
+    """
+    Index inversé d'un instantané : clé -> positions, lu dans la projection sans copie
+    """
+
+    def __init__(self, instantane, cles, debuts, positions):
+        """
+        Initialiser l'index sur ses sections
+
+        Args:
+            instantane: Instantané contenant la table des chaînes
+            cles: Indices des clés dans la table, triées par octets
+            debuts: Début de la liste de chaque clé dans positions (nombre de clés + 1)
+            positions: Listes de positions, bout à bout
+        """
+        self.instantane = instantane
+        self.cles = cles
+        self.debuts = debuts
+        self.positions = positions
+
+    def octets_cle(self, numero):
+        """
+        Octets de la clé de rang numero, comparés par la recherche dichotomique
+        """
+        return bytes(self.instantane.octets(self.cles[numero]))
+
+    def __getitem__(self, cle):
+        octets = cle.encode("utf-8")
+        numero = bisect_left(range(len(self.cles)), octets, key=self.octets_cle)
+        if numero == len(self.cles) or self.octets_cle(numero) != octets:
+            raise KeyError(cle)
+        return self.positions[self.debuts[numero]:self.debuts[numero + 1]]
+
+    def __iter__(self):
+        return (self.instantane.chaine(indice) for indice in self.cles)
+
+    def __len__(self):
+        return len(self.cles)
+
+
+class InstantaneLivres:
+    """
+    Instantané binaire projeté en lecture seule
+
+    Les colonnes sont des memoryview sur la projection : aucune copie, aucun
+    décodage avant la lecture d'une valeur.
+    """
+
+    def __init__(self, chemin):
+        """
+        Projette un instantané et vérifie son en-tête
+
+        Args:
+            chemin: Chemin de l'instantané
+
+        Raises:
+            ValueError: Si le fichier n'est pas un instantané de cette version du format
+        """
+        self.chemin = chemin
+        with open(chemin, "rb") as fichier:
+            self.projection = mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        self.vue = memoryview(self.projection)
+        try:
+            self.lire_en_tete()
+        except Exception:
+            self.fermer()
+            raise
+
+    def lire_en_tete(self):
+        """
+        Lit l'en-tête, les descripteurs et la table des chaînes
+
+        Raises:
+            ValueError: Si l'en-tête ou les descripteurs sont invalides
+        """
+        if len(self.vue) < EN_TETE.size:
+            raise ValueError(f"Instantané tronqué: {self.chemin}")
+        (magique, version, self.nombre_livres, nombre_tableaux, self.nombre_chaines, nombre_index,
+         indice_signature, position_table, self.position_chaines) = EN_TETE.unpack_from(self.vue)
+        if magique != MAGIQUE or version != VERSION_FORMAT:
+            raise ValueError(f"Format d'instantané non supporté: {self.chemin}")
+
+        self.colonnes = {}
+        self.codes = {}
+        for numero in range(nombre_tableaux):
+            nom, code, nombre, position = DESCRIPTEUR.unpack_from(self.vue, EN_TETE.size + numero * DESCRIPTEUR.size)
+            nom, code = nom.rstrip(b"\0").decode("ascii"), code.decode("ascii")
+            self.codes[nom] = code
+            self.colonnes[nom] = self.projeter(position, "I" if code == "s" else code, nombre)
+        if tuple(self.colonnes)[:len(NOMS_COLONNES)] != NOMS_COLONNES:
+            raise ValueError(f"Colonnes d'instantané inattendues: {self.chemin}")
+        # Colonnes d'un livre, dans l'ordre de NOMS_COLONNES ("id" en premier)
+        self.colonnes_livre = [(self.colonnes[nom], self.codes[nom]) for nom in NOMS_COLONNES]
+
+        self.positions = self.projeter(position_table, "Q", self.nombre_chaines + 1)
+        self.signature = self.chaine(indice_signature)
+
+        self.index_chaines = {}
+        debut_index = EN_TETE.size + nombre_tableaux * DESCRIPTEUR.size
+        for numero in range(nombre_index):
+            nom, nombre_cles, position_cles, position_debuts, position_listes = DESCRIPTEUR_INDEX.unpack_from(
+                self.vue, debut_index + numero * DESCRIPTEUR_INDEX.size)
+            debuts = self.projeter(position_debuts, "Q", nombre_cles + 1)
+            self.index_chaines[nom.rstrip(b"\0").decode("ascii")] = IndexChaines(
+                self, self.projeter(position_cles, "I", nombre_cles), debuts,
+                self.projeter(position_listes, "I", debuts[nombre_cles]))
+
+    def projeter(self, position, code, nombre):
+        """
+        Vue typée sur une section du fichier, sans copie (copie retournée sur un processeur big-endian)
+
+        Args:
+            position: Position de la section
+            code: Code array du type
+            nombre: Nombre de valeurs
+
+        Returns:
+            memoryview | array: Valeurs de la section
+        """
+        taille = struct.calcsize(code) * nombre
+        if position + taille > len(self.vue):
+            raise ValueError(f"Instantané tronqué: {self.chemin}")
+        section = self.vue[position:position + taille]
+        if sys.byteorder == "little" or struct.calcsize(code) == 1:
+            return section.cast(code)
+        valeurs = array("b" if code == "?" else code, section.tobytes())
+        valeurs.byteswap()
+        return valeurs
+
+    def __len__(self):
+        return self.nombre_livres
+
+    def colonne(self, nom):
+        """
+        Colonne de largeur fixe d'un champ
+
+        Args:
+            nom: Nom du champ (chaînes : indices dans la table)
+
+        Returns:
+            memoryview: Valeurs de la colonne, une par livre
+        """
+        return self.colonnes[nom]
+
+    def index(self, nom):
+        """
+        Index inversé écrit avec l'instantané
+
+        Args:
+            nom: Nom de l'index
+
+        Returns:
+            IndexChaines: Clé -> positions
+        """
+        return self.index_chaines[nom]
+
+    def octets(self, indice):
+        """
+        Octets UTF-8 d'une chaîne de la table, sans copie
+
+        Args:
+            indice: Indice de la chaîne
+
+        Returns:
+            memoryview: Octets de la chaîne
+        """
+        debut = self.position_chaines + self.positions[indice]
+        fin = self.position_chaines + self.positions[indice + 1]
+        return self.vue[debut:fin]
+
+    def chaine(self, indice):
+        """
+        Décode une chaîne de la table
+
+        Args:
+            indice: Indice de la chaîne
+
+        Returns:
+            str: Chaîne décodée
+        """
+        return str(self.octets(indice), "utf-8")
+
+    def valeur(self, nom, position):
+        """
+        Valeur décodée d'un champ pour un livre
+
+        Args:
+            nom: Nom du champ
+            position: Rang du livre dans l'instantané
+
+        Returns:
+            Valeur du champ (None pour un identifiant absent)
+        """
+        valeur = self.colonnes[nom][position]
+        code = self.codes[nom]
+        if code == "s":
+            return self.chaine(valeur)
+        if code == "?":
+            return bool(valeur)
+        if nom == "id" and valeur == ID_ABSENT:
+            return None
+        return valeur
+
+    def ligne(self, position):
+        """
+        Valeurs d'un livre, sans décoder les autres
+
+        Args:
+            position: Rang du livre dans l'instantané
+
+        Returns:
+            tuple: Valeurs dans l'ordre de NOMS_COLONNES
+        """
+        valeurs = []
+        for colonne, code in self.colonnes_livre:
+            valeur = colonne[position]
+            if code == "s":
+                valeur = self.chaine(valeur)
+            elif code == "?":
+                valeur = bool(valeur)
+            valeurs.append(valeur)
+        if valeurs[0] == ID_ABSENT:
+            valeurs[0] = None
+        return tuple(valeurs)
+
+    def valeurs(self, nom):
+        """
+        Valeurs d'un champ pour tous les livres, dans l'ordre de l'instantané
+
+        Args:
+            nom: Nom du champ
+
+        Returns:
+            list: Valeurs décodées
+        """
+        colonne = self.colonnes[nom]
+        code = self.codes[nom]
+        if code != "s":
+            valeurs = colonne.tolist()
+            if nom == "id":
+                return [None if valeur == ID_ABSENT else valeur for valeur in valeurs]
+            return [bool(valeur) for valeur in valeurs] if code == "?" else valeurs
+
+        if nom in COLONNES_REPETEES:
+            decodees = {}
+            return [decodees[indice] if indice in decodees else decodees.setdefault(indice, self.chaine(indice))
+                    for indice in colonne]
+        return [self.chaine(indice) for indice in colonne]
+
+    def lignes(self):
+        """
+        Livres de l'instantané, colonne par colonne puis transposés
+
+        Returns:
+            Iterator[tuple]: Valeurs de chaque livre, dans l'ordre de NOMS_COLONNES
+        """
+        return zip(*(self.valeurs(nom) for nom in NOMS_COLONNES))
+
+    def fermer(self):
+        """
+        Libère les vues et la projection
+
+        Une colonne encore référencée par l'appelant garde la projection
+        ouverte : elle est alors libérée avec la dernière vue.
+        """
+        self.colonnes = {}
+        self.colonnes_livre = []
+        self.index_chaines = {}
+        self.positions = None
+        try:
+            self.vue.release()
+            self.projection.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def flux_livres(dossier="."):
+    """
+    Trouve le flux des livres à convertir
+
+    Args:
+        dossier: Dossier des flux
+
+    Returns:
+        str | None: Nom de base du premier flux présent de FLUX_LIVRES
+    """
+    for base in FLUX_LIVRES:
+        if flux_existe(base, dossier):
+            return base
+    return None
+
+
+def ouvrir_instantane(dossier=".", fichier=FICHIER_INSTANTANE):
+    """
+    Projette l'instantané d'un dossier s'il correspond encore au flux des livres
+
+    Args:
+        dossier: Dossier des flux et de l'instantané
+        fichier: Nom de l'instantané
+
+    Returns:
+        InstantaneLivres | None: Instantané à jour, None s'il est absent, illisible ou périmé
+    """
+    chemin = os.path.join(dossier, fichier)
+    if not os.path.exists(chemin):
+        return None
+    try:
+        instantane = InstantaneLivres(chemin)
+    except (OSError, ValueError) as e:
+        logger.warning("Instantané %s ignoré: %s", chemin, e)
+        return None
+
+    base = flux_livres(dossier)
+    if base is not None and signature_flux(base, dossier) != instantane.signature:
+        instantane.fermer()
+        return None
+    return instantane
+
+
+def construire_instantane(dossier=".", fichier=FICHIER_INSTANTANE):
+    """
+    Convertit le flux des livres d'un dossier en instantané binaire
+
+    Args:
+        dossier: Dossier des flux et de l'instantané
+        fichier: Nom de l'instantané
+
+    Returns:
+        int | None: Nombre de livres écrits, None sans flux des livres
+    """
+    base = flux_livres(dossier)
+    if base is None:
+        return None
+    # Signature lue avant les livres : un flux modifié pendant la conversion rend l'instantané périmé
+    signature = signature_flux(base, dossier)
+    livres = (normaliser_livre(enregistrement, numero)
+              for numero, enregistrement in enumerate(lire_flux(base, dossier), start=1))
+    return ecrire_instantane(os.path.join(dossier, fichier), livres, signature)
+
+
+class InstantaneFinCrawl:
+    """
+    Extension Scrapy écrivant l'instantané binaire quand le crawl est terminé
+    """
+
+    def __init__(self, dossier, fichier):
+        self.dossier = dossier
+        self.fichier = fichier
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        from scrapy import signals
+        from scrapy.exceptions import NotConfigured
+
+        if not crawler.settings.getbool('INSTANTANE_BINAIRE_ACTIF'):
+            raise NotConfigured
+
+        extension = cls(
+            crawler.settings.get('INSTANTANE_BINAIRE_DOSSIER', '.'),
+            crawler.settings.get('INSTANTANE_BINAIRE_FICHIER', FICHIER_INSTANTANE)
+        )
+        # Après spider_closed : les flux et detail_books.json sont fermés
+        crawler.signals.connect(extension.engine_stopped, signal=signals.engine_stopped)
+        return extension
+
+    def engine_stopped(self):
+        try:
+            nombre = construire_instantane(self.dossier, self.fichier)
+        except Exception:
+            logger.exception("Écriture de l'instantané binaire impossible")
+            return
+        if nombre is not None:
+            logger.info("Instantané binaire écrit: %s livres (%s)", nombre, os.path.join(self.dossier, self.fichier))
+
+
+if __name__ == "__main__":
+    # Conversion manuelle des flux existants : python -m books_toscrape.instantane_binaire [dossier]
+    logging.basicConfig(level=logging.INFO)
+    print(construire_instantane(sys.argv[1] if len(sys.argv) > 1 else "."))
@@ -0,0 +1,158 @@
+"""
+Journalisation échantillonnée et asynchrone du chemin critique du crawl
+
+Les événements par item (livre traité, livre enregistré...) ne sont écrits
+qu'à un taux d'échantillonnage ; tous sont comptés et les compteurs sont
+journalisés périodiquement. Les handlers d'écriture (console, fichier) sont
+déplacés derrière une file : le formatage et les entrées/sorties se font dans
+le thread du QueueListener, pas dans le thread du reactor.
+
+Activé par l'extension JournalisationEchantillonnee (LOG_ECHANTILLONNAGE_ACTIF).
+"""
+import atexit
+import logging
+import queue
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+logger = logging.getLogger(__name__)
+
+
+class EchantillonneurEvenements:
+    """
+    Compte les événements par item et n'en journalise qu'une fraction
+    """
+
+    def __init__(self, taux=1.0):
+        """
+        Initialise l'échantillonneur
+
+        Args:
+            taux: Fraction des événements journalisés (1.0 = tous)
+        """
+        self.compteurs = Counter()
+        self.configurer(taux)
+
+    def configurer(self, taux):
+        """
+        Change le taux d'échantillonnage
+
+        Args:
+            taux: Fraction des événements journalisés, entre 0 et 1
+        """
+        # Echantillonnage déterministe : un événement sur "periode" est écrit
+        self.periode = max(1, round(1 / taux)) if taux > 0 else 0
+
+    def evenement(self, journal, nom, message, *args):
+        """
+        Compte un événement et le journalise s'il est échantillonné
+
+        Le message utilise le formatage paresseux de logging (%s) : il n'est
+        formaté que pour les événements effectivement écrits.
+
+        Args:
+            journal: Logger du spider ou du pipeline
+            nom: Nom de l'événement (clé du compteur)
+            message: Message au format logging
+            *args: Arguments du message
+        """
+        self.compteurs[nom] += 1
+        if self.periode and self.compteurs[nom] % self.periode == 1 % self.periode:
+            journal.info(message, *args, extra={'evenement': nom})
+
+    def vider(self, journal=logger):
+        """
+        Journalise les compteurs accumulés depuis le dernier vidage puis les remet à zéro
+
+        Args:
+            journal: Logger utilisé pour la ligne de synthèse
+        """
+        if not self.compteurs:
+            return
+        synthese = ", ".join(f"{nom}={nombre}" for nom, nombre in sorted(self.compteurs.items()))
+        journal.info("Compteurs d'événements: %s", synthese)
+        self.compteurs.clear()
+
+
+# Instance partagée par les spiders et les pipelines du processus
+echantillonneur = EchantillonneurEvenements()
+
+
+class QueueHandlerDiffere(QueueHandler):
+    """
+    QueueHandler qui ne formate pas le message dans le thread appelant
+
+    La file est interne au processus : le record est transmis tel quel et
+    formaté par les handlers du QueueListener.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+_ecouteur = None
+
+
+def installer_journalisation_asynchrone():
+    """
+    Déplace les handlers d'écriture du logger racine derrière une file
+
+    Les handlers qui ne font pas d'entrée/sortie (compteurs de logs Scrapy)
+    restent attachés directement. L'installation n'a lieu qu'une fois par processus.
+    """
+    global _ecouteur
+    if _ecouteur is not None:
+        return
+
+    racine = logging.getLogger()
+    handlers_es = [handler for handler in racine.handlers if isinstance(handler, logging.StreamHandler)]
+    if not handlers_es:
+        return
+
+    file_logs = queue.SimpleQueue()
+    for handler in handlers_es:
+        racine.removeHandler(handler)
+    racine.addHandler(QueueHandlerDiffere(file_logs))
+
+    _ecouteur = QueueListener(file_logs, *handlers_es, respect_handler_level=True)
+    _ecouteur.start()
+    # Vide la file avant la fin du processus
+    atexit.register(_ecouteur.stop)
+
+
+class JournalisationEchantillonnee:
+    """
+    Extension Scrapy activant l'échantillonnage et les handlers asynchrones
+    """
+
+    def __init__(self, taux, intervalle):
+        self.intervalle = intervalle
+        self.tache_vidage = None
+        echantillonneur.configurer(taux)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('LOG_ECHANTILLONNAGE_ACTIF'):
+            raise NotConfigured
+
+        extension = cls(
+            crawler.settings.getfloat('LOG_ECHANTILLON_TAUX', 0.01),
+            crawler.settings.getfloat('LOG_COMPTEURS_INTERVALLE', 30.0)
+        )
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_opened(self, spider):
+        installer_journalisation_asynchrone()
+        self.tache_vidage = task.LoopingCall(echantillonneur.vider, spider.logger)
+        self.tache_vidage.start(self.intervalle, now=False)
+
+    def spider_closed(self, spider):
+        if self.tache_vidage and self.tache_vidage.running:
+            self.tache_vidage.stop()
+        echantillonneur.vider(spider.logger)
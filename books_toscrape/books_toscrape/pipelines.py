@@ -5,8 +5,13 @@
 
 
 # useful for handling different item types with a single interface
+import logging
+
 from itemadapter import ItemAdapter
 
+from .dead_letters import DeadLetterStore, FICHIER_DEAD_LETTERS
+from .journalisation import echantillonneur
+
 
 class BooksToscrapePipeline:
     def process_item(self, item, spider):
@@ -28,9 +33,20 @@ class PriceToEurosPipeline:
 class PostgreSQLPipeline:
     """Pipeline pour sauvegarder directement en base PostgreSQL"""
 
-    def __init__(self):
+    tables_verifiees = False
+
+    def __init__(self, fichier_dead_letters=FICHIER_DEAD_LETTERS, commit_par_lot=False):
         self.compteur_nouveaux = 0
         self.compteur_mises_a_jour = 0
+        self.compteur_echecs = 0
+        self.dead_letters = DeadLetterStore(fichier_dead_letters)
+        # Rejeu par lots : un savepoint par item, un commit par lot (valider_lot)
+        self.commit_par_lot = commit_par_lot
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Crée le pipeline avec le fichier dead-letter configuré"""
+        return cls(crawler.settings.get('DEAD_LETTER_FICHIER', FICHIER_DEAD_LETTERS))
 
     def open_spider(self, spider):
         """Initialise la connexion à la base de données"""
@@ -46,19 +62,37 @@ class PostgreSQLPipeline:
 
             from database_config import SessionLocal, create_tables
             from api.models.book_sql import BookSQL
-
-            # Crée les tables si elles n'existent pas
-            create_tables()
+            # Importé pour que create_tables crée aussi la table dataset_metadata
+            from api.repositories.dataset_version_repository import DatasetVersionRepository
+            from api.repositories.statistiques_categories_repository import StatistiquesCategoriesRepository
 
             self.session = SessionLocal()
             self.BookSQL = BookSQL
+            self.DatasetVersionRepository = DatasetVersionRepository
+            self.StatistiquesCategoriesRepository = StatistiquesCategoriesRepository
+
+            # Crée les tables si elles n'existent pas (une seule fois par processus,
+            # le service de crawl résident enchaîne plusieurs crawls)
+            if not PostgreSQLPipeline.tables_verifiees:
+                create_tables()
+                # Vue matérialisée des agrégats par catégorie, rafraîchie en fin de crawl
+                StatistiquesCategoriesRepository(self.session).creer_vue()
+                PostgreSQLPipeline.tables_verifiees = True
             spider.logger.info("Pipeline PostgreSQL: Connexion établie")
 
     def close_spider(self, spider):
         """Ferme la connexion à la base de données"""
         if spider.name == 'details_book_spider' and hasattr(self, 'session'):
+            # Agrégats recalculés, puis nouvelle version du jeu de données qui invalide les caches de l'API
+            try:
+                self.StatistiquesCategoriesRepository(self.session).rafraichir_vue()
+                version = self.DatasetVersionRepository(self.session).incrementer_version()
+                spider.logger.info(f"Pipeline PostgreSQL: version du jeu de données passée à {version}")
+            except Exception as e:
+                self.session.rollback()
+                spider.logger.error(f"Pipeline PostgreSQL: impossible de publier la fin du crawl (agrégats, version): {e}")
             self.session.close()
-            spider.logger.info(f"Pipeline PostgreSQL fermé - {self.compteur_nouveaux} nouveaux, {self.compteur_mises_a_jour} mises à jour")
+            spider.logger.info(f"Pipeline PostgreSQL fermé - {self.compteur_nouveaux} nouveaux, {self.compteur_mises_a_jour} mises à jour, {self.compteur_echecs} en dead-letter")
 
     def process_item(self, item, spider):
         """Sauvegarde directement en base PostgreSQL (table propre - nouveaux livres uniquement)"""
@@ -66,22 +100,58 @@ class PostgreSQLPipeline:
             return item
 
         adapter = ItemAdapter(item)
+        savepoint = self.session.begin_nested() if self.commit_par_lot else None
 
         try:
-            # Création directe de nouveaux livres (table nettoyée)
-            self.creer_nouveau_livre(adapter)
-            self.compteur_nouveaux += 1
-            spider.logger.info(f"PostgreSQL: Nouveau #{self.compteur_nouveaux}: {adapter.get('titre', 'Inconnu')}")
-
-            # Commit des changements
-            self.session.commit()
+            # Re-crawl ciblé : la table n'a pas été nettoyée, mise à jour si le livre existe
+            livre_existant = None
+            if self.mode_incremental(spider):
+                livre_existant = self.session.query(self.BookSQL).filter(
+                    self.BookSQL.url_page == adapter.get('url_page')
+                ).first()
+
+            if livre_existant:
+                self.mettre_a_jour_livre(livre_existant, adapter)
+                self.compteur_mises_a_jour += 1
+                echantillonneur.evenement(spider.logger, "postgresql_mise_a_jour", "PostgreSQL: Mise à jour #%d: %s",
+                                          self.compteur_mises_a_jour, adapter.get('titre', 'Inconnu'))
+            else:
+                # Création directe de nouveaux livres (table nettoyée)
+                self.creer_nouveau_livre(adapter)
+                self.compteur_nouveaux += 1
+                echantillonneur.evenement(spider.logger, "postgresql_nouveau", "PostgreSQL: Nouveau #%d: %s",
+                                          self.compteur_nouveaux, adapter.get('titre', 'Inconnu'))
+
+            # Commit des changements (en mode lot, seul le savepoint de l'item est libéré)
+            if savepoint is not None:
+                savepoint.commit()
+            else:
+                self.session.commit()
 
         except Exception as e:
             spider.logger.error(f"PostgreSQL Pipeline erreur: {e}")
-            self.session.rollback()
+            if savepoint is not None:
+                savepoint.rollback()
+            else:
+                self.session.rollback()
+            # Conserve l'item pour un rejeu ultérieur au lieu de le perdre
+            self.compteur_echecs += 1
+            self.dead_letters.enregistrer_item(dict(adapter), spider, e)
 
         return item
 
+    def valider_lot(self):
+        """Valide en une transaction les items d'un lot de rejeu"""
+        try:
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def mode_incremental(self, spider):
+        """Indique si le spider complète une base existante (graines ou rejeu)"""
+        return bool(getattr(spider, 'graines', None) or getattr(spider, 'rejeu', None))
+
     def creer_nouveau_livre(self, adapter):
         """Crée un nouveau livre en base"""
         import json
@@ -149,17 +219,27 @@ class PostgreSQLPipeline:
 class DetailsBooksUpdatePipeline:
     """Pipeline pour gérer les mises à jour de detail_books.json avec gestion des doublons"""
 
-    def __init__(self):
+    def __init__(self, intervalle_sauvegarde=100):
         self.fichier_sauvegarde = "detail_books.json"
         self.donnees_existantes = []
         self.index_url = {}  # Index par URL pour accès rapide
         self.nouvelles_donnees = []
         self.compteur_nouvelles = 0
         self.compteur_mises_a_jour = 0
+        # Le fichier complet est réécrit tous les N livres, pas à chaque livre
+        self.intervalle_sauvegarde = max(1, intervalle_sauvegarde)
+        self.items_depuis_sauvegarde = 0
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Crée le pipeline avec l'intervalle de sauvegarde configuré"""
+        return cls(crawler.settings.getint('DETAILS_SAUVEGARDE_INTERVALLE', 100))
 
     def open_spider(self, spider):
         """Charge les données existantes au démarrage du spider"""
         if spider.name == 'details_book_spider':
+            self.logger = spider.logger
             self.charger_donnees_existantes()
 
     def charger_donnees_existantes(self):
@@ -178,9 +258,9 @@ class DetailsBooksUpdatePipeline:
                     if url:
                         self.index_url[url] = i
 
-                print(f"Pipeline: Chargé {len(self.donnees_existantes)} livres existants")
+                self.logger.info("Pipeline: Chargé %d livres existants", len(self.donnees_existantes))
             except json.JSONDecodeError as e:
-                print(f"Pipeline: Erreur lecture JSON: {e}")
+                self.logger.error("Pipeline: Erreur lecture JSON: %s", e)
                 self.donnees_existantes = []
 
     def process_item(self, item, spider):
@@ -203,24 +283,33 @@ class DetailsBooksUpdatePipeline:
             index = self.index_url[url_page]
             self.donnees_existantes[index] = item_dict
             self.compteur_mises_a_jour += 1
-            print(f"Pipeline: Mise à jour livre #{self.compteur_mises_a_jour}: {item_dict.get('titre', 'Inconnu')}")
+            echantillonneur.evenement(self.logger, "fichier_mise_a_jour", "Pipeline: Mise à jour livre #%d: %s",
+                                      self.compteur_mises_a_jour, item_dict.get('titre', 'Inconnu'))
         else:
             # Ajout d'un nouveau livre
             self.donnees_existantes.append(item_dict)
             self.index_url[url_page] = len(self.donnees_existantes) - 1
             self.compteur_nouvelles += 1
-            print(f"Pipeline: Nouveau livre #{self.compteur_nouvelles}: {item_dict.get('titre', 'Inconnu')}")
+            echantillonneur.evenement(self.logger, "fichier_nouveau", "Pipeline: Nouveau livre #%d: %s",
+                                      self.compteur_nouvelles, item_dict.get('titre', 'Inconnu'))
 
-        # Sauvegarde immédiate après chaque livre
-        self.sauvegarder_donnees()
+        # Sauvegarde périodique (la sauvegarde finale est faite à la fermeture)
+        self.items_depuis_sauvegarde += 1
+        if self.items_depuis_sauvegarde >= self.intervalle_sauvegarde:
+            self.sauvegarder_donnees()
 
         return item
 
+    def valider_lot(self):
+        """Réécrit le fichier à la fin d'un lot de rejeu, comme la base"""
+        self.sauvegarder_donnees()
+
     def close_spider(self, spider):
         """Sauvegarde finale lors de la fermeture du spider"""
         if spider.name == 'details_book_spider':
             self.sauvegarder_donnees()
-            print(f"Pipeline: Spider fermé - {self.compteur_nouvelles} nouveaux, {self.compteur_mises_a_jour} mises à jour")
+            self.logger.info("Pipeline: Spider fermé - %d nouveaux, %d mises à jour",
+                             self.compteur_nouvelles, self.compteur_mises_a_jour)
 
     def sauvegarder_donnees(self):
         """Sauvegarde les données dans le fichier JSON"""
@@ -229,6 +318,7 @@ class DetailsBooksUpdatePipeline:
         try:
             with open(self.fichier_sauvegarde, 'w', encoding='utf-8') as fichier:
                 json.dump(self.donnees_existantes, fichier, ensure_ascii=False, indent=2)
-            print(f"Pipeline: Sauvegardé {len(self.donnees_existantes)} livres dans {self.fichier_sauvegarde}")
+            self.items_depuis_sauvegarde = 0
+            self.logger.debug("Pipeline: Sauvegardé %d livres dans %s", len(self.donnees_existantes), self.fichier_sauvegarde)
         except Exception as e:
-            print(f"Pipeline: Erreur sauvegarde: {e}")
+            self.logger.error("Pipeline: Erreur sauvegarde: %s", e)
@@ -0,0 +1,321 @@
+"""
+Service de crawl résident
+
+Un seul processus garde le reactor Twisted, les modules Scrapy importés, le
+pool de connexions SQLAlchemy (database_config n'est importé qu'une fois) et
+les flux de graines décodés (FLUX_CACHE_MEMOIRE). Les travaux de crawl sont
+soumis sur une petite API HTTP locale et exécutés à la suite ou en parallèle
+selon SERVICE_TRAVAUX_SIMULTANES.
+
+Quel que soit ce réglage, les étapes qui lisent ou réécrivent les flux
+partagés ou la table books (travail complet, travail incremental, listing et
+détails d'un travail categorie) passent une à une par un verrou.
+
+Types de travaux :
+- complet : categories_spider (avec comptes) -> books_by_categories_spider -> details_book_spider
+- incremental : vérification de complétude puis re-crawl des seules lacunes
+- categorie : listing et détails des seules catégories demandées
+"""
+import itertools
+import json
+import os
+from collections import deque
+from datetime import datetime, timezone
+
+from scrapy.crawler import Crawler, CrawlerRunner
+from twisted.internet import defer, threads
+from twisted.web import resource
+
+from .flux import fichiers_flux, lire_flux
+from .verification import FICHIER_GRAINES, FLUX_COMPLEMENT_LISTING, verifier_crawl
+
+TYPES_TRAVAUX = ("complet", "incremental", "categorie")
+
+# Statistiques Scrapy exposées pour suivre l'avancement d'un travail
+STATS_AVANCEMENT = (
+    "response_received_count",
+    "item_scraped_count",
+    "log_count/ERROR",
+    "start_time",
+    "finish_reason",
+)
+
+
+class Travail:
+    """
+    Travail de crawl soumis au service
+    """
+
+    def __init__(self, identifiant, type_travail, categories=None):
+        """
+        Initialise le travail
+
+        Args:
+            identifiant: Numéro du travail
+            type_travail: complet, incremental ou categorie
+            categories: Noms des catégories pour un travail de type categorie
+        """
+        self.identifiant = identifiant
+        self.type_travail = type_travail
+        self.categories = categories or []
+        self.statut = "en_attente"
+        self.erreur = None
+        self.soumis_le = datetime.now(timezone.utc)
+        self.termine_le = None
+        self.etapes = []
+        self.crawler_courant = None
+
+    def en_dict(self):
+        """
+        Représentation JSON du travail et de son avancement
+
+        Returns:
+            dict: Etat du travail, étapes terminées et étape en cours
+        """
+        etape_courante = None
+        if self.crawler_courant is not None and self.crawler_courant.stats is not None:
+            etape_courante = {
+                "spider": self.crawler_courant.spidercls.name,
+                "stats": extraire_stats(self.crawler_courant.stats.get_stats()),
+            }
+
+        return {
+            "id": self.identifiant,
+            "type": self.type_travail,
+            "categories": self.categories,
+            "statut": self.statut,
+            "erreur": self.erreur,
+            "soumis_le": self.soumis_le.isoformat(),
+            "termine_le": self.termine_le.isoformat() if self.termine_le else None,
+            "etapes_terminees": self.etapes,
+            "etape_courante": etape_courante,
+        }
+
+
+def extraire_stats(stats):
+    """
+    Garde les statistiques utiles au suivi d'avancement
+
+    Args:
+        stats: Statistiques complètes du crawler
+
+    Returns:
+        dict: Statistiques sérialisables en JSON
+    """
+    return {cle: str(stats[cle]) if isinstance(stats[cle], datetime) else stats[cle]
+            for cle in STATS_AVANCEMENT if cle in stats}
+
+
+class ServiceCrawl:
+    """
+    File de travaux de crawl exécutés dans un reactor unique
+    """
+
+    def __init__(self, settings):
+        """
+        Initialise le service
+
+        Args:
+            settings: Settings du projet Scrapy
+        """
+        self.settings = settings
+        self.settings.set("FLUX_CACHE_MEMOIRE", True, priority="cmdline")
+        self.runner = CrawlerRunner(self.settings)
+        self.travaux_simultanes = settings.getint("SERVICE_TRAVAUX_SIMULTANES", 1)
+        self.compteur = itertools.count(1)
+        self.travaux = {}
+        self.file_attente = deque()
+        self.en_cours = 0
+        # Un complet vide la table books et réécrit les flux : ces étapes ne se chevauchent jamais
+        self.verrou_donnees = defer.DeferredLock()
+
+    def soumettre(self, type_travail, categories=None):
+        """
+        Ajoute un travail à la file et le démarre si un emplacement est libre
+
+        Args:
+            type_travail: complet, incremental ou categorie
+            categories: Noms des catégories pour un travail de type categorie
+
+        Returns:
+            Travail: Le travail créé
+
+        Raises:
+            ValueError: Si le type est inconnu ou si les catégories manquent
+        """
+        if type_travail not in TYPES_TRAVAUX:
+            raise ValueError(f"Type de travail inconnu: {type_travail} (attendu: {', '.join(TYPES_TRAVAUX)})")
+        if type_travail == "categorie" and not categories:
+            raise ValueError("Un travail de type categorie exige au moins une catégorie")
+
+        travail = Travail(next(self.compteur), type_travail, categories)
+        self.travaux[travail.identifiant] = travail
+        self.file_attente.append(travail)
+        self.demarrer_suivants()
+        return travail
+
+    def demarrer_suivants(self):
+        """Démarre les travaux en attente dans la limite des emplacements libres"""
+        while self.file_attente and self.en_cours < self.travaux_simultanes:
+            travail = self.file_attente.popleft()
+            self.en_cours += 1
+            self.executer(travail).addBoth(self.travail_fini)
+
+    def travail_fini(self, _):
+        """Libère l'emplacement d'un travail terminé et démarre le suivant"""
+        self.en_cours -= 1
+        self.demarrer_suivants()
+
+    @defer.inlineCallbacks
+    def executer(self, travail):
+        """
+        Exécute les étapes d'un travail
+
+        Args:
+            travail: Travail à exécuter
+        """
+        travail.statut = "en_cours"
+        try:
+            if travail.type_travail == "complet":
+                yield self.verrou_donnees.run(self.executer_complet, travail)
+            elif travail.type_travail == "incremental":
+                yield self.verrou_donnees.run(self.executer_incremental, travail)
+            else:
+                yield self.executer_categories(travail)
+            travail.statut = "termine"
+        except Exception as e:
+            travail.statut = "echec"
+            travail.erreur = f"{type(e).__name__}: {e}"
+        finally:
+            travail.termine_le = datetime.now(timezone.utc)
+
+    @defer.inlineCallbacks
+    def executer_complet(self, travail):
+        """
+        Enchaîne le crawl complet des catégories, du listing et des détails
+
+        Args:
+            travail: Travail en cours
+        """
+        yield self.lancer_spider(travail, "categories_spider", comptes="1")
+        yield self.lancer_spider(travail, "books_by_categories_spider")
+        yield self.lancer_spider(travail, "details_book_spider")
+
+    @defer.inlineCallbacks
+    def executer_incremental(self, travail):
+        """
+        Vérifie le dernier crawl et ne re-crawle que les lacunes
+
+        Args:
+            travail: Travail en cours
+        """
+        resultat = yield threads.deferToThread(verifier_crawl, FICHIER_GRAINES)
+        graines = resultat['graines']
+
+        if graines['pages_listing']:
+            yield self.lancer_spider(travail, "books_by_categories_spider",
+                                     sortie=f"{FLUX_COMPLEMENT_LISTING}.jl", graines=FICHIER_GRAINES)
+            resultat = yield threads.deferToThread(verifier_crawl, FICHIER_GRAINES)
+            graines = resultat['graines']
+
+        if graines['livres']:
+            yield self.lancer_spider(travail, "details_book_spider", graines=FICHIER_GRAINES)
+
+    @defer.inlineCallbacks
+    def executer_categories(self, travail):
+        """
+        Re-crawle le listing puis les détails des catégories demandées
+
+        Le listing lit le flux categories qu'un travail complet réécrit, et les
+        détails écrivent dans la table books : les deux étapes attendent le
+        verrou des données. Les fichiers du travail sont supprimés à la fin.
+
+        Args:
+            travail: Travail en cours
+        """
+        base_listing = f"travail-{travail.identifiant}-listing"
+        fichier_graines = f"travail-{travail.identifiant}-graines.json"
+        try:
+            # Les identifiants repartent de 1 au redémarrage : le listing d'un ancien travail est écrasé
+            yield self.verrou_donnees.run(self.lancer_spider, travail, "books_by_categories_spider",
+                                          sortie=f"{base_listing}.jl", ecraser=True,
+                                          categories=",".join(travail.categories))
+
+            livres = [{'url': livre.get('url'), 'category': livre.get('category'), 'title': livre.get('title')}
+                      for livre in lire_flux(base_listing)]
+            with open(fichier_graines, 'w', encoding='utf-8') as fichier:
+                json.dump({'pages_listing': [], 'livres': livres}, fichier, ensure_ascii=False)
+
+            yield self.verrou_donnees.run(self.lancer_spider, travail, "details_book_spider",
+                                          graines=fichier_graines)
+        finally:
+            for chemin in fichiers_flux(base_listing) + [fichier_graines]:
+                if os.path.exists(chemin):
+                    os.remove(chemin)
+
+    @defer.inlineCallbacks
+    def lancer_spider(self, travail, nom_spider, sortie=None, ecraser=False, **arguments):
+        """
+        Lance un spider dans le reactor partagé et attend sa fin
+
+        Args:
+            travail: Travail auquel rattacher l'étape
+            nom_spider: Nom du spider à lancer
+            sortie: Fichier de sortie explicite (équivalent de -o)
+            ecraser: True pour remplacer la sortie existante (équivalent de -O)
+            **arguments: Arguments du spider (équivalents de -a)
+        """
+        settings = self.settings.copy()
+        if sortie:
+            settings.set("FEEDS", {sortie: {"format": "jsonlines", "overwrite": ecraser}}, priority="cmdline")
+
+        crawler = Crawler(self.runner.spider_loader.load(nom_spider), settings)
+        travail.crawler_courant = crawler
+        try:
+            yield self.runner.crawl(crawler, **arguments)
+        finally:
+            travail.crawler_courant = None
+            travail.etapes.append({
+                "spider": nom_spider,
+                "arguments": arguments,
+                "stats": extraire_stats(crawler.stats.get_stats()) if crawler.stats else {},
+            })
+
+
+class RessourceTravaux(resource.Resource):
+    """
+    API HTTP locale du service : POST /travaux, GET /travaux, GET /travaux/<id>
+    """
+
+    isLeaf = True
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def repondre(self, request, code, contenu):
+        """Ecrit une réponse JSON"""
+        request.setResponseCode(code)
+        request.setHeader(b"content-type", b"application/json; charset=utf-8")
+        return json.dumps(contenu, ensure_ascii=False, default=str).encode("utf-8")
+
+    def render_GET(self, request):
+        segments = [segment for segment in request.postpath if segment]
+        if not segments:
+            return self.repondre(request, 200, [travail.en_dict() for travail in self.service.travaux.values()])
+
+        try:
+            travail = self.service.travaux[int(segments[0])]
+        except (ValueError, KeyError):
+            return self.repondre(request, 404, {"detail": "Travail non trouve"})
+        return self.repondre(request, 200, travail.en_dict())
+
+    def render_POST(self, request):
+        try:
+            corps = json.loads(request.content.read() or b"{}")
+            if not isinstance(corps, dict):
+                raise ValueError("Le corps doit être un objet JSON")
+            travail = self.service.soumettre(corps.get("type", "complet"), corps.get("categories"))
+        except ValueError as e:
+            return self.repondre(request, 400, {"detail": str(e)})
+        return self.repondre(request, 202, travail.en_dict())
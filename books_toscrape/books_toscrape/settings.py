@@ -55,6 +55,12 @@ DOWNLOAD_DELAY = 1
 #EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
 #}
+EXTENSIONS = {
+    "books_toscrape.journalisation.JournalisationEchantillonnee": 500,
+    # Avant InstantaneFinCrawl, qui relit le flux publié
+    "books_toscrape.flux.PublicationFlux": 550,
+    "books_toscrape.instantane_binaire.InstantaneFinCrawl": 600,
+}
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
@@ -90,12 +96,40 @@ ITEM_PIPELINES = {
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
 
+# Flux JSON Lines compressés et rotatifs (voir books_toscrape/flux.py)
+# Compression : "gzip", "zstd" (paquet zstandard) ou "aucune"
+FLUX_COMPRESSION = "gzip"
+# Nombre d'items par fichier avant rotation
+FLUX_ROTATION_ITEMS = 500
+
+# Instantané binaire des livres (livres.bin) écrit à la fin du crawl et projeté
+# en mémoire par les workers de l'API JSON (voir books_toscrape/instantane_binaire.py)
+INSTANTANE_BINAIRE_ACTIF = True
+INSTANTANE_BINAIRE_FICHIER = "livres.bin"
+
+# Service de crawl résident (service_crawl.py) : travaux exécutés en parallèle
+SERVICE_TRAVAUX_SIMULTANES = 1
+
+# Journalisation échantillonnée du chemin critique : un événement par item sur
+# 1/LOG_ECHANTILLON_TAUX est écrit, les autres sont agrégés en compteurs
+# journalisés toutes les LOG_COMPTEURS_INTERVALLE secondes. Les handlers
+# console/fichier sont déplacés derrière une file (thread dédié).
+LOG_ECHANTILLONNAGE_ACTIF = True
+LOG_ECHANTILLON_TAUX = 0.01
+LOG_COMPTEURS_INTERVALLE = 30
+
+# Réécriture de detail_books.json tous les N livres (et à la fermeture)
+DETAILS_SAUVEGARDE_INTERVALLE = 100
+
 # Désactiver les retry pour éviter les requêtes supplémentaires
 RETRY_ENABLED = False
 RETRY_TIMES = 0
 
+# Fichier des items et requêtes en échec (rejouables avec rejouer_dead_letters.py)
+DEAD_LETTER_FICHIER = "dead_letters.jsonl"
+
 # Désactiver les redirections automatiques
 REDIRECT_ENABLED = False
 
-# Activer le dupefilter strict pour éviter les doublons
-DUPEFILTER_DEBUG = True
+# Le dupefilter reste actif ; seul le premier doublon est journalisé
+DUPEFILTER_DEBUG = False
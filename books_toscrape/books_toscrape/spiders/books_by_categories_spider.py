@@ -5,71 +5,137 @@ Ce spider lit le fichier JSON des catégories généré par categories_spider,
 puis pour chaque catégorie, extrait tous les livres qu'elle contient.
 Chaque livre est associé à sa catégorie d'origine.
 
-PRÉREQUIS: Exécuter d'abord "scrapy crawl categories_spider -o categories.json"
+PRÉREQUIS: Exécuter d'abord "scrapy crawl categories_spider"
+
+Les catégories sont lues en streaming depuis le flux categories (JSON Lines
+compressés rotatifs ou ancien categories.json), et les livres sont exportés
+en flux books_by_categories-00001.jl.gz, ... sauf si -o est précisé.
+
+Avec l'argument "-a graines=graines_manquantes.json", seules les pages de
+listing manquantes relevées par verifier_completude.py sont visitées.
+Avec "-a categories=Mystery,Poetry", seules ces catégories sont parcourues.
 """
 import scrapy
 import json
-import os
 
 from ..items import BooksToscrapeProduct
 from ..itemloaders import BookLoader
+from ..flux import activer_flux, flux_existe, lecteur_flux, sortie_explicite
 
 class BooksByCategoriesSpider(scrapy.Spider):
     """
     Spider pour scraper tous les livres triés par catégorie
 
-    Ce spider optimisé lit le fichier categories.json existant
+    Ce spider optimisé lit le flux des catégories existant
     au lieu de re-scrapper les catégories, puis visite chaque page
     de catégorie pour extraire tous les livres.
     """
     name = "books_by_categories_spider"
     allowed_domains = ["books.toscrape.com"]
 
+    @classmethod
+    def update_settings(cls, settings):
+        """Active l'export en flux rotatif compressé des livres"""
+        super().update_settings(settings)
+        activer_flux("books_by_categories", settings)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        """Refuse un re-crawl partiel qui écraserait le flux principal"""
+        partiel = kwargs.get('graines') or kwargs.get('categories')
+        if partiel and not sortie_explicite(crawler.settings):
+            raise ValueError("Les modes graines et categories exigent une sortie explicite, "
+                             "ex: -o books_by_categories_complement.jl")
+        return super().from_crawler(crawler, *args, **kwargs)
+
+    def __init__(self, graines=None, categories=None, *args, **kwargs):
+        """
+        Initialise le spider
+
+        Args:
+            graines: Fichier de graines pour un re-crawl limité aux pages manquantes
+            categories: Noms de catégories séparés par des virgules pour un crawl partiel
+        """
+        super().__init__(*args, **kwargs)
+        self.graines = graines
+        self.categories = None
+        if categories:
+            self.categories = {nom.strip().lower() for nom in categories.split(',') if nom.strip()}
+
     def start_requests(self):
         """
-        Méthode d'entrée qui lit le fichier JSON des catégories
+        Méthode d'entrée qui lit le flux des catégories
 
-        Lit le fichier categories.json et génère une requête
-        pour chaque catégorie trouvée.
+        Lit les catégories en streaming (flux rotatif ou categories.json)
+        et génère une requête pour chaque catégorie trouvée.
 
         Yields:
             Request: Requêtes vers chaque page de catégorie
         """
-        # Chemin vers le fichier JSON des catégories
-        chemin_categories = "categories.json"
+        if self.graines:
+            yield from self.requetes_depuis_graines()
+            return
 
-        # Vérifie si le fichier existe
-        if not os.path.exists(chemin_categories):
+        # Vérifie si le flux des catégories existe
+        if not flux_existe("categories"):
             self.logger.error(
-                "Fichier categories.json non trouvé. "
-                "Exécutez d'abord: scrapy crawl categories_spider -o categories.json"
+                "Flux des catégories non trouvé. "
+                "Exécutez d'abord: scrapy crawl categories_spider"
             )
             return
 
         try:
-            # Lit le fichier JSON des catégories
-            with open(chemin_categories, 'r', encoding='utf-8') as fichier:
-                categories = json.load(fichier)
-
-            self.logger.info(f"Chargement de {len(categories)} catégories depuis {chemin_categories}")
+            # Lit les catégories en streaming et crée une requête pour chacune
+            nombre_categories = 0
+            for categorie in lecteur_flux(self.settings)("categories"):
+                nom_categorie = categorie.get('name') or categorie.get('nom', 'Inconnue')
+                url = categorie.get('url') or categorie.get('url_complete')
 
-            # Pour chaque catégorie, crée une requête
-            for categorie in categories:
-                nom_categorie = categorie.get('name', 'Inconnue')
-                url = categorie.get('url')
+                if self.categories and nom_categorie.lower() not in self.categories:
+                    continue
 
                 if url:
+                    nombre_categories += 1
                     yield scrapy.Request(
                         url=url,
                         callback=self.parse_category,
                         meta={'nom_categorie': nom_categorie}
                     )
 
+            self.logger.info(f"{nombre_categories} catégories chargées depuis le flux categories")
+
         except json.JSONDecodeError as e:
             self.logger.error(f"Erreur lors de la lecture du JSON: {e}")
         except Exception as e:
             self.logger.error(f"Erreur inattendue: {e}")
 
+    def requetes_depuis_graines(self):
+        """
+        Génère les requêtes vers les pages de listing manquantes
+
+        Chaque page est demandée explicitement : la pagination n'est pas
+        suivie pour ne pas revisiter les pages déjà collectées.
+
+        Yields:
+            Request: Requêtes vers chaque page de listing manquante
+        """
+        try:
+            with open(self.graines, 'r', encoding='utf-8') as fichier:
+                pages = json.load(fichier).get('pages_listing', [])
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.error(f"Impossible de lire les graines {self.graines}: {e}")
+            return
+
+        self.logger.info(f"Re-crawl ciblé de {len(pages)} pages de listing")
+
+        for page in pages:
+            yield scrapy.Request(
+                url=page['url'],
+                callback=self.parse_category,
+                meta={'nom_categorie': page.get('nom_categorie', 'Inconnue'),
+                      'suivre_pagination': False}
+            )
+
     def parse_category(self, response):
         """
         Parse une page de catégorie pour extraire tous les livres
@@ -109,7 +175,7 @@ class BooksByCategoriesSpider(scrapy.Spider):
         # Cherche le lien "suivant" pour continuer dans la même catégorie
         page_suivante = response.css('ul.pager li.next a::attr(href)').get()
 
-        if page_suivante is not None:
+        if page_suivante is not None and response.meta.get('suivre_pagination', True):
             # Suit le lien vers la page suivante de la même catégorie
             # Transmet le nom de la catégorie via meta
             yield response.follow(
@@ -5,9 +5,17 @@ Ce spider parcourt la page d'accueil et extrait :
 - Le nom de chaque catégorie
 - L'URL de la catégorie
 - Le nombre de livres dans la catégorie (si disponible)
+
+Avec l'argument "-a comptes=1", chaque page de catégorie est visitée pour
+relever le nombre de résultats annoncé (utilisé par verifier_completude.py).
+
+Sans option -o, les catégories sont exportées en flux JSON Lines compressés
+et rotatifs (categories-00001.jl.gz, ...), voir books_toscrape/flux.py.
 """
 import scrapy
 
+from ..flux import activer_flux
+
 
 class CategoriesSpiderSpider(scrapy.Spider):
     """
@@ -20,6 +28,22 @@ class CategoriesSpiderSpider(scrapy.Spider):
     allowed_domains = ["books.toscrape.com"]
     start_urls = ["https://books.toscrape.com/index.html"]
 
+    @classmethod
+    def update_settings(cls, settings):
+        """Active l'export en flux rotatif compressé des catégories"""
+        super().update_settings(settings)
+        activer_flux("categories", settings)
+
+    def __init__(self, comptes=None, *args, **kwargs):
+        """
+        Initialise le spider
+
+        Args:
+            comptes: Si renseigné, relève aussi le nombre de livres annoncé par catégorie
+        """
+        super().__init__(*args, **kwargs)
+        self.comptes = bool(comptes)
+
     def parse(self, response):
         """
         Méthode principale pour extraire les catégories
@@ -50,13 +74,23 @@ class CategoriesSpiderSpider(scrapy.Spider):
             if nom_categorie:
                 nom_categorie = nom_categorie.strip()
 
-            # Retourne les données de la catégorie
-            yield {
+            donnees_categorie = {
                 'nom': nom_categorie,
                 'url_complete': url_complete,
                 'url_relative': url_relative_categorie
             }
 
+            if self.comptes:
+                # Visite la page de la catégorie pour relever le nombre annoncé
+                yield response.follow(
+                    url_complete,
+                    callback=self.parse_category_details,
+                    meta={'categorie': donnees_categorie}
+                )
+            else:
+                # Retourne les données de la catégorie
+                yield donnees_categorie
+
     def parse_category_details(self, response):
         """
         Méthode optionnelle pour extraire des détails supplémentaires
@@ -86,6 +120,15 @@ class CategoriesSpiderSpider(scrapy.Spider):
         if nom_categorie:
             nom_categorie = nom_categorie.strip()
 
+        # Mode comptes : complète la catégorie transmise avec le nombre annoncé
+        categorie = response.meta.get('categorie')
+        if categorie:
+            yield {
+                **categorie,
+                'nombre_livres': int(nombre_livres) if nombre_livres.isdigit() else None
+            }
+            return
+
         yield {
             'nom_categorie': nom_categorie,
             'nombre_livres': nombre_livres,
@@ -1,95 +1,174 @@
 """
 Spider pour extraire les détails complets de chaque livre
 
-Ce spider lit le fichier JSON books_by_categories.json généré par books_by_categories_spider,
+Ce spider lit en streaming le flux books_by_categories généré par books_by_categories_spider
+(JSON Lines compressés rotatifs ou ancien books_by_categories.json),
 puis visite chaque URL de livre pour extraire les informations détaillées.
 
-PRÉREQUIS: Exécuter d'abord "scrapy crawl books_by_categories_spider -o books_by_categories.json"
+PRÉREQUIS: Exécuter d'abord "scrapy crawl books_by_categories_spider"
+
+Avec l'argument "-a graines=graines_manquantes.json", seuls les livres manquants
+relevés par verifier_completude.py sont visités et la base n'est pas vidée.
+Avec "-a rejeu=fichier.jsonl", les requêtes en échec extraites du fichier
+dead-letter par rejouer_dead_letters.py sont relancées.
 """
 import scrapy
 import json
-import os
 from urllib.parse import quote
 
 from ..items import BookDetailsProduct
-from ..itemloaders import BookDetailsLoader 
+from ..itemloaders import BookDetailsLoader
+from ..dead_letters import DeadLetterStore, FICHIER_DEAD_LETTERS
+from ..flux import flux_existe, lecteur_flux
+from ..journalisation import echantillonneur
 
 
 class DetailsBookSpider(scrapy.Spider):
     """
     Spider pour extraire les détails complets des livres
 
-    Ce spider lit les URLs des livres depuis books_by_categories.json
+    Ce spider lit les URLs des livres depuis le flux books_by_categories
     et visite chaque page de livre pour extraire toutes les informations
     détaillées disponibles avec sauvegarde automatique en JSON.
     """
     name = "details_book_spider"
     allowed_domains = ["books.toscrape.com"]
 
-    def __init__(self):
+    def __init__(self, graines=None, rejeu=None, *args, **kwargs):
         """
         Initialise le spider (sauvegarde gérée par le pipeline)
+
+        Args:
+            graines: Fichier de graines pour un re-crawl limité aux livres manquants
+            rejeu: Fichier des requêtes dead-letter à relancer
         """
-        super().__init__()
+        super().__init__(*args, **kwargs)
+        self.graines = graines
+        self.rejeu = rejeu
+        self.dead_letters = None
 
         # Compteur pour limiter à exactement 1000 livres
         self.livres_traites = 0
         self.limite_livres = 1000
 
-        # Nettoie automatiquement la BDD avant de commencer
-        self.nettoyer_base_donnees()
+        # Nettoie automatiquement la BDD avant de commencer (sauf re-crawl ciblé ou rejeu)
+        if not self.graines and not self.rejeu:
+            self.nettoyer_base_donnees()
 
 
     def start_requests(self):
         """
-        Méthode d'entrée qui lit le fichier JSON des livres par catégories
+        Méthode d'entrée qui lit le flux des livres par catégories
 
-        Lit le fichier books_by_categories.json et génère une requête
-        pour chaque URL de livre trouvée.
+        Lit les livres en streaming (flux rotatif ou books_by_categories.json)
+        et génère une requête pour chaque URL de livre trouvée.
 
         Yields:
             Request: Requêtes vers chaque page de livre individuelle
         """
-        # Chemin vers le fichier JSON des livres par catégories
-        chemin_livres = "books_by_categories.json"
+        if self.graines:
+            yield from self.requetes_depuis_graines()
+            return
 
-        # Vérifie si le fichier existe
-        if not os.path.exists(chemin_livres):
+        if self.rejeu:
+            yield from self.requetes_depuis_rejeu()
+            return
+
+        # Vérifie si le flux des livres existe
+        if not flux_existe("books_by_categories"):
             self.logger.error(
-                "Fichier books_by_categories.json non trouvé. "
-                "Exécutez d'abord: scrapy crawl books_by_categories_spider -o books_by_categories.json"
+                "Flux books_by_categories non trouvé. "
+                "Exécutez d'abord: scrapy crawl books_by_categories_spider"
             )
             return
 
         try:
-            # Lit le fichier JSON des livres
-            with open(chemin_livres, 'r', encoding='utf-8') as fichier:
-                livres = json.load(fichier)
-
-            self.logger.info(f"Chargement de {len(livres)} livres depuis {chemin_livres}")
-
-            # Pour chaque livre, crée une requête vers sa page de détails
-            for livre in livres:
-                url_livre = livre.get('url')
-
-                if url_livre:
-                    # Utilisation directe de l'URL sans encodage pour éviter les doublons
-                    yield scrapy.Request(
-                        url=url_livre,
-                        callback=self.parse_details_livre,
-                        errback=self.gerer_erreur_requete,
-                        meta={
-                            'categorie_originale': livre.get('category', 'Inconnue'),
-                            'titre_original': livre.get('title', 'Inconnu'),
-                            'url_originale': url_livre
-                        }
-                    )
+            # Pour chaque livre lu en streaming, crée une requête vers sa page de détails
+            nombre_livres = 0
+            for livre in lecteur_flux(self.settings)("books_by_categories"):
+                requete = self.creer_requete_livre(livre)
+                if requete:
+                    nombre_livres += 1
+                    yield requete
+
+            self.logger.info(f"{nombre_livres} livres chargés depuis le flux books_by_categories")
 
         except json.JSONDecodeError as e:
             self.logger.error(f"Erreur lors de la lecture du JSON: {e}")
         except Exception as e:
             self.logger.error(f"Erreur inattendue: {e}")
 
+    def requetes_depuis_graines(self):
+        """
+        Génère les requêtes vers les seuls livres manquants
+
+        Yields:
+            Request: Requêtes vers chaque page de livre manquante
+        """
+        try:
+            with open(self.graines, 'r', encoding='utf-8') as fichier:
+                livres = json.load(fichier).get('livres', [])
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.error(f"Impossible de lire les graines {self.graines}: {e}")
+            return
+
+        self.logger.info(f"Re-crawl ciblé de {len(livres)} livres manquants")
+
+        for livre in livres:
+            requete = self.creer_requete_livre(livre)
+            if requete:
+                yield requete
+
+    def requetes_depuis_rejeu(self):
+        """
+        Relance les requêtes en échec extraites du fichier dead-letter
+
+        Yields:
+            Request: Requêtes reconstruites depuis leurs métadonnées
+        """
+        entrees = DeadLetterStore(self.rejeu).lire()
+        self.logger.info(f"Rejeu de {len(entrees)} requêtes en échec")
+
+        for entree in entrees:
+            if entree.get('spider') != self.name:
+                continue
+            donnees = entree.get('requete', {})
+            meta = donnees.get('meta', {})
+            requete = self.creer_requete_livre({
+                'url': meta.get('url_originale') or donnees.get('url'),
+                'category': meta.get('categorie_originale', 'Inconnue'),
+                'title': meta.get('titre_original', 'Inconnu')
+            })
+            if requete:
+                yield requete
+
+    def creer_requete_livre(self, livre):
+        """
+        Crée la requête vers la page de détails d'un livre
+
+        Args:
+            livre: Données du livre issues du listing (url, category, title)
+
+        Returns:
+            Request: Requête vers la page du livre, ou None sans URL
+        """
+        url_livre = livre.get('url')
+
+        if not url_livre:
+            return None
+
+        # Utilisation directe de l'URL sans encodage pour éviter les doublons
+        return scrapy.Request(
+            url=url_livre,
+            callback=self.parse_details_livre,
+            errback=self.gerer_erreur_requete,
+            meta={
+                'categorie_originale': livre.get('category', 'Inconnue'),
+                'titre_original': livre.get('title', 'Inconnu'),
+                'url_originale': url_livre
+            }
+        )
+
 
     def parse_details_livre(self, response):
         """
@@ -207,8 +286,9 @@ class DetailsBookSpider(scrapy.Spider):
 
         resultat_complet = loader.load_item()
 
-        # Log de succès pour le suivi
-        self.logger.info(f"Livre traité avec succès: {titre or titre_original}")
+        # Log de succès échantillonné, le reste est agrégé dans les compteurs
+        echantillonneur.evenement(self.logger, "livre_traite", "Livre traité avec succès: %s",
+                                  titre or titre_original)
 
         yield resultat_complet
 
@@ -474,7 +554,13 @@ class DetailsBookSpider(scrapy.Spider):
             f"Erreur: {failure.value}"
         )
 
-        # Suppression du système de retry pour éviter les doublons
+        # Suppression du système de retry pour éviter les doublons :
+        # la requête est conservée en dead-letter pour un rejeu ciblé
+        if self.dead_letters is None:
+            self.dead_letters = DeadLetterStore(
+                self.settings.get('DEAD_LETTER_FICHIER', FICHIER_DEAD_LETTERS)
+            )
+        self.dead_letters.enregistrer_requete(failure, self)
 
     def nettoyer_base_donnees(self):
         """
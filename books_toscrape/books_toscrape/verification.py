@@ -0,0 +1,195 @@
+"""
+Vérification de la complétude d'un crawl
+
+Compare le nombre de livres annoncé par chaque catégorie (flux categories
+produit avec "-a comptes=1") aux livres réellement collectés dans le listing
+(flux books_by_categories), dans detail_books.json et dans la table books.
+Produit une liste minimale de graines (pages de listing et livres manquants)
+pour un re-crawl ciblé au lieu d'un re-crawl complet.
+"""
+import json
+import math
+
+from .flux import lire_flux
+
+# Nombre de livres affichés par page de listing sur books.toscrape.com
+LIVRES_PAR_PAGE = 20
+
+FICHIER_GRAINES = "graines_manquantes.json"
+FLUX_COMPLEMENT_LISTING = "books_by_categories_complement"
+
+
+def url_page_listing(url_categorie, numero_page):
+    """
+    Construit l'URL d'une page de listing d'une catégorie
+
+    Args:
+        url_categorie: URL de la première page (index.html) de la catégorie
+        numero_page: Numéro de la page (1 pour index.html)
+
+    Returns:
+        str: URL de la page demandée
+    """
+    if numero_page == 1:
+        return url_categorie
+    base = url_categorie.rsplit('/', 1)[0]
+    return f"{base}/page-{numero_page}.html"
+
+
+class VerificateurCompletude:
+    """
+    Compare les comptes annoncés aux livres stockés et calcule les graines manquantes
+    """
+
+    def __init__(self, categories, livres_listing, livres_details, livres_base=None):
+        """
+        Initialise le vérificateur
+
+        Args:
+            categories: Catégories avec leur nombre de livres annoncé
+            livres_listing: Livres issus du listing (books_by_categories)
+            livres_details: Livres issus de detail_books.json
+            livres_base: Couples (url_page, categorie) de la table books, None si indisponible
+        """
+        self.categories = categories
+        self.livres_listing = livres_listing
+        self.urls_details = {livre.get('url_page') for livre in livres_details if livre.get('url_page')}
+        self.urls_base = None
+        if livres_base is not None:
+            self.urls_base = {url for url, _ in livres_base if url}
+
+        self.comptes_details = self.compter_par_categorie(
+            livre.get('categorie') for livre in livres_details
+        )
+        self.comptes_base = None
+        if livres_base is not None:
+            self.comptes_base = self.compter_par_categorie(categorie for _, categorie in livres_base)
+
+    @staticmethod
+    def compter_par_categorie(noms_categories):
+        """
+        Compte les livres par catégorie
+
+        Args:
+            noms_categories: Itérable des noms de catégorie
+
+        Returns:
+            dict: Nombre de livres par catégorie
+        """
+        comptes = {}
+        for nom in noms_categories:
+            if nom:
+                comptes[nom] = comptes.get(nom, 0) + 1
+        return comptes
+
+    def listing_par_categorie(self):
+        """
+        Regroupe les livres du listing par catégorie, sans doublons d'URL
+
+        Returns:
+            dict: Livres du listing indexés par catégorie puis par URL
+        """
+        listing = {}
+        for livre in self.livres_listing:
+            url = livre.get('url')
+            if url:
+                listing.setdefault(livre.get('category'), {})[url] = livre
+        return listing
+
+    def verifier(self):
+        """
+        Calcule le rapport de complétude et les graines du re-crawl ciblé
+
+        Returns:
+            dict: Rapport par catégorie et graines (pages_listing, livres)
+        """
+        listing = self.listing_par_categorie()
+        rapport = []
+        pages_listing = []
+        livres_manquants = []
+
+        for categorie in self.categories:
+            nom = categorie.get('nom') or categorie.get('name')
+            url = categorie.get('url_complete') or categorie.get('url')
+            annonce = categorie.get('nombre_livres')
+            livres_categorie = listing.get(nom, {})
+
+            ligne = {
+                'categorie': nom,
+                'annonce': annonce,
+                'listing': len(livres_categorie),
+                'details': self.comptes_details.get(nom, 0),
+                'base': self.comptes_base.get(nom, 0) if self.comptes_base is not None else None,
+            }
+            rapport.append(ligne)
+
+            # La pagination est suivie page après page : un échec sur la page k
+            # fait perdre toutes les pages suivantes, on reprend donc à partir de k.
+            if annonce and url and len(livres_categorie) < annonce:
+                premiere_page = len(livres_categorie) // LIVRES_PAR_PAGE + 1
+                derniere_page = math.ceil(annonce / LIVRES_PAR_PAGE)
+                for numero in range(premiere_page, derniere_page + 1):
+                    pages_listing.append({
+                        'url': url_page_listing(url, numero),
+                        'nom_categorie': nom
+                    })
+
+            for url_livre, livre in livres_categorie.items():
+                absent_base = self.urls_base is not None and url_livre not in self.urls_base
+                if url_livre not in self.urls_details or absent_base:
+                    livres_manquants.append({
+                        'url': url_livre,
+                        'category': livre.get('category'),
+                        'title': livre.get('title')
+                    })
+
+        return {
+            'rapport': rapport,
+            'graines': {
+                'pages_listing': pages_listing,
+                'livres': livres_manquants
+            }
+        }
+
+
+def charger_livres_base():
+    """
+    Charge les couples (url_page, categorie) de la table books
+
+    Returns:
+        list: Couples (url_page, categorie), None si la base est indisponible
+    """
+    try:
+        from database_config import engine
+        from sqlalchemy import text
+
+        with engine.connect() as connection:
+            result = connection.execute(text("SELECT url_page, categorie FROM books"))
+            return [(ligne[0], ligne[1]) for ligne in result]
+    except Exception as e:
+        print(f"Base de données indisponible, vérification sur les fichiers JSON uniquement: {e}")
+        return None
+
+
+def verifier_crawl(fichier_graines=FICHIER_GRAINES):
+    """
+    Vérifie le dernier crawl et écrit le fichier de graines
+
+    Args:
+        fichier_graines: Fichier où écrire les graines du re-crawl ciblé
+
+    Returns:
+        dict: Rapport par catégorie et graines (pages_listing, livres)
+    """
+    verificateur = VerificateurCompletude(
+        list(lire_flux("categories")),
+        list(lire_flux("books_by_categories")) + list(lire_flux(FLUX_COMPLEMENT_LISTING)),
+        list(lire_flux("detail_books")),
+        charger_livres_base()
+    )
+    resultat = verificateur.verifier()
+
+    with open(fichier_graines, 'w', encoding='utf-8') as fichier:
+        json.dump(resultat['graines'], fichier, ensure_ascii=False, indent=2)
+
+    return resultat
@@ -3,18 +3,19 @@
 Configuration de la base de donnees PostgreSQL.
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 
-# Parametres de connexion PostgreSQL
+# Parametres de connexion PostgreSQL (memes variables BOOKS_DB_* que l'API)
 DATABASE_CONFIG = {
-    "host": "localhost",
-    "port": 5432,
-    "database": "books_scraping",
-    "user": "elvis",
-    "password": "azerty@&123"
+    "host": os.environ.get("BOOKS_DB_HOST", "localhost"),
+    "port": int(os.environ.get("BOOKS_DB_PORT", "5432")),
+    "database": os.environ.get("BOOKS_DB_NAME", "books_scraping"),
+    "user": os.environ.get("BOOKS_DB_USER", "elvis"),
+    "password": os.environ.get("BOOKS_DB_PASSWORD", "azerty@&123")
 }
 
 # URL de connexion SQLAlchemy avec encodage des caracteres speciaux
@@ -22,8 +23,8 @@ from urllib.parse import quote_plus
 
 DATABASE_URL = f"postgresql://{DATABASE_CONFIG['user']}:{quote_plus(DATABASE_CONFIG['password'])}@{DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}/{DATABASE_CONFIG['database']}"
 
-# Configuration SQLAlchemy
-engine = create_engine(DATABASE_URL)
+# Configuration SQLAlchemy (le pipeline n'utilise qu'une connexion par crawl)
+engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -45,9 +46,29 @@ def get_database_session():
 def create_tables():
     """
     Creer toutes les tables dans la base de donnees.
+
+    Active l'extension pg_trgm (index trigramme du titre), puis ajoute les
+    colonnes et les index ajoutes au modele apres la creation initiale des tables.
     """
+    with engine.begin() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
     Base.metadata.create_all(bind=engine)
 
+    # create_all ne cree ni les colonnes ni les index manquants d'une table existante
+    inspecteur = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existantes = {colonne["name"] for colonne in inspecteur.get_columns(table.name)}
+            for colonne in table.columns:
+                if colonne.name not in existantes:
+                    definition = CreateColumn(colonne).compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {definition}'))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
 
 def test_connection():
     """
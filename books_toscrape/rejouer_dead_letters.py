@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de rejeu des échecs enregistrés dans le fichier dead-letter
+
+A lancer depuis le dossier books_toscrape :
+
+    python rejouer_dead_letters.py --items      # items -> pipelines, par lots
+    python rejouer_dead_letters.py --requetes   # requêtes -> downloader
+    python rejouer_dead_letters.py              # les deux
+
+Les entrées sont retirées du fichier une fois rejouées, jamais avant ;
+celles qui échouent à nouveau y sont ré-enregistrées par les pipelines et
+l'errback du spider.
+"""
+import argparse
+import logging
+import subprocess
+import sys
+
+import scrapy
+
+from books_toscrape.dead_letters import DeadLetterStore, FICHIER_DEAD_LETTERS, lots, serialiser
+from books_toscrape.pipelines import PostgreSQLPipeline, DetailsBooksUpdatePipeline
+
+logger = logging.getLogger(__name__)
+
+FICHIER_REJEU_REQUETES = "dead_letters_rejeu.jsonl"
+
+
+def rejouer_items(store, taille_lot):
+    """
+    Ré-injecte les items en échec dans les pipelines, lot par lot
+
+    Chaque lot est validé en une transaction puis retiré du fichier : si la
+    base est indisponible ou si le rejeu s'interrompt, seuls les lots déjà
+    validés ont quitté le fichier, les autres seront rejoués au prochain lancement.
+
+    Args:
+        store: Fichier dead-letter
+        taille_lot: Nombre d'items par lot
+    """
+    entrees = store.filtrer('item')
+    if not entrees:
+        logger.info("Aucun item à rejouer")
+        return
+
+    # Spider minimal : les pipelines ne lisent que le nom et le mode rejeu
+    spider = scrapy.Spider(name='details_book_spider', rejeu=store.chemin)
+    pipelines = [PostgreSQLPipeline(store.chemin, commit_par_lot=True), DetailsBooksUpdatePipeline()]
+
+    ouverts = []
+    rejouees = 0
+    try:
+        for pipeline in pipelines:
+            pipeline.open_spider(spider)
+            ouverts.append(pipeline)
+
+        for numero, lot in enumerate(lots(entrees, taille_lot), 1):
+            for entree in lot:
+                item = entree['item']
+                for pipeline in pipelines:
+                    item = pipeline.process_item(item, spider)
+            for pipeline in pipelines:
+                pipeline.valider_lot()
+            # Les items du lot ont été validés ou ré-enregistrés en échec par le pipeline
+            store.retirer(lot)
+            rejouees += len(lot)
+            logger.info("Lot %d: %d items rejoués", numero, len(lot))
+    finally:
+        for pipeline in ouverts:
+            pipeline.close_spider(spider)
+
+    logger.info("%d items rejoués, %d de nouveau en échec", rejouees, pipelines[0].compteur_echecs)
+
+
+def rejouer_requetes(store):
+    """
+    Relance les requêtes en échec via details_book_spider en mode rejeu
+
+    Les requêtes ne sont retirées du fichier principal qu'après la fin
+    normale du crawl de rejeu ; en cas d'échec elles y restent pour le
+    prochain lancement.
+
+    Args:
+        store: Fichier dead-letter
+
+    Raises:
+        subprocess.CalledProcessError: Si le crawl de rejeu échoue
+    """
+    entrees = store.filtrer('requete')
+    if not entrees:
+        logger.info("Aucune requête à rejouer")
+        return
+
+    rejeu = DeadLetterStore(FICHIER_REJEU_REQUETES)
+    with open(rejeu.chemin, 'w', encoding='utf-8') as fichier:
+        for entree in entrees:
+            fichier.write(serialiser(entree) + '\n')
+
+    logger.info("Rejeu de %d requêtes", len(entrees))
+    subprocess.run([sys.executable, "-m", "scrapy", "crawl", "details_book_spider",
+                    "-a", f"rejeu={rejeu.chemin}"], check=True)
+    store.retirer(entrees)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rejoue les items et requêtes en échec")
+    parser.add_argument("--items", action="store_true", help="Rejouer les items dans les pipelines")
+    parser.add_argument("--requetes", action="store_true", help="Relancer les requêtes en échec")
+    parser.add_argument("--taille-lot", type=int, default=100, help="Nombre d'items par lot")
+    parser.add_argument("--fichier", default=FICHIER_DEAD_LETTERS, help="Fichier dead-letter")
+    options = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    store = DeadLetterStore(options.fichier)
+    tout = not options.items and not options.requetes
+
+    if options.items or tout:
+        rejouer_items(store, options.taille_lot)
+    if options.requetes or tout:
+        rejouer_requetes(store)
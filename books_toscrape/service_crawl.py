@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lancement du service de crawl résident
+
+A lancer depuis le dossier books_toscrape :
+
+    python service_crawl.py --port 6802 --simultanes 1
+
+Puis soumettre des travaux :
+
+    curl -X POST localhost:6802/travaux -d '{"type": "incremental"}'
+    curl -X POST localhost:6802/travaux -d '{"type": "categorie", "categories": ["Mystery"]}'
+    curl localhost:6802/travaux/1
+"""
+import argparse
+
+from scrapy.utils.log import configure_logging
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service de crawl résident")
+    parser.add_argument("--hote", default="127.0.0.1", help="Adresse d'écoute de l'API des travaux")
+    parser.add_argument("--port", type=int, default=6802, help="Port de l'API des travaux")
+    parser.add_argument("--simultanes", type=int, help="Nombre de travaux exécutés en parallèle "
+                        "(les étapes qui touchent les flux ou la base restent sérialisées)")
+    options = parser.parse_args()
+
+    settings = get_project_settings()
+    if options.simultanes:
+        settings.set("SERVICE_TRAVAUX_SIMULTANES", options.simultanes, priority="cmdline")
+
+    # Le reactor doit être installé avant tout import de twisted.internet.reactor
+    if settings.get("TWISTED_REACTOR"):
+        install_reactor(settings.get("TWISTED_REACTOR"))
+    configure_logging(settings)
+
+    from twisted.internet import reactor
+    from twisted.web import resource, server
+
+    from books_toscrape.service import RessourceTravaux, ServiceCrawl
+
+    service = ServiceCrawl(settings)
+    racine = resource.Resource()
+    racine.putChild(b"travaux", RessourceTravaux(service))
+
+    reactor.listenTCP(options.port, server.Site(racine), interface=options.hote)
+    print(f"Service de crawl prêt sur http://{options.hote}:{options.port}/travaux")
+    reactor.run()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script de vérification de la complétude d'un crawl et de re-crawl ciblé
+
+A lancer depuis le dossier books_toscrape après un crawl complet :
+
+    scrapy crawl categories_spider -a comptes=1
+    python verifier_completude.py             # rapport + graines_manquantes.json
+    python verifier_completude.py --relancer  # re-crawl des seules lacunes
+"""
+import argparse
+import subprocess
+import sys
+
+from books_toscrape.verification import FICHIER_GRAINES, FLUX_COMPLEMENT_LISTING, verifier_crawl
+
+
+def verifier():
+    """
+    Calcule et affiche le rapport de complétude, puis écrit le fichier de graines
+
+    Returns:
+        dict: Graines du re-crawl ciblé (pages_listing, livres)
+    """
+    resultat = verifier_crawl(FICHIER_GRAINES)
+
+    if not any(ligne['annonce'] for ligne in resultat['rapport']):
+        print("Aucun compte annoncé dans le flux categories. "
+              "Exécutez d'abord: scrapy crawl categories_spider -a comptes=1")
+
+    print(f"{'Catégorie':<35} {'Annoncé':>8} {'Listing':>8} {'Détails':>8} {'Base':>8}")
+    for ligne in resultat['rapport']:
+        base = ligne['base'] if ligne['base'] is not None else '-'
+        annonce = ligne['annonce'] if ligne['annonce'] is not None else '-'
+        print(f"{ligne['categorie'] or '':<35} {annonce:>8} {ligne['listing']:>8} "
+              f"{ligne['details']:>8} {base:>8}")
+
+    graines = resultat['graines']
+    print(f"{len(graines['pages_listing'])} pages de listing et {len(graines['livres'])} livres "
+          f"manquants écrits dans {FICHIER_GRAINES}")
+    return graines
+
+
+def lancer_crawl(arguments):
+    """
+    Lance un crawl Scrapy dans un processus séparé
+
+    Args:
+        arguments: Arguments passés à "scrapy crawl"
+    """
+    subprocess.run([sys.executable, "-m", "scrapy", "crawl", *arguments], check=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vérifie la complétude du dernier crawl")
+    parser.add_argument("--relancer", action="store_true",
+                        help="Re-crawler uniquement les pages et livres manquants")
+    options = parser.parse_args()
+
+    graines = verifier()
+
+    if options.relancer:
+        if graines['pages_listing']:
+            lancer_crawl(["books_by_categories_spider", "-a", f"graines={FICHIER_GRAINES}",
+                          "-o", f"{FLUX_COMPLEMENT_LISTING}.jl"])
+            # Les livres découverts sur les pages récupérées deviennent des graines
+            graines = verifier()
+
+        if graines['livres']:
+            lancer_crawl(["details_book_spider", "-a", f"graines={FICHIER_GRAINES}"])
+            verifier()
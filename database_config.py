@@ -1,53 +1,252 @@
 # -*- coding: utf-8 -*-
 """
 Configuration de la base de donnees PostgreSQL.
+
+Les parametres de connexion et du pool sont lus dans l'environnement
+(BOOKS_DB_*), avec les valeurs historiques par defaut. Une session par
+requete HTTP est ouverte par la dependance get_database_session et
+partagee par les repositories via une variable de contexte.
 """
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from urllib.parse import quote_plus
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+def lire_booleen(nom: str, defaut: bool) -> bool:
+    """
+    Lire un booleen dans l'environnement.
+
+    Args:
+        nom: Nom de la variable
+        defaut: Valeur si la variable est absente
+
+    Returns:
+        bool: Valeur lue
+    """
+    valeur = os.environ.get(nom)
+    if valeur is None:
+        return defaut
+    return valeur.strip().lower() in ("1", "true", "oui", "yes", "on")
 
 
 # Parametres de connexion PostgreSQL
 DATABASE_CONFIG = {
-    "host": "localhost",
-    "port": 5432,
-    "database": "books_scraping",
-    "user": "elvis",
-    "password": "azerty@&123"
+    "host": os.environ.get("BOOKS_DB_HOST", "localhost"),
+    "port": int(os.environ.get("BOOKS_DB_PORT", "5432")),
+    "database": os.environ.get("BOOKS_DB_NAME", "books_scraping"),
+    "user": os.environ.get("BOOKS_DB_USER", "elvis"),
+    "password": os.environ.get("BOOKS_DB_PASSWORD", "azerty@&123")
 }
 
-# URL de connexion SQLAlchemy avec encodage des caracteres speciaux
-from urllib.parse import quote_plus
+# Parametres du pool de connexions
+POOL_CONFIG = {
+    "pool_size": int(os.environ.get("BOOKS_DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.environ.get("BOOKS_DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.environ.get("BOOKS_DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.environ.get("BOOKS_DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": lire_booleen("BOOKS_DB_POOL_PRE_PING", True),
+}
 
+# Cache des requetes compilees par SQLAlchemy, et des requetes preparees par asyncpg
+TAILLE_CACHE_REQUETES = int(os.environ.get("BOOKS_DB_CACHE_REQUETES", "500"))
+TAILLE_CACHE_REQUETES_PREPAREES = int(os.environ.get("BOOKS_DB_CACHE_REQUETES_PREPAREES", "100"))
+
+# URL de connexion SQLAlchemy avec encodage des caracteres speciaux
 DATABASE_URL = f"postgresql://{DATABASE_CONFIG['user']}:{quote_plus(DATABASE_CONFIG['password'])}@{DATABASE_CONFIG['host']}:{DATABASE_CONFIG['port']}/{DATABASE_CONFIG['database']}"
 
+# URL du moteur asynchrone (pilote asyncpg) pour le mode API async
+ASYNC_DATABASE_URL = (DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+                      + f"?prepared_statement_cache_size={TAILLE_CACHE_REQUETES_PREPAREES}")
+
+
+class MesuresPool:
+    """
+    Mesures d'un pool de connexions : attente au checkout, connexions
+    utilisees, checkouts en debordement (overflow) et attentes expirees.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.verrou_mesures = threading.Lock()
+        self.checkouts = 0
+        self.checkouts_debordement = 0
+        self.attentes_expirees = 0
+        self.attente_totale = 0.0
+        self.attente_max = 0.0
+
+    def _do_get(self):
+        debut = time.perf_counter()
+        try:
+            connexion = super()._do_get()
+        except PoolTimeoutError:
+            with self.verrou_mesures:
+                self.attentes_expirees += 1
+            raise
+
+        attente = time.perf_counter() - debut
+        with self.verrou_mesures:
+            self.checkouts += 1
+            self.attente_totale += attente
+            self.attente_max = max(self.attente_max, attente)
+            if self.checkedout() > self.size():
+                self.checkouts_debordement += 1
+        return connexion
+
+    def recreate(self):
+        # Les mesures sont conservees si SQLAlchemy recree le pool
+        nouveau = super().recreate()
+        nouveau.checkouts, nouveau.checkouts_debordement = self.checkouts, self.checkouts_debordement
+        nouveau.attentes_expirees = self.attentes_expirees
+        nouveau.attente_totale, nouveau.attente_max = self.attente_totale, self.attente_max
+        return nouveau
+
+    def statistiques(self) -> dict:
+        """
+        Mesures courantes du pool.
+
+        Returns:
+            dict: Taille, connexions utilisees, debordement et temps d'attente
+        """
+        with self.verrou_mesures:
+            return {
+                "taille": self.size(),
+                "connexions_utilisees": self.checkedout(),
+                "connexions_disponibles": self.checkedin(),
+                "debordement_courant": max(self.overflow(), 0),
+                "checkouts": self.checkouts,
+                "checkouts_debordement": self.checkouts_debordement,
+                "attentes_expirees": self.attentes_expirees,
+                "attente_moyenne_ms": round(self.attente_totale / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "attente_max_ms": round(self.attente_max * 1000, 3),
+            }
+
+
+class PoolInstrumente(MesuresPool, QueuePool):
+    """Pool de connexions synchrone instrumente."""
+
+
+class PoolAsyncInstrumente(MesuresPool, AsyncAdaptedQueuePool):
+    """Pool de connexions asynchrone instrumente."""
+
+
 # Configuration SQLAlchemy
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, poolclass=PoolInstrumente,
+                       query_cache_size=TAILLE_CACHE_REQUETES, **POOL_CONFIG)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Moteur asynchrone cree au premier usage : asyncpg n'est requis qu'en mode async
+async_engine = None
+_async_session_local = None
+
+# Session de la requete HTTP en cours (None hors requete : scripts, tests)
+session_requete: ContextVar[Optional[Session]] = ContextVar("session_requete", default=None)
+session_async_requete: ContextVar = ContextVar("session_async_requete", default=None)
 
-def get_database_session():
+
+async def get_database_session():
     """
-    Obtenir une session de base de donnees.
+    Dependance FastAPI : ouvrir une session pour la requete et la partager.
+
+    La dependance est async pour que la variable de contexte soit posee dans
+    la tache de la requete ; les appels au service executes dans le pool de
+    threads en heritent.
 
     Returns:
-        Session: Session SQLAlchemy
+        Session: Session SQLAlchemy de la requete
     """
+    from starlette.concurrency import run_in_threadpool
+
     db = SessionLocal()
+    jeton = session_requete.set(db)
     try:
         yield db
     finally:
-        db.close()
+        session_requete.reset(jeton)
+        # Rend la connexion au pool (rollback) sans bloquer la boucle
+        await run_in_threadpool(db.close)
+
+
+async def get_async_database_session():
+    """
+    Dependance FastAPI : ouvrir une session asynchrone pour la requete et la partager.
+
+    Returns:
+        AsyncSession: Session SQLAlchemy asynchrone de la requete
+    """
+    async with obtenir_async_session_local()() as db:
+        jeton = session_async_requete.set(db)
+        try:
+            yield db
+        finally:
+            session_async_requete.reset(jeton)
+
+
+def obtenir_async_session_local():
+    """
+    Obtenir la fabrique de sessions asynchrones, en creant le moteur au premier appel.
+
+    Returns:
+        async_sessionmaker: Fabrique de sessions AsyncSession
+    """
+    global async_engine, _async_session_local
+    if _async_session_local is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=PoolAsyncInstrumente,
+                                           query_cache_size=TAILLE_CACHE_REQUETES, **POOL_CONFIG)
+        _async_session_local = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+    return _async_session_local
+
+
+def statistiques_pools() -> dict:
+    """
+    Mesures des pools de connexions crees.
+
+    Returns:
+        dict: Mesures par pool (sync, async)
+    """
+    statistiques = {"sync": engine.pool.statistiques()}
+    if async_engine is not None:
+        statistiques["async"] = async_engine.sync_engine.pool.statistiques()
+    return statistiques
 
 
 def create_tables():
     """
     Creer toutes les tables dans la base de donnees.
+
+    Active l'extension pg_trgm (index trigramme du titre), puis ajoute les
+    colonnes et les index ajoutes au modele apres la creation initiale des tables.
     """
+    with engine.begin() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
     Base.metadata.create_all(bind=engine)
 
+    # create_all ne cree ni les colonnes ni les index manquants d'une table existante
+    inspecteur = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existantes = {colonne["name"] for colonne in inspecteur.get_columns(table.name)}
+            for colonne in table.columns:
+                if colonne.name not in existantes:
+                    definition = CreateColumn(colonne).compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {definition}'))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
 
 def test_connection():
     """
@@ -2,8 +2,14 @@
 Module principal de l'API FastAPI pour les données de scraping de livres.
 """
 
-from fastapi import FastAPI
-from api.routes import books, categories
+from fastapi import Depends, FastAPI
+from api.routes import admin, analytique, books, categories
+from api.routes.conditionnel import ReponsesConditionnelles, SuiviGeneration
+from api.routes.instantanes import INSTANTANES_ACTIVES, InstantanesReponses, ServirInstantanes
+from api.repositories.rechargement import arreter_surveillance, demarrer_surveillance
+from api.services.cache import statistiques_caches
+from api.services.fabrique import MODE_API, SOURCE_API, appeler_service, dependance_session
+from database_config import statistiques_pools
 
 # Créer l'application FastAPI
 app = FastAPI(
@@ -14,9 +20,29 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Enregistrer les routes
-app.include_router(books.router, prefix="/books", tags=["Books"])
-app.include_router(categories.router, prefix="/categories", tags=["Categories"])
+# Enregistrer les routes : une session de base de donnees par requete
+session_par_requete = [Depends(dependance_session())]
+app.include_router(books.router, prefix="/books", tags=["Books"], dependencies=session_par_requete)
+app.include_router(categories.router, prefix="/categories", tags=["Categories"], dependencies=session_par_requete)
+# Analyses en memoire : aucune session par requete, les colonnes sont chargees une fois par version
+app.include_router(analytique.router, prefix="/analytique", tags=["Analytique"])
+# Rechargement des flux JSON a chaud, protege par BOOKS_ADMIN_TOKEN
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+
+# Surveillance des flux JSON : les repositories JSON se rechargent quand un crawl se termine
+app.add_event_handler("startup", demarrer_surveillance)
+app.add_event_handler("shutdown", arreter_surveillance)
+
+# Generation du jeu de donnees, relue au plus une fois par intervalle et partagee par les middlewares
+suivi_generation = SuiviGeneration(lambda: appeler_service(books.book_service.obtenir_generation_dataset))
+instantanes = InstantanesReponses()
+
+# Routes les plus lues servies depuis des instantanes pre-compresses de la version courante
+if INSTANTANES_ACTIVES:
+    app.add_middleware(ServirInstantanes, suivi=suivi_generation, instantanes=instantanes)
+
+# ETag / Last-Modified et 304 sur /books et /categories, avant toute requete sur les livres
+app.add_middleware(ReponsesConditionnelles, suivi=suivi_generation)
 
 
 @app.get("/")
@@ -31,6 +57,7 @@ def accueil():
         "endpoints": {
             "books": "/books",
             "categories": "/categories",
+            "analytique": "/analytique",
             "examples": {
                 "all_books": "/books/",
                 "book_by_id": "/books/1",
@@ -46,7 +73,17 @@ def verifier_sante():
     """
     Endpoint de vérification de l'état de l'API.
     """
-    return {"status": "healthy", "service": "books-api"}
+    return {"status": "healthy", "service": "books-api", "mode": MODE_API, "source": SOURCE_API}
+
+
+@app.get("/metrics")
+def obtenir_metriques():
+    """
+    Compteurs des caches de lecture (succès, échecs, évictions, version du jeu de données),
+    des instantanés pré-rendus (rendus, réponses servies, tailles par encodage)
+    et mesures des pools de connexions (attente au checkout, connexions utilisées, débordement).
+    """
+    return {"caches": statistiques_caches(), "instantanes": instantanes.statistiques(), "pools": statistiques_pools()}
 
 
 if __name__ == "__main__":
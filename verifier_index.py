@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script pour verifier que les recherches de livres utilisent leurs index
+
+Chaque requete du repository est passee a EXPLAIN (FORMAT JSON) et le plan
+doit lire l'index attendu. Les parcours sequentiels sont desactives pour la
+transaction : sur une petite table, PostgreSQL les prefere meme quand l'index
+est utilisable, et c'est l'utilisabilite de l'index qui est verifiee ici.
+
+A lancer apres create_tables() et un crawl :
+
+    python verifier_index.py
+"""
+import sys
+
+from sqlalchemy import func, select, text
+
+from api.models.book_sql import BookSQL
+from api.models.pagination import Pagination
+from api.models.resultat_plein_texte import CHAMPS_TRI_PLEIN_TEXTE
+from api.repositories.book_repository_sql import BookRepositorySQL
+from database_config import engine
+
+
+def index_du_plan(noeud):
+    """
+    Collecte les noms d'index lus par un plan et ses sous-plans
+
+    Args:
+        noeud: Noeud du plan EXPLAIN (FORMAT JSON)
+
+    Returns:
+        set: Noms des index lus
+    """
+    index = {noeud["Index Name"]} if "Index Name" in noeud else set()
+    for sous_plan in noeud.get("Plans", []):
+        index |= index_du_plan(sous_plan)
+    return index
+
+
+def expliquer(connection, requete):
+    """
+    Execute EXPLAIN sur une requete SQLAlchemy
+
+    Args:
+        connection: Connexion ouverte dans une transaction
+        requete: Requete select() a expliquer
+
+    Returns:
+        set: Noms des index lus par le plan
+    """
+    compilee = requete.compile(dialect=engine.dialect)
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compilee}", compilee.params).scalar()
+    return index_du_plan(plan[0]["Plan"])
+
+
+def verifier_plans():
+    """
+    Verifie le plan de chaque recherche et la correspondance exacte des categories
+
+    Returns:
+        bool: True si toutes les verifications reussissent
+    """
+    repository = BookRepositorySQL()
+    pagination_plein_texte = Pagination.depuis_parametres("-pertinence", 20, champs_tri=CHAMPS_TRI_PLEIN_TEXTE)
+    verifications = [
+        ("categorie exacte", "ix_books_categorie_lower",
+         select(BookSQL.id).filter(repository.filtre_categorie("Fiction"))),
+        ("titre approximatif", "ix_books_title_trgm",
+         repository.requete_approximative("harry poter", "title", 20)),
+        ("categorie approximative", "ix_books_categorie_trgm",
+         repository.requete_approximative("Ficton", "categorie", 20)),
+        ("plein texte", "ix_books_vecteur_recherche",
+         repository.requete_plein_texte("dark secret", pagination_plein_texte)),
+        ("lot d'IDs", "books_pkey", repository.requete_par_ids([3, 1, 2])),
+    ]
+
+    succes = True
+    with engine.begin() as connection:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        connection.execute(repository.requete_seuil_similarite(0.3))
+
+        for nom, index_attendu, requete in verifications:
+            index_lus = expliquer(connection, requete)
+            ok = index_attendu in index_lus
+            succes &= ok
+            print(f"{'OK    ' if ok else 'ECHEC '} {nom}: {index_attendu} "
+                  f"(index lus: {', '.join(sorted(index_lus)) or 'aucun'})")
+
+        # "Fiction" ne doit pas trouver "Historical Fiction"
+        categories = connection.execute(
+            select(func.distinct(BookSQL.categorie)).filter(repository.filtre_categorie("Fiction"))
+        ).scalars().all()
+        ok = all(categorie.lower() == "fiction" for categorie in categories)
+        succes &= ok
+        print(f"{'OK    ' if ok else 'ECHEC '} categorie exacte sans sous-chaine: {categories}")
+
+    return succes
+
+
+if __name__ == "__main__":
+    print("Verification des plans de recherche...")
+    sys.exit(0 if verifier_plans() else 1)